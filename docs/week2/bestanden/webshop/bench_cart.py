@@ -0,0 +1,92 @@
+"""
+Benchmark: de winkelwagen als lijst (oud) en als dict met aantallen (nieuw).
+
+Met een winkelwagen van 10.000 verschillende producten meten we:
+- toevoegen:   elk product twee keer toevoegen
+- totaal:      1000 keer bereken_totaal() (Order roept hem twee keer aan)
+- verwijderen: elk product één voor één verwijderen
+
+Run met:
+    python bench_cart.py [--regels 10000]
+"""
+import argparse
+import time
+
+from webshop import Cart, Customer, Product
+
+
+class ListCart:
+    """De oude winkelwagen: een platte lijst met producten (ter vergelijking)."""
+
+    def __init__(self, klant: Customer):
+        """Maak een lege winkelwagen aan."""
+        self.items: list[Product] = []
+        self.klant = klant
+
+    def voeg_toe(self, product: Product) -> None:
+        """Voeg een product toe (append)."""
+        self.items.append(product)
+
+    def verwijder(self, product: Product) -> bool:
+        """Verwijder een product (zoekt door de hele lijst)."""
+        if product in self.items:
+            self.items.remove(product)
+            return True
+        return False
+
+    def bereken_totaal(self) -> float:
+        """Tel alle prijzen op (elke keer de hele lijst)."""
+        return sum(product.prijs for product in self.items)
+
+
+def meet(functie) -> float:
+    """Voer functie één keer uit en geef de duur in milliseconden."""
+    start = time.perf_counter()
+    functie()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(wagen, producten: list[Product]) -> dict:
+    """Meet toevoegen, totaal en verwijderen voor één winkelwagen."""
+    def toevoegen():
+        for product in producten:
+            wagen.voeg_toe(product)
+        for product in producten:
+            wagen.voeg_toe(product)
+
+    def totaal():
+        for _ in range(1000):
+            wagen.bereken_totaal()
+
+    def verwijderen():
+        for product in producten:
+            wagen.verwijder(product)
+            wagen.verwijder(product)
+
+    result = {'toevoegen': meet(toevoegen), 'totaal': meet(totaal)}
+    result['bedrag'] = wagen.bereken_totaal()
+    result['verwijderen'] = meet(verwijderen)
+    return result
+
+
+def main() -> None:
+    """Vergelijk de lijst en de dict bij een grote winkelwagen."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--regels', type=int, default=10000, help='Aantal verschillende producten')
+    args = parser.parse_args()
+
+    producten = [Product(f"Product {i}", 1 + i % 100 + 0.99, 10) for i in range(args.regels)]
+    klant = Customer("Bench", "bench@webshop.nl")
+    oud = run(ListCart(klant), producten)
+    nieuw = run(Cart(klant), producten)
+    assert round(oud['bedrag'], 2) == nieuw['bedrag']
+
+    print(f"{args.regels} producten, elk 2 stuks (totaal €{nieuw['bedrag']:.2f})")
+    print(f"{'':<26}{'lijst':>12}{'dict':>12}")
+    for naam, label in [('toevoegen', 'toevoegen (2x)'), ('totaal', '1000x bereken_totaal()'),
+                        ('verwijderen', 'verwijderen (2x)')]:
+        print(f"{label:<26}{oud[naam]:>9.1f} ms{nieuw[naam]:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -52,7 +52,7 @@ class Order:
         Returns:
             Dict met bestellingsgegevens, of None bij lege winkelwagen
         """
-        if not self.winkelwagen.items:
+        if not self.winkelwagen.regels:
             return None
 
         subtotaal = self.winkelwagen.bereken_totaal()
@@ -65,7 +65,7 @@ class Order:
         return {
             "klant": self.klant.naam,
             "email": self.klant.email,
-            "producten": list(self.winkelwagen.items),
+            "producten": self.winkelwagen.items,
             "subtotaal": subtotaal,
             "verzendkosten": verzending,
             "totaal": eindtotaal,
@@ -79,5 +79,5 @@ class Order:
         print(f"Klant: {self.klant.naam}")
         print(f"Datum: {self.besteldatum.strftime('%d-%m-%Y %H:%M')}")
         print(f"Status: {self.status}")
-        print(f"Aantal producten: {len(self.winkelwagen.items)}")
+        print(f"Aantal producten: {self.winkelwagen.aantal_items()}")
         print(f"Totaalbedrag: €{self.bereken_totaal():.2f}")
@@ -24,8 +24,56 @@ class Product:
         return f"{self.naam} (€{self.prijs:.2f})"
 
 
+class CartLine:
+    """Een regel in de winkelwagen: één product met een aantal.
+
+    De prijs wordt vastgelegd bij het aanmaken van de regel (prijs_centen).
+    Verandert product.prijs daarna, dan blijft de regel de oude prijs
+    gebruiken. Zo klopt het bijgehouden subtotaal van de Cart altijd met
+    de regels. Wil je de nieuwe prijs, verwijder het product dan en voeg
+    het opnieuw toe.
+    """
+
+    def __init__(self, product: Product, aantal: int = 1):
+        """Maak een regel aan.
+
+        Args:
+            product: Het product
+            aantal: Aantal stuks (default: 1)
+        """
+        self.product = product
+        self.aantal = aantal
+        # Prijs in centen op het moment van toevoegen: een momentopname, geen
+        # verwijzing naar product.prijs (en geen afrondingsfouten bij optellen)
+        self.prijs_centen = round(product.prijs * 100)
+
+    @property
+    def subtotaal(self) -> float:
+        """Prijs x aantal in euro's."""
+        return self.prijs_centen * self.aantal / 100
+
+    def __str__(self) -> str:
+        """String representatie van de regel."""
+        return f"{self.aantal}x {self.product} = €{self.subtotaal:.2f}"
+
+
 class Cart:
-    """Klasse voor een winkelwagen met producten."""
+    """Klasse voor een winkelwagen met producten.
+
+    De winkelwagen is een dict van product naar regel (CartLine) met een
+    aantal. Toevoegen, verwijderen en het totaal opvragen zijn O(1): ze
+    hoeven niet door de hele wagen te lopen. Het subtotaal (in centen)
+    wordt bij elke wijziging bijgehouden.
+
+    Let op: elke regel rekent met de prijs van het moment dat het product
+    voor het eerst werd toegevoegd (zie CartLine). Een latere
+    prijswijziging van het product verandert het totaal van de wagen dus
+    niet.
+
+    Product heeft geen id: het product object zelf is de sleutel van de
+    dict (net als bij de oude lijst, waar `in` en `remove` ook naar
+    hetzelfde object zochten).
+    """
 
     def __init__(self, klant: 'Customer'):
         """Maak een winkelwagen aan.
@@ -33,47 +81,117 @@ class Cart:
         Args:
             klant: Customer die deze winkelwagen gebruikt
         """
-        self.items: list[Product] = []
+        self.regels: dict[Product, CartLine] = {}
         self.klant = klant
+        self._subtotaal_centen = 0
+        self._aantal = 0
 
-    def voeg_toe(self, product: Product) -> None:
+    @property
+    def items(self) -> list[Product]:
+        """Alle producten als lijst, elk product zo vaak als zijn aantal.
+
+        Voor code die nog een lijst verwacht (zoals Order); dit is een nieuwe
+        lijst, dus aanpassen heeft geen effect op de winkelwagen.
+        """
+        return [regel.product for regel in self.regels.values() for _ in range(regel.aantal)]
+
+    def voeg_toe(self, product: Product, aantal: int = 1) -> None:
         """Voeg een product toe aan de winkelwagen.
 
         Args:
             product: Het toe te voegen product
+            aantal: Aantal stuks (default: 1)
+
+        Raises:
+            ValueError: Als het aantal kleiner dan 1 is
         """
-        self.items.append(product)
+        if aantal < 1:
+            raise ValueError("Aantal moet minimaal 1 zijn")
+        regel = self.regels.get(product)
+        if regel is None:
+            regel = self.regels[product] = CartLine(product, aantal)
+        else:
+            regel.aantal += aantal
+        self._subtotaal_centen += regel.prijs_centen * aantal
+        self._aantal += aantal
 
-    def verwijder(self, product: Product) -> bool:
+    def verwijder(self, product: Product, aantal: int = 1) -> bool:
         """Verwijder een product uit de winkelwagen.
 
         Args:
             product: Het te verwijderen product
+            aantal: Aantal stuks (default: 1); meer dan er in de wagen zit
+                verwijdert de hele regel
 
         Returns:
             True als product verwijderd, False als product niet gevonden
         """
-        if product in self.items:
-            self.items.remove(product)
-            return True
-        return False
+        regel = self.regels.get(product)
+        if regel is None or aantal < 1:
+            return False
+        aantal = min(aantal, regel.aantal)
+        regel.aantal -= aantal
+        if regel.aantal == 0:
+            del self.regels[product]
+        self._subtotaal_centen -= regel.prijs_centen * aantal
+        self._aantal -= aantal
+        return True
+
+    def voeg_toe_meerdere(self, producten: dict[Product, int]) -> None:
+        """Voeg meerdere producten in één keer toe.
+
+        Args:
+            producten: Dict van product naar aantal
+
+        Raises:
+            ValueError: Als een aantal kleiner dan 1 is (er wordt dan niets toegevoegd)
+        """
+        if any(aantal < 1 for aantal in producten.values()):
+            raise ValueError("Aantal moet minimaal 1 zijn")
+        for product, aantal in producten.items():
+            self.voeg_toe(product, aantal)
+
+    def verwijder_meerdere(self, producten: dict[Product, int]) -> int:
+        """Verwijder meerdere producten in één keer.
+
+        Args:
+            producten: Dict van product naar aantal
+
+        Returns:
+            Aantal producten (regels) dat gevonden en verwijderd is
+        """
+        return sum(self.verwijder(product, aantal) for product, aantal in producten.items())
+
+    def leeg(self) -> None:
+        """Maak de winkelwagen leeg."""
+        self.regels.clear()
+        self._subtotaal_centen = 0
+        self._aantal = 0
 
     def bereken_totaal(self) -> float:
-        """Bereken het totaalbedrag van alle producten.
+        """Geef het totaalbedrag van alle producten (bijgehouden, dus O(1)).
 
         Returns:
             Totaalbedrag in euro's
         """
-        return sum(product.prijs for product in self.items)
+        return self._subtotaal_centen / 100
+
+    def aantal_items(self) -> int:
+        """Geef het aantal producten in de wagen (alle aantallen opgeteld).
+
+        Returns:
+            Aantal stuks
+        """
+        return self._aantal
 
     def toon_inhoud(self) -> None:
         """Toon de volledige inhoud van de winkelwagen."""
-        if not self.items:
+        if not self.regels:
             print(f"Winkelwagen van {self.klant.naam} is leeg")
         else:
             print(f"\nWinkelwagen van {self.klant.naam}:")
-            for product in self.items:
-                print(f"  - {product}")
+            for regel in self.regels.values():
+                print(f"  - {regel}")
             print(f"Totaal: €{self.bereken_totaal():.2f}")
 
 
@@ -100,18 +218,18 @@ class Customer:
         Returns:
             Dict met bestellingsgegevens, of None bij lege winkelwagen
         """
-        if not winkelwagen.items:
+        if not winkelwagen.regels:
             return None
 
         totaal = winkelwagen.bereken_totaal()
         bestelling = {
             "klant": self.naam,
             "email": self.email,
-            "items": winkelwagen.items.copy(),
+            "items": winkelwagen.items,
             "totaal": totaal,
         }
         self.bestellingen.append(bestelling)
-        winkelwagen.items.clear()
+        winkelwagen.leeg()
         return bestelling
 
     def toon_bestellingen(self) -> None:
@@ -148,7 +266,7 @@ if __name__ == '__main__':
         print(f"Bevestiging naar: {bestelling['email']}")
 
     winkelmand.voeg_toe(monitor)
-    winkelmand.voeg_toe(muis)
+    winkelmand.voeg_toe(muis, 2)
     winkelmand.toon_inhoud()
     jan.plaats_bestelling(winkelmand)
 
@@ -1,7 +1,7 @@
 from mijnproject import app, db
 from flask import render_template, redirect, request, url_for, flash, Response
-from flask_login import login_user, login_required, logout_user
-from mijnproject.models import User
+from flask_login import login_user, login_required, logout_user, current_user
+from mijnproject.models import User, invalidate_user
 from mijnproject.forms import LoginForm, RegistrationForm
 
 
@@ -34,6 +34,7 @@ def logout() -> Response:
     Returns:
         Redirect naar home pagina
     """
+    invalidate_user(current_user.id)
     logout_user()
     flash('Je bent nu uitgelogd!')
     return redirect(url_for('home'))
@@ -1,8 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
 from mijnproject import db, login_manager
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_login import UserMixin
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String
+from flask_login import UserMixin, logout_user
+from sqlalchemy.orm import Mapped, mapped_column, Session
+from sqlalchemy import String, event
+
+# Begrensde cache van ingelogde gebruikers: user_id -> (verloopt_op, username)
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 300.0
+_user_cache: OrderedDict[int, tuple[float, str]] = OrderedDict()
+_user_cache_lock = threading.Lock()
+_user_cache_stats = {'hits': 0, 'misses': 0}
+# Gaat omhoog bij elke invalidatie: een load die daarvoor begon mag niet meer in de cache
+_user_cache_generation = 0
+
+
+class UserDeleted(AttributeError):
+    """De gebruiker uit de cache bestaat niet meer in de database."""
+
+
+class CachedUser(UserMixin):
+    """Lichtgewicht current_user uit de cache (id en username).
+
+    Andere attributen worden pas bij gebruik uit de database geladen.
+    Is de gebruiker intussen verwijderd, dan wordt hij uitgelogd en volgt
+    een UserDeleted.
+    """
+
+    def __init__(self, user_id: int, username: str):
+        self.id = user_id
+        self.username = username
+        self._user = None
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+            if self._user is None:
+                invalidate_user(self.id)
+                logout_user()
+                raise UserDeleted(f"Gebruiker {self.id} bestaat niet meer (uitgelogd)")
+        return getattr(self._user, name)
 
 
 @login_manager.user_loader
@@ -10,15 +52,63 @@ def load_user(user_id: int):
     """Laad gebruiker op basis van ID.
 
     Deze functie wordt gebruikt door Flask-Login om de huidige gebruiker
-    te laden en zijn/haar ID op te halen uit de sessie.
+    te laden en zijn/haar ID op te halen uit de sessie. Een recent
+    geladen gebruiker komt uit de cache, zonder database query.
+
+    Args:
+        user_id: Het ID van de gebruiker
+
+    Returns:
+        User (of CachedUser) object of None als niet gevonden
+    """
+    user_id = int(user_id)
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            _user_cache.move_to_end(user_id)
+            _user_cache_stats['hits'] += 1
+            return CachedUser(user_id, entry[1])
+        _user_cache_stats['misses'] += 1
+        generation = _user_cache_generation
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        with _user_cache_lock:
+            if generation != _user_cache_generation:
+                # Tijdens het laden gewijzigd: misschien hebben we de oude rij
+                return user
+            _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, user.username)
+            _user_cache.move_to_end(user_id)
+            while len(_user_cache) > USER_CACHE_SIZE:
+                _user_cache.popitem(last=False)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """Verwijder een gebruiker uit de cache (bij uitloggen of wijzigingen).
 
     Args:
         user_id: Het ID van de gebruiker
+    """
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache.pop(int(user_id), None)
+        _user_cache_generation += 1
+
+
+def user_cache_stats() -> dict:
+    """Geef hits, misses en hit-rate van de user cache.
 
     Returns:
-        User object of None als niet gevonden
+        Dict met size, hits, misses en hit_rate
     """
-    return db.session.get(User, int(user_id))
+    with _user_cache_lock:
+        lookups = _user_cache_stats['hits'] + _user_cache_stats['misses']
+        return {
+            'size': len(_user_cache),
+            **_user_cache_stats,
+            'hit_rate': _user_cache_stats['hits'] / lookups if lookups else 0.0,
+        }
 
 
 class User(db.Model, UserMixin):
@@ -41,6 +131,14 @@ class User(db.Model, UserMixin):
         """
         self.email = email
         self.username = username
+        self.set_password(password)
+
+    def set_password(self, password: str) -> None:
+        """Hash en bewaar een (nieuw) wachtwoord.
+
+        Args:
+            password: Wachtwoord in plain text
+        """
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password: str) -> bool:
@@ -53,3 +151,28 @@ class User(db.Model, UserMixin):
             True als wachtwoord correct is, anders False
         """
         return check_password_hash(self.password_hash, password)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context) -> None:
+    """Onthoud welke gebruikers in deze transactie wijzigen of verdwijnen."""
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, User) and (obj in session.deleted or session.is_modified(obj)):
+            session.info.setdefault('user_changes', set()).add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_cached_users(session) -> None:
+    """Haal gewijzigde gebruikers na de commit uit de cache.
+
+    Pas na de commit: daarvoor kan een ander request de oude rij nog laden
+    en opnieuw cachen, bijvoorbeeld na een wachtwoordwijziging.
+    """
+    for user_id in session.info.pop('user_changes', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session) -> None:
+    """Vergeet verzamelde wijzigingen na een rollback."""
+    session.info.pop('user_changes', None)
@@ -0,0 +1,356 @@
+"""
+Benchmark: dezelfde catalogus queries in raw SQL en met de ORM.
+
+De cursus heeft drie implementaties van dezelfde catalogus:
+- raw:    sqlite3 in WebshopDatabase (week 4/5)
+- orm:    Flask-SQLAlchemy models (week 6 en week 7a)
+- week7b: de blueprints van deze webshop (GROUP BY, contains_eager, ...)
+
+Dit script draait elke operatie tegen elke implementatie, bij een paar
+catalogus groottes, zoals de views het doen (dus inclusief de N+1 van
+category.product_count in week 6/7a). Elke implementatie krijgt een
+eigen database met dezelfde data. Na elke operatie wordt de session
+opgeruimd, net als na een request.
+
+Run met:
+    python bench_data_access.py [--sizes 100,1000,10000] [--repeat 200]
+                                [--output resultaten.json] [--compare vorige.json]
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from flask import Flask
+from sqlalchemy import insert
+
+DOCS = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+RAW_DATABASE = os.path.join(DOCS, 'week5', 'bestanden', 'webshop', 'database.py')
+ORM_MODELS = {
+    'week6': os.path.join(DOCS, 'week6', 'bestanden', 'webshop', 'models.py'),
+    'week7a': os.path.join(DOCS, 'week7a', 'bestanden', 'webshop', 'models.py'),
+}
+OPERATIONS = ('categories', 'category_page', 'product', 'search', 'insert', 'update')
+CATEGORIES = 20
+SEARCH_TERMS = ('pro', 'kabel', 'mini', 'lamp')
+
+# Zelfde schema als week3/bestanden/create_webshop.py
+RAW_SCHEMA = """
+CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT);
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, price REAL NOT NULL, stock INTEGER NOT NULL,
+    description TEXT, category_id INTEGER, FOREIGN KEY (category_id) REFERENCES categories(id)
+);
+"""
+
+
+def load_module(name: str, path: str):
+    """Importeer een .py bestand uit een andere week onder een eigen naam."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def catalog_rows(products: int, seed: int = 42) -> tuple[list[dict], list[dict]]:
+    """Dezelfde categorieën en producten voor elke implementatie."""
+    rng = random.Random(seed)
+    words = ('Boek', 'Laptop', 'Kabel', 'Lamp', 'Stoel', 'Tas')
+    categories = [{'id': c, 'name': f'Categorie {c}', 'description': f'Demo categorie {c}'}
+                  for c in range(1, CATEGORIES + 1)]
+    items = [{
+        'name': f'{rng.choice(words)} {rng.choice(("Pro", "Mini", "Set", "XL"))} {p}',
+        'price': round(rng.uniform(5, 500), 2),
+        'stock': rng.randint(0, 50),
+        'description': 'Demo product',
+        'category_id': rng.randint(1, CATEGORIES),
+    } for p in range(products)]
+    return categories, items
+
+
+class RawImplementation:
+    """WebshopDatabase (sqlite3, week 4/5)."""
+
+    name = 'raw'
+
+    def __init__(self, db_path: str, categories: list[dict], products: list[dict]):
+        with sqlite3.connect(db_path) as conn:
+            conn.executescript(RAW_SCHEMA)
+            conn.executemany("INSERT INTO categories VALUES (:id, :name, :description)", categories)
+            conn.executemany(
+                "INSERT INTO products (name, price, stock, description, category_id) "
+                "VALUES (:name, :price, :stock, :description, :category_id)", products)
+        self.db = load_module('week5_database', RAW_DATABASE).WebshopDatabase(db_path)
+
+    def categories(self):
+        return [(row['name'], row['product_count']) for row in self.db.get_category_stats()]
+
+    def category_page(self, category_id):
+        return self.db.get_category_by_id(category_id), self.db.get_products_by_category(category_id)
+
+    def product(self, product_id):
+        row = self.db.get_product_by_id(product_id)
+        return row['name'], row['category_name']
+
+    def search(self, term):
+        return self.db.search_products(term)
+
+    def insert(self, values):
+        return self.db.add_product(**values)
+
+    def update(self, product_id, values):
+        return self.db.update_product(product_id, **values)
+
+    def activate(self):
+        """Geen app context nodig."""
+        return contextlib.nullcontext()
+
+    def close(self):
+        pass
+
+
+class OrmImplementation:
+    """Flask-SQLAlchemy models zoals de views van week 6/7a ze gebruiken."""
+
+    def __init__(self, name: str, models_path: str, db_path: str, categories: list[dict], products: list[dict]):
+        self.name = name
+        self.models = load_module(f'{name}_models', models_path)
+        self.db = self.models.db
+        self.app = Flask(name)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+        self.db.init_app(self.app)
+        self.seed(categories, products)
+
+    def seed(self, categories: list[dict], products: list[dict]) -> None:
+        """Maak de tabellen aan en vul ze met bulk inserts."""
+        with self.activate():
+            self.db.create_all()
+            self.db.session.execute(insert(self.models.Category), categories)
+            self.db.session.execute(insert(self.models.Product), products)
+            self.db.session.commit()
+
+    def activate(self):
+        """App context van deze implementatie (elke implementatie heeft een eigen db)."""
+        return self.app.app_context()
+
+    def categories(self):
+        # index.html doet {{ category.product_count }} per categorie (N+1)
+        categories = self.db.session.execute(self.db.select(self.models.Category)).scalars().all()
+        return [(c.name, c.product_count) for c in categories]
+
+    def category_page(self, category_id):
+        Product = self.models.Product
+        category = self.db.session.get(self.models.Category, category_id)
+        products = self.db.session.execute(
+            self.db.select(Product).filter_by(category_id=category_id).order_by(Product.name)
+        ).scalars().all()
+        return category.name, [(p.name, p.price) for p in products]
+
+    def product(self, product_id):
+        product = self.db.session.get(self.models.Product, product_id)
+        return product.name, product.category.name
+
+    def search(self, term):
+        Product = self.models.Product
+        products = self.db.session.execute(
+            self.db.select(Product).where(Product.name.ilike(f'%{term}%')).order_by(Product.name)
+        ).scalars().all()
+        return [(p.name, p.category.name) for p in products]
+
+    def insert(self, values):
+        product = self.models.Product(**values)
+        self.db.session.add(product)
+        self.db.session.commit()
+        return product.id
+
+    def update(self, product_id, values):
+        product = self.db.session.get(self.models.Product, product_id)
+        for key, value in values.items():
+            setattr(product, key, value)
+        self.db.session.commit()
+
+    def end_request(self):
+        """Zoals na een request: session weg, identity map leeg."""
+        self.db.session.remove()
+
+    def close(self):
+        with self.activate():
+            self.db.session.remove()
+            self.db.engine.dispose()
+
+
+class Week7bImplementation(OrmImplementation):
+    """De queries uit de week7b blueprints (webshop_app)."""
+
+    def __init__(self, db_path: str, categories: list[dict], products: list[dict]):
+        from webshop_app import create_app, models
+
+        self.name = 'week7b'
+        self.models = models
+        self.db = models.db
+        self.app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path})
+        self.seed(categories, products)
+
+    def categories(self):
+        # products.index: aantallen in één GROUP BY
+        Category, Product = self.models.Category, self.models.Product
+        stmt = (
+            self.db.select(Category.id, Category.name, self.db.func.count(Product.id).label('product_count'))
+            .outerjoin(Product, Product.category_id == Category.id)
+            .group_by(Category.id)
+        )
+        return [(row.name, row.product_count) for row in self.db.session.execute(stmt)]
+
+    def search(self, term):
+        # api.search: alleen de kolommen die nodig zijn, geen Product objecten
+        Category, Product = self.models.Category, self.models.Product
+        stmt = (
+            self.db.select(Product.id, Product.name, Category.name.label('category_name'))
+            .join(Category, Product.category_id == Category.id)
+            .where(Product.name.ilike(f'%{term}%'))
+            .order_by(Product.name)
+        )
+        return self.db.session.execute(stmt).all()
+
+
+def time_operation(impl, operation: str, repeat: int, products: int, rng: random.Random) -> list[float]:
+    """Voer een operatie `repeat` keer uit en geef de duur per keer."""
+    timings = []
+    for _ in range(repeat):
+        if operation == 'categories':
+            call = impl.categories
+        elif operation == 'category_page':
+            category_id = rng.randint(1, CATEGORIES)
+            call = lambda: impl.category_page(category_id)  # noqa: E731
+        elif operation == 'product':
+            product_id = rng.randint(1, products)
+            call = lambda: impl.product(product_id)  # noqa: E731
+        elif operation == 'search':
+            term = rng.choice(SEARCH_TERMS)
+            call = lambda: impl.search(term)  # noqa: E731
+        elif operation == 'insert':
+            values = {'name': 'Nieuw product', 'price': 9.99, 'stock': 1,
+                      'category_id': rng.randint(1, CATEGORIES), 'description': 'Benchmark'}
+            call = lambda: impl.insert(values)  # noqa: E731
+        else:
+            product_id = rng.randint(1, products)
+            values = {'name': f'Product {product_id}', 'price': round(rng.uniform(5, 500), 2),
+                      'stock': rng.randint(0, 50), 'category_id': rng.randint(1, CATEGORIES),
+                      'description': 'Bijgewerkt'}
+            call = lambda: impl.update(product_id, values)  # noqa: E731
+
+        start = time.perf_counter()
+        call()
+        if hasattr(impl, 'end_request'):
+            impl.end_request()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(sizes: list[int], repeat: int, operations: list[str]) -> dict:
+    """Draai alle operaties tegen alle implementaties.
+
+    Returns:
+        {size: {operation: {implementatie: {'median_us': ..., 'p95_us': ...}}}}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            categories, products = catalog_rows(size)
+            implementations = [RawImplementation(os.path.join(tmp, f'raw-{size}.db'), categories, products)]
+            for name, path in ORM_MODELS.items():
+                implementations.append(
+                    OrmImplementation(name, path, os.path.join(tmp, f'{name}-{size}.db'), categories, products))
+            implementations.append(Week7bImplementation(os.path.join(tmp, f'week7b-{size}.db'), categories, products))
+
+            results[size] = {}
+            for operation in operations:
+                results[size][operation] = {}
+                for impl in implementations:
+                    # Zelfde seed per implementatie: dezelfde ids en zoektermen
+                    with impl.activate():
+                        timings = sorted(time_operation(impl, operation, repeat, size, random.Random(size)))
+                    results[size][operation][impl.name] = {
+                        'median_us': statistics.median(timings) * 1e6,
+                        'p95_us': timings[int(len(timings) * 0.95) - 1] * 1e6,
+                    }
+            for impl in reversed(implementations):
+                impl.close()
+            # De modules van week 6/7a gebruiken de tabelnamen opnieuw bij de volgende grootte
+            for name in ORM_MODELS:
+                sys.modules.pop(f'{name}_models', None)
+    return results
+
+
+def print_table(results: dict, previous: dict | None, threshold: float) -> list[str]:
+    """Print een tabel per catalogus grootte en geef de regressies terug."""
+    regressions = []
+    for size, operations in results.items():
+        names = list(next(iter(operations.values())))
+        print(f"\n📦 {size} producten (mediaan in µs, tussen haakjes t.o.v. raw)")
+        print(f"{'operatie':<14}" + ''.join(f"{name:>18}" for name in names))
+        for operation, impls in operations.items():
+            raw = impls['raw']['median_us']
+            cells = []
+            for name in names:
+                median = impls[name]['median_us']
+                cell = f"{median:.0f}" if name == 'raw' else f"{median:.0f} ({median / raw:.1f}x)"
+                old = (previous or {}).get(str(size), {}).get(operation, {}).get(name)
+                if old and median > old['median_us'] * (1 + threshold):
+                    cell += ' ⚠️'
+                    regressions.append(f"{size}/{operation}/{name}: {old['median_us']:.0f} -> {median:.0f} µs")
+                cells.append(f"{cell:>18}")
+            print(f"{operation:<14}" + ''.join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergelijk raw SQL en ORM implementaties.")
+    parser.add_argument('--sizes', default='100,1000,10000', help="Aantallen producten, komma-gescheiden")
+    parser.add_argument('--repeat', type=int, default=200, help="Herhalingen per operatie")
+    parser.add_argument('--operations', default=','.join(OPERATIONS), help="Operaties, komma-gescheiden")
+    parser.add_argument('--output', help="Bewaar de resultaten als JSON")
+    parser.add_argument('--compare', help="JSON van een vorige run; markeer regressies")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Regressie drempel (0.25 = 25%% trager)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    operations = [op for op in args.operations.split(',') if op in OPERATIONS]
+    results = run(sizes, args.repeat, operations)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    regressions = print_table(results, previous, args.threshold)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'python': sys.version.split()[0],
+                    'repeat': args.repeat,
+                },
+                'results': {str(size): ops for size, ops in results.items()},
+            }, f, indent=2)
+        print(f"\n💾 Resultaten bewaard in {args.output}")
+
+    if regressions:
+        print("\n❌ Regressies:")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: facet aantallen uit de bitmap index vs. GROUP BY queries.
+
+Per willekeurige filtercombinatie (categorieën, prijsklassen, voorraad)
+meten we:
+- sql:     de resultaatpagina plus drie GROUP BY queries voor de aantallen
+           per facet (wat /browse zonder index per request zou doen)
+- bitmap:  facet_index.search() (AND/OR op ints, bit_count)
+- page:    GET /browse via de test client (incl. de query voor de pagina)
+
+Daarnaast de bouwtijd en de grootte van de bitmaps.
+
+Run met:
+    python bench_facets.py [--sizes 1000,10000,100000] [--queries 200]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import case, insert
+
+from webshop_app import create_app, db
+from webshop_app.facets import facet_index
+from webshop_app.models import Category, Product
+
+
+def seed(products: int, rng: random.Random) -> list[int]:
+    """Vul de database met 20 categorieën en willekeurige producten."""
+    categories = [Category(f'Categorie {c}', 'Benchmark') for c in range(20)]
+    db.session.add_all(categories)
+    db.session.flush()
+    category_ids = [category.id for category in categories]
+    db.session.execute(insert(Product), [
+        {'name': f'Product {p}', 'price': round(rng.lognormvariate(3.5, 1), 2),
+         'stock': rng.choice((0, 0, 1, 5, 20)), 'category_id': rng.choice(category_ids)}
+        for p in range(products)
+    ])
+    db.session.commit()
+    return category_ids
+
+
+def combinations(category_ids: list[int], count: int, rng: random.Random) -> list[dict]:
+    """Willekeurige filters zoals een bezoeker ze aanklikt."""
+    bands = [band[0] for band in facet_index.price_bands]
+    return [
+        {'categories': rng.sample(category_ids, rng.randint(0, 2)),
+         'prices': rng.sample(bands, rng.randint(0, 2)),
+         'in_stock': rng.random() < 0.5}
+        for _ in range(count)
+    ]
+
+
+def sql_search(categories, prices, in_stock) -> None:
+    """Dezelfde aantallen met SQL: pagina, totaal en een GROUP BY per facet."""
+    band = case(*[
+        (Product.price < high, key) for key, _, high, _ in facet_index.price_bands if high is not None
+    ], else_=facet_index.price_bands[-1][0])
+    filters = {
+        'category': Product.category_id.in_(categories) if categories else None,
+        'price': band.in_(prices) if prices else None,
+        'stock': Product.stock > 0 if in_stock else None,
+    }
+
+    def where(without=None):
+        return [clause for facet, clause in filters.items() if facet != without and clause is not None]
+
+    db.session.execute(db.select(Product).where(*where()).order_by(Product.id).limit(24)).all()
+    db.session.execute(db.select(db.func.count(Product.id)).where(*where())).scalar()
+    db.session.execute(db.select(Product.category_id, db.func.count()).where(*where('category'))
+                       .group_by(Product.category_id)).all()
+    db.session.execute(db.select(band, db.func.count()).where(*where('price')).group_by(band)).all()
+    db.session.execute(db.select(db.func.count()).where(*where('stock'), Product.stock > 0)).scalar()
+
+
+def timed(func, queries: list[dict]) -> float:
+    """Mediaan in microseconden per filtercombinatie."""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples)
+
+
+def run(products: int, count: int) -> dict:
+    """Meet alles voor één catalogus grootte."""
+    rng = random.Random(42)
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        category_ids = seed(products, rng)
+        queries = combinations(category_ids, count, rng)
+        facet_index.build()
+        stats = facet_index.stats()
+        sql_us = timed(lambda query: sql_search(**query), queries)
+        bitmap_us = timed(lambda query: facet_index.search(**query), queries)
+
+    def page(query):
+        client.get('/browse', query_string={'category': query['categories'], 'price': query['prices'],
+                                            'in_stock': '1' if query['in_stock'] else ''})
+
+    page_us = timed(page, queries)
+    return {'products': products, 'sql': sql_us, 'bitmap': bitmap_us, 'page': page_us, **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergelijk facet aantallen uit bitmaps met GROUP BY queries.")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="Aantallen producten, komma-gescheiden")
+    parser.add_argument('--queries', type=int, default=200, help="Aantal filtercombinaties per grootte")
+    args = parser.parse_args()
+
+    print(f"{'producten':>10} {'sql µs':>10} {'bitmap µs':>10} {'/browse µs':>11} {'bouw ms':>9} {'bitmaps':>8} {'KB':>8}")
+    for size in (int(part) for part in args.sizes.split(',')):
+        r = run(size, args.queries)
+        print(f"{r['products']:>10} {r['sql']:>10.1f} {r['bitmap']:>10.1f} {r['page']:>11.1f} "
+              f"{r['build_ms']:>9.1f} {r['bitmaps']:>8} {r['bytes'] / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: password hashing inline vs. in een process pool.
+
+Dit script simuleert gemengd verkeer op de webshop: een aantal threads
+logt continu in (dure password check), andere threads bladeren door de
+catalogus. We meten de latency van de catalogus requests, een keer met
+hashen in de request thread (PASSWORD_HASH_WORKERS = 0) en een keer met
+een process pool.
+
+Run met:
+    python bench_password_pool.py [--seconds 5] [--logins 4] [--browsers 4]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from webshop_app import create_app, db
+from webshop_app.models import Category, Customer, Product, password_hasher
+
+
+def build_app(db_path: str, workers: int):
+    """Maak een app met eigen database en demo data."""
+    app = create_app('default', {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path,
+        'SESSION_DB_PATH': db_path + '.sessions',
+        'WTF_CSRF_ENABLED': False,
+        'PASSWORD_HASH_WORKERS': workers,
+        'RATELIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        if db.session.get(Category, 1) is None:
+            category = Category('Boeken', 'Demo categorie')
+            db.session.add(category)
+            db.session.flush()
+            for i in range(20):
+                db.session.add(Product(f'Boek {i}', 10.0 + i, i, category.id))
+            db.session.add(Customer('Bench', 'bench@webshop.nl', 'bench123'))
+            db.session.commit()
+    return app
+
+
+def run(app, seconds: float, logins: int, browsers: int) -> dict:
+    """Draai gemengd verkeer en verzamel latencies van de browse requests."""
+    stop = time.monotonic() + seconds
+    browse_latencies: list[float] = []
+    login_count = [0]
+    lock = threading.Lock()
+
+    def login_loop():
+        client = app.test_client()
+        while time.monotonic() < stop:
+            client.post('/auth/login', data={'email': 'bench@webshop.nl', 'password': 'bench123'})
+            client.get('/auth/logout')
+            with lock:
+                login_count[0] += 1
+
+    def browse_loop():
+        client = app.test_client()
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            client.get('/category/1')
+            elapsed = time.perf_counter() - start
+            with lock:
+                browse_latencies.append(elapsed)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(logins)]
+    threads += [threading.Thread(target=browse_loop) for _ in range(browsers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    browse_latencies.sort()
+    return {
+        'logins_per_sec': login_count[0] / seconds,
+        'browse_per_sec': len(browse_latencies) / seconds,
+        'browse_p50_ms': statistics.median(browse_latencies) * 1000,
+        'browse_p99_ms': browse_latencies[int(len(browse_latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--logins', type=int, default=4)
+    parser.add_argument('--browsers', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"{'modus':<12} {'logins/s':>9} {'browse/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, workers in (('inline', 0), (f'pool({args.workers})', args.workers)):
+            app = build_app(db_path, workers)
+            result = run(app, args.seconds, args.logins, args.browsers)
+            password_hasher.shutdown()
+            print(f"{label:<12} {result['logins_per_sec']:>9.1f} {result['browse_per_sec']:>9.1f} "
+                  f"{result['browse_p50_ms']:>8.1f} {result['browse_p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: de recommendations job, volledig en incrementeel.
+
+We vullen de database met bestellingen (populaire producten vaker, zoals
+in een echte winkel) en meten:
+- rebuild:     alle bestellingen tellen en alle top-N lijsten berekenen
+- update:      alleen de laatste 1% nieuwe bestellingen verwerken
+- lookup:      recommender.related() zoals de product pagina hem doet
+
+Tellen gaat met NumPy als dat geïnstalleerd is; met --no-numpy meet je
+de Counter versie.
+
+Run met:
+    python bench_recommendations.py [--orders 10000,100000] [--products 2000] [--no-numpy]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import insert
+
+from webshop_app import create_app, db, recommendations
+from webshop_app.models import Category, Customer, Order, OrderItem, Product
+from webshop_app.recommendations import recommender
+
+
+def seed_orders(count: int, products: int, customer_id: int, rng: random.Random) -> None:
+    """Voeg `count` bestellingen met 1 tot 6 (Zipf-verdeelde) producten toe."""
+    first = (db.session.execute(db.select(db.func.max(Order.id))).scalar() or 0) + 1
+    db.session.execute(insert(Order), [{'customer_id': customer_id} for _ in range(count)])
+    rows = []
+    for order_id in range(first, first + count):
+        basket = {min(int(rng.paretovariate(0.8)), products) for _ in range(rng.randint(1, 6))}
+        rows += [{'order_id': order_id, 'product_id': product_id, 'quantity': 1, 'price': 10.0}
+                 for product_id in basket]
+    db.session.execute(insert(OrderItem), rows)
+    db.session.commit()
+
+
+def run(orders: int, products: int) -> dict:
+    """Meet rebuild, update en lookup voor één aantal bestellingen."""
+    rng = random.Random(42)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        category = Category('Alles', 'Benchmark categorie')
+        customer = Customer('Bench', 'bench@webshop.nl', 'bench1234')
+        db.session.add_all([category, customer])
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {'name': f'Product {p}', 'price': 10.0, 'stock': 5, 'category_id': category.id} for p in range(products)
+        ])
+        seed_orders(orders, products, customer.id, rng)
+
+        rebuild = recommender.rebuild()
+        seed_orders(max(orders // 100, 1), products, customer.id, rng)
+        update = recommender.update()
+
+        samples = []
+        for product_id in rng.choices(range(1, products + 1), k=1000):
+            start = time.perf_counter()
+            recommender.related(product_id)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        return {'orders': orders, 'rebuild': rebuild, 'update': update, 'lookup_us': statistics.median(samples),
+                'pairs': recommender.stats()['pairs']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de recommendations job.")
+    parser.add_argument('--orders', default='10000,100000', help="Aantallen bestellingen, komma-gescheiden")
+    parser.add_argument('--products', type=int, default=2000, help="Aantal producten")
+    parser.add_argument('--no-numpy', action='store_true', help="Tel met een Counter, ook als NumPy er is")
+    args = parser.parse_args()
+    if args.no_numpy:
+        recommendations.USE_NUMPY = False
+    print(f"NumPy: {'ja' if recommendations.load_numpy() is not None else 'nee'}")
+
+    print(f"{'bestellingen':>12} {'paren':>9} {'rebuild s':>10} {'update s':>9} {'herberekend':>12} {'lookup µs':>10}")
+    for size in (int(part) for part in args.orders.split(',')):
+        r = run(size, args.products)
+        print(f"{r['orders']:>12} {r['pairs']:>9} {r['rebuild']['seconds']:>10.2f} {r['update']['seconds']:>9.2f} "
+              f"{r['update']['products']:>12} {r['lookup_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: autocomplete met de prefix trie vs. een LIKE query.
+
+We simuleren een bezoeker die letter voor letter productnamen typt
+("l", "la", "lap", ...) en meten per toetsaanslag:
+- like:    SELECT ... WHERE name LIKE '%prefix%' ORDER BY name LIMIT 10
+           (wat /api/search per toetsaanslag zou doen)
+- trie:    suggest_index.suggest(prefix)
+- api:     GET /api/suggest?q=prefix via de test client (incl. Flask en JSON)
+
+Daarnaast: de bouwtijd van de index en het geheugengebruik, zowel de
+schatting van SuggestIndex.stats() als gemeten met tracemalloc.
+
+Run met:
+    python bench_suggest.py [--sizes 1000,10000,50000] [--words 200]
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+from webshop_app import create_app, db
+from webshop_app.models import Category, Customer, Order, OrderItem, Product
+from webshop_app.suggest import suggest_index
+
+BRANDS = ('Acme', 'Nordic', 'Zenith', 'Volt', 'Bruin', 'Lumo', 'Kaap', 'Delta', 'Orion', 'Piet')
+NOUNS = ('Laptop', 'Kabel', 'Lamp', 'Stoel', 'Tas', 'Koptelefoon', 'Muis', 'Toetsenbord', 'Monitor',
+         'Bureau', 'Fles', 'Jas', 'Schoen', 'Boek', 'Pan', 'Mok', 'Rugzak', 'Horloge', 'Camera', 'Speaker')
+VARIANTS = ('Pro', 'Mini', 'Set', 'XL', 'Lite', 'Max', 'Crème', 'Duo', 'Plus', 'Eco')
+
+
+def seed(products: int, rng: random.Random) -> list[str]:
+    """Vul de database met producten en bestellingen (voor de populariteit)."""
+    category = Category('Alles', 'Benchmark categorie')
+    customer = Customer('Bench', 'bench@webshop.nl', 'bench1234')
+    db.session.add_all([category, customer])
+    db.session.flush()
+    names = [f'{rng.choice(BRANDS)} {rng.choice(NOUNS)} {rng.choice(VARIANTS)} {p}' for p in range(products)]
+    db.session.execute(insert(Product), [
+        {'name': name, 'price': 10.0, 'stock': 5, 'category_id': category.id} for name in names
+    ])
+    order = Order(customer.id)
+    db.session.add(order)
+    db.session.flush()
+    # Een paar populaire producten (Zipf-achtig), zodat de ranking ertoe doet
+    db.session.execute(insert(OrderItem), [
+        {'order_id': order.id, 'product_id': min(int(rng.paretovariate(1.2)), products),
+         'quantity': rng.randint(1, 3), 'price': 10.0}
+        for _ in range(products // 2)
+    ])
+    db.session.commit()
+    return names
+
+
+def keystrokes(names: list[str], words: int, rng: random.Random) -> list[str]:
+    """Alle prefixen die een bezoeker typt voor `words` willekeurige woorden."""
+    prefixes = []
+    for name in rng.sample(names, min(words, len(names))):
+        word = rng.choice(name.split()[:3])
+        prefixes += [word[:n] for n in range(1, len(word) + 1)]
+    return prefixes
+
+
+def timed(func, prefixes: list[str]) -> float:
+    """Mediaan in microseconden per toetsaanslag."""
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        func(prefix)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples)
+
+
+def run(products: int, words: int) -> dict:
+    """Meet alles voor één catalogus grootte."""
+    rng = random.Random(42)
+    app = create_app('testing')
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        names = seed(products, rng)
+        prefixes = keystrokes(names, words, rng)
+
+        suggest_index.build()
+        build_ms = suggest_index.build_seconds * 1000
+        # Nog een keer bouwen onder tracemalloc (dat maakt het bouwen zelf veel trager)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        suggest_index.build()
+        traced = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        stats = suggest_index.stats()
+
+        def like(prefix):
+            stmt = (db.select(Product.id, Product.name)
+                    .where(Product.name.ilike(f'%{prefix}%')).order_by(Product.name).limit(10))
+            db.session.execute(stmt).all()
+
+        like_us = timed(like, prefixes)
+        trie_us = timed(suggest_index.suggest, prefixes)
+    api_us = timed(lambda prefix: client.get('/api/suggest', query_string={'q': prefix}), prefixes)
+    return {'products': products, 'keystrokes': len(prefixes), 'like': like_us, 'trie': trie_us,
+            'api': api_us, 'traced_bytes': traced, **stats, 'build_ms': build_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergelijk autocomplete via de trie met een LIKE query.")
+    parser.add_argument('--sizes', default='1000,10000,50000', help="Aantallen producten, komma-gescheiden")
+    parser.add_argument('--words', type=int, default=200, help="Aantal getypte woorden per grootte")
+    args = parser.parse_args()
+
+    print(f"{'producten':>10} {'like µs':>9} {'trie µs':>9} {'api µs':>9} {'bouw ms':>9} "
+          f"{'knopen':>9} {'schatting':>10} {'gemeten':>10} {'B/product':>10}")
+    for size in (int(part) for part in args.sizes.split(',')):
+        r = run(size, args.words)
+        print(f"{r['products']:>10} {r['like']:>9.1f} {r['trie']:>9.1f} {r['api']:>9.1f} {r['build_ms']:>9.1f} "
+              f"{r['nodes']:>9} {r['bytes'] / 2**20:>7.1f} MB {r['traced_bytes'] / 2**20:>7.1f} MB "
+              f"{r['traced_bytes'] // r['products']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: cold start van een worker, met en zonder template cache.
+
+Elke meting draait in een nieuw Python proces, net als een nieuwe worker
+na een deploy. We meten de tijd van create_app() en van de eerste
+request op een paar pagina's, in drie situaties:
+- geen cache:     elk template wordt bij de eerste request gecompileerd
+- bytecode cache: de gecompileerde templates komen uit .jinja_cache
+- warm-up:        bytecode cache + alle templates laden in create_app()
+
+Run met:
+    python bench_templates.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PAGES = ('/', '/category/1', '/product/1', '/auth/login', '/contact')
+
+# Code die in een nieuw proces draait: meet create_app en de eerste requests
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from webshop_app import create_app, db
+from webshop_app.models import Category, Product
+overrides = json.loads(sys.argv[1])
+app = create_app('testing', overrides)
+startup = time.perf_counter() - start
+with app.app_context():
+    db.create_all()
+    category = Category('Boeken', 'Demo categorie')
+    db.session.add(category)
+    db.session.flush()
+    db.session.add(Product('Boek', 10.0, 5, category.id))
+    db.session.commit()
+client = app.test_client()
+first = {}
+for page in json.loads(sys.argv[2]):
+    t = time.perf_counter()
+    client.get(page)
+    first[page] = time.perf_counter() - t
+print(json.dumps({'startup': startup, 'first': first}))
+"""
+
+
+def measure(overrides: dict) -> dict:
+    """Start een nieuw proces en geef de gemeten tijden terug."""
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, json.dumps(overrides), json.dumps(PAGES)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de cold start met en zonder template cache.")
+    parser.add_argument('--runs', type=int, default=5, help="Aantal processen per situatie")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        scenarios = [
+            ('geen cache', {'TEMPLATE_CACHE_DIR': None}),
+            ('bytecode cache', {'TEMPLATE_CACHE_DIR': cache_dir}),
+            ('warm-up', {'TEMPLATE_CACHE_DIR': cache_dir, 'TEMPLATE_WARMUP': True}),
+        ]
+        # Eén keer vullen, zodat de cache bij de metingen al gevuld is
+        measure({'TEMPLATE_CACHE_DIR': cache_dir, 'TEMPLATE_WARMUP': True})
+
+        print(f"{'situatie':<16} {'create_app':>12} {'1e requests':>12} {'totaal':>10}")
+        for label, overrides in scenarios:
+            startups, firsts = [], []
+            for _ in range(args.runs):
+                result = measure(overrides)
+                startups.append(result['startup'] * 1000)
+                firsts.append(sum(result['first'].values()) * 1000)
+            startup = statistics.median(startups)
+            first = statistics.median(firsts)
+            print(f"{label:<16} {startup:>9.1f} ms {first:>9.1f} ms {startup + first:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
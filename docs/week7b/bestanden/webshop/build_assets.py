@@ -0,0 +1,182 @@
+"""
+Bouw static assets met fingerprint (Week 7b).
+
+Voor elke static folder (van de app en van de blueprints):
+- Elk bestand wordt gekopieerd naar static/dist/ met een content-hash in
+  de naam: css/webshop.css -> dist/css/webshop.3f2a9c1b.css
+- static/dist/manifest.json bevat de vertaling, die asset_url() gebruikt
+- De bestanden in dist/ worden ook vooraf gecomprimeerd (.gz/.br)
+- Oude versies blijven één build lang staan: draaiende workers en
+  gecachte pagina's verwijzen nog naar het vorige manifest
+
+Omdat de naam verandert zodra de inhoud verandert, mogen browsers deze
+bestanden een jaar cachen (zie webshop_app/assets.py).
+
+Met --vendor wordt Bootstrap eerst naar static/vendor/ gedownload, zodat
+de webshop niet meer van de CDN afhankelijk is.
+
+Run met:
+    python build_assets.py [--vendor] [--clean]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import urllib.request
+
+from webshop_app import create_app
+from webshop_app.assets import DIST_FOLDER, MANIFEST_NAME, VENDOR_ASSETS
+from precompress_static import precompress, static_folders
+
+# Bestanden die niet in het manifest horen
+SKIP_EXTENSIONS = ('.gz', '.br')
+
+
+def fingerprint(path: str, length: int = 8) -> str:
+    """Korte content-hash van een bestand."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def hashed_name(filename: str, digest: str) -> str:
+    """css/webshop.css -> css/webshop.<digest>.css"""
+    root, extension = os.path.splitext(filename)
+    return f'{root}.{digest}{extension}'
+
+
+def build(folder: str) -> dict[str, str]:
+    """Kopieer alle bestanden uit folder met fingerprint naar folder/dist.
+
+    De nieuwe bestanden komen naast de oude te staan; het manifest wordt
+    pas daarna (atomair) vervangen. Zie prune() voor het opruimen.
+
+    Returns:
+        Het manifest: {origineel pad: pad in dist met fingerprint}
+    """
+    dist = os.path.join(folder, DIST_FOLDER)
+    manifest_path = os.path.join(dist, MANIFEST_NAME)
+    previous, previous_mtime = read_manifest(manifest_path)
+
+    manifest = {}
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in sorted(files):
+            if name.endswith(SKIP_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, folder).replace(os.sep, '/')
+            target = hashed_name(filename, fingerprint(path))
+            target_path = os.path.join(dist, target)
+            if not os.path.exists(target_path):
+                # Zelfde naam = zelfde inhoud; copy() zodat mtime de buildtijd is
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copy(path, target_path)
+            manifest[filename] = target
+
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+    if previous_mtime is not None:
+        prune(dist, keep=set(previous.values()) | set(manifest.values()), before=previous_mtime)
+    return manifest
+
+
+def read_manifest(path: str) -> tuple[dict[str, str], float | None]:
+    """Lees een bestaand manifest.
+
+    Returns:
+        (manifest, mtime), of ({}, None) als er nog geen manifest is
+    """
+    try:
+        with open(path) as f:
+            return json.load(f), os.path.getmtime(path)
+    except (OSError, ValueError):
+        return {}, None
+
+
+def prune(dist: str, keep: set[str], before: float) -> int:
+    """Verwijder verouderde bestanden uit dist.
+
+    Alleen bestanden die in geen van beide manifesten staan én ouder zijn
+    dan het vorige manifest: die waren bij de vorige build al vervangen.
+    De .gz/.br varianten gaan mee met hun origineel.
+
+    Returns:
+        Aantal verwijderde bestanden
+    """
+    removed = 0
+    for root, dirs, files in os.walk(dist):
+        for name in files:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, dist).replace(os.sep, '/')
+            if filename == MANIFEST_NAME or filename.endswith('.tmp'):
+                continue
+            original = filename
+            for extension in SKIP_EXTENSIONS:
+                original = original.removesuffix(extension)
+            if original in keep:
+                continue
+            try:
+                if os.path.getmtime(path) < before:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def download_vendor(folder: str) -> int:
+    """Download de vendor bestanden (Bootstrap) naar folder/vendor.
+
+    Returns:
+        Aantal gedownloade bestanden
+    """
+    downloaded = 0
+    for filename, url in VENDOR_ASSETS.items():
+        path = os.path.join(folder, filename)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(path, 'wb') as f:
+            f.write(data)
+        downloaded += 1
+    return downloaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bouw static assets met fingerprint.")
+    parser.add_argument('--vendor', action='store_true', help="Download eerst Bootstrap naar static/vendor")
+    parser.add_argument('--clean', action='store_true', help="Verwijder alleen de dist folders")
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.vendor:
+        print(f"⬇️  {download_vendor(app.static_folder)} vendor bestanden gedownload")
+
+    folders = static_folders(app)
+    if not folders:
+        print("Geen static folders gevonden.")
+        return
+
+    for folder in folders:
+        if args.clean:
+            shutil.rmtree(os.path.join(folder, DIST_FOLDER), ignore_errors=True)
+            print(f"🧹 {folder}: dist verwijderd")
+            continue
+        manifest = build(folder)
+        written, saved = precompress(os.path.join(folder, DIST_FOLDER), min_size=500)
+        print(f"✅ {folder}: {len(manifest)} bestanden, {written} gecomprimeerde varianten "
+              f"({saved / 1024:.1f} KB bespaard)")
+    print("💡 Herstart de app om het nieuwe manifest te laden.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Controleer de startup tijd van de webshop (Week 7b).
+
+Meet in een nieuw proces hoe lang het importeren van webshop_app en
+create_app() duren, met de duur van elke stap. Met --budget-ms stopt
+het script met exit code 1 als de startup te lang duurt (voor CI).
+
+Run met:
+    python check_startup.py [--config testing] [--runs 5] [--budget-ms 1500]
+"""
+import argparse
+import statistics
+import sys
+
+from webshop_app.startup import measure_startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Meet de startup tijd van de webshop.")
+    parser.add_argument('--config', default='testing', help="Configuratie naam voor create_app()")
+    parser.add_argument('--runs', type=int, default=5, help="Aantal metingen (mediaan telt)")
+    parser.add_argument('--budget-ms', type=float, help="Maximale startup tijd in ms")
+    args = parser.parse_args()
+
+    results = [measure_startup(args.config) for _ in range(args.runs)]
+    median = {key: statistics.median(r[key] for r in results)
+              for key in ('import_ms', 'create_app_ms', 'total_ms')}
+
+    print(f"Startup '{args.config}' (mediaan van {args.runs} runs):")
+    print(f"  import webshop_app  {median['import_ms']:>8.1f} ms")
+    print(f"  create_app()        {median['create_app_ms']:>8.1f} ms")
+    for name in results[0]['steps']:
+        step = statistics.median(r['steps'][name] for r in results)
+        print(f"    {name:<18}{step:>8.1f} ms")
+    print(f"  totaal              {median['total_ms']:>8.1f} ms")
+
+    if args.budget_ms is not None:
+        if median['total_ms'] > args.budget_ms:
+            print(f"❌ Boven het budget van {args.budget_ms:.0f} ms")
+            sys.exit(1)
+        print(f"✅ Binnen het budget van {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
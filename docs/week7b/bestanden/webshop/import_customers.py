@@ -0,0 +1,222 @@
+"""
+Bulk import van klanten uit een andere webshop (Week 7b).
+
+Klanten één voor één aanmaken met Customer(...) hasht elk wachtwoord
+apart in de huidige thread. Voor 100.000 accounts is dat uren werk.
+Dit script:
+- Leest een CSV of NDJSON bestand (of stdin) regel voor regel
+- Hasht wachtwoorden parallel in meerdere worker processen
+- Neemt bestaande hashes (kolom password_hash) ongewijzigd over
+- Slaat e-mailadressen over die al bestaan of dubbel in de invoer staan
+- Voegt klanten toe in batches, elke batch in één transactie
+
+Invoer kolommen: name, email, password óf password_hash, is_admin (optioneel)
+
+Run met:
+    python import_customers.py klanten.csv
+    python import_customers.py klanten.ndjson --workers 8 --batch-size 2000
+    cat klanten.csv | python import_customers.py - --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+from app import app
+from webshop_app import db
+from webshop_app.models import Customer
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ja', 'y', 'j'}
+
+
+def read_rows(stream, fmt: str):
+    """Lees klant records uit een CSV of NDJSON stream.
+
+    Args:
+        stream: Open tekst bestand
+        fmt: 'csv' of 'ndjson'
+
+    Yields:
+        Dict per klant
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def normalize(row: dict) -> dict | None:
+    """Maak een invoer record schoon.
+
+    Args:
+        row: Ruw record uit CSV/NDJSON
+
+    Returns:
+        Dict met name, email, password, password_hash en is_admin,
+        of None als het record onbruikbaar is
+    """
+    email = (row.get('email') or '').strip().lower()
+    name = (row.get('name') or '').strip()
+    password = row.get('password') or ''
+    password_hash = (row.get('password_hash') or '').strip()
+    if not email or '@' not in email or not name:
+        return None
+    if not password_hash and not password:
+        return None
+    # Alleen Werkzeug hashes ('methode$salt$hash') overnemen
+    if password_hash and password_hash.count('$') != 2:
+        return None
+    is_admin = row.get('is_admin', False)
+    if isinstance(is_admin, str):
+        is_admin = is_admin.strip().lower() in TRUE_VALUES
+    return {
+        'name': name[:100],
+        'email': email,
+        'password': password,
+        'password_hash': password_hash,
+        'is_admin': bool(is_admin),
+    }
+
+
+def batches(iterable, size: int):
+    """Splits een iterable in lijsten van maximaal size elementen."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def existing_emails(emails: list[str]) -> set[str]:
+    """Zoek welke e-mailadressen al in de database staan (één query)."""
+    result = db.session.execute(db.select(Customer.email).where(Customer.email.in_(emails)))
+    return set(result.scalars())
+
+
+def insert_batch(rows: list[dict]) -> int:
+    """Voeg een batch klanten toe in één transactie.
+
+    Valt de batch om door een dubbel e-mailadres (bijvoorbeeld een
+    gelijktijdige registratie), dan worden de rijen los toegevoegd.
+
+    Returns:
+        Aantal toegevoegde klanten
+    """
+    try:
+        db.session.execute(insert(Customer), rows)
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted = 0
+    for row in rows:
+        try:
+            db.session.execute(insert(Customer), [row])
+            db.session.commit()
+            inserted += 1
+        except IntegrityError:
+            db.session.rollback()
+    return inserted
+
+
+def import_customers(stream, fmt: str, workers: int, batch_size: int, method: str) -> dict:
+    """Importeer klanten uit een stream.
+
+    Args:
+        stream: Open tekst bestand met CSV of NDJSON
+        fmt: 'csv' of 'ndjson'
+        workers: Aantal hash processen
+        batch_size: Aantal klanten per transactie
+        method: Werkzeug hash methode
+
+    Returns:
+        Dict met tellers: read, invalid, duplicate, hashed, inserted
+    """
+    stats = {'read': 0, 'invalid': 0, 'duplicate': 0, 'hashed': 0, 'inserted': 0}
+    seen: set[str] = set()
+    hash_password = partial(generate_password_hash, method=method)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for raw_batch in batches(read_rows(stream, fmt), batch_size):
+            stats['read'] += len(raw_batch)
+
+            records = []
+            for raw in raw_batch:
+                record = normalize(raw)
+                if record is None:
+                    stats['invalid'] += 1
+                elif record['email'] in seen:
+                    stats['duplicate'] += 1
+                else:
+                    seen.add(record['email'])
+                    records.append(record)
+
+            if records:
+                taken = existing_emails([r['email'] for r in records])
+                stats['duplicate'] += sum(1 for r in records if r['email'] in taken)
+                records = [r for r in records if r['email'] not in taken]
+
+            # Alleen wachtwoorden zonder bestaande hash gaan naar de pool
+            to_hash = [r for r in records if not r['password_hash']]
+            chunksize = max(1, len(to_hash) // (workers * 4))
+            for record, pwhash in zip(to_hash, pool.map(hash_password, [r['password'] for r in to_hash], chunksize=chunksize)):
+                record['password_hash'] = pwhash
+            stats['hashed'] += len(to_hash)
+
+            rows = [
+                {k: r[k] for k in ('name', 'email', 'password_hash', 'is_admin')}
+                for r in records
+            ]
+            if rows:
+                stats['inserted'] += insert_batch(rows)
+            print(f"   {stats['read']} gelezen, {stats['inserted']} toegevoegd", file=sys.stderr)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import van klanten (CSV of NDJSON).")
+    parser.add_argument('path', help="Invoerbestand, of '-' voor stdin")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Default: op basis van extensie")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    with app.app_context():
+        db.create_all()
+        method = app.config['PASSWORD_HASH_METHOD']
+        print(f"=== Klanten importeren ({fmt}, {args.workers} workers, methode {method}) ===", file=sys.stderr)
+
+        start = time.perf_counter()
+        if args.path == '-':
+            stats = import_customers(sys.stdin, fmt, args.workers, args.batch_size, method)
+        else:
+            with open(args.path, newline='', encoding='utf-8') as stream:
+                stats = import_customers(stream, fmt, args.workers, args.batch_size, method)
+        elapsed = time.perf_counter() - start
+
+    print("=" * 50)
+    print(f"✅ Import klaar in {elapsed:.1f}s")
+    print(f"   Gelezen:    {stats['read']}")
+    print(f"   Toegevoegd: {stats['inserted']}")
+    print(f"   Gehasht:    {stats['hashed']}")
+    print(f"   Dubbel:     {stats['duplicate']}")
+    print(f"   Ongeldig:   {stats['invalid']}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Load test voor de webshop (Week 7b).
+
+Stuurt een mix van realistische acties met een instelbaar aantal
+gelijktijdige gebruikers naar de webshop en meet doorvoer (requests/s),
+latency percentielen (p50/p90/p99) en het aantal fouten per actie.
+
+Acties in de mix:
+- browse:  homepage en een categorie pagina
+- product: een product detail pagina
+- search:  zoeken via /api/search
+- login:   inlogformulier ophalen, inloggen en weer uitloggen
+- admin:   als admin een product bewerken
+
+Zonder --url draait alles in dit proces via de WSGI test client, met een
+tijdelijke database met demo data. Met --url gaat het via HTTP naar een
+draaiende server (bijvoorbeeld `python app.py` of gunicorn); die moet
+een admin account en een gewone gebruiker hebben (zie --admin/--user).
+
+Run met:
+    python load_test.py [--mix browse=50,product=30,search=10,login=5,admin=5]
+                        [--concurrency 8] [--seconds 10] [--output run.json]
+                        [--compare vorige_run.json] [--url http://localhost:5000]
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+DEFAULT_MIX = 'browse=50,product=30,search=10,login=5,admin=5'
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+SEARCH_TERMS = ('boek', 'laptop', 'kabel', 'pro', 'mini', 'set')
+
+
+class WsgiClient:
+    """Client via de Flask test client (geen netwerk)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, str]:
+        """Doe een request en geef (status, body)."""
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class HttpClient:
+    """Client via HTTP naar een draaiende server, met eigen cookies."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, str]:
+        """Doe een request en geef (status, body). Redirects worden gevolgd."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as error:
+            return error.code, ''
+        except OSError:
+            return 599, ''
+
+
+class Scenario:
+    """De acties van één virtuele gebruiker."""
+
+    def __init__(self, client, catalog: dict, user: tuple[str, str], admin: tuple[str, str]):
+        self.client = client
+        self.catalog = catalog
+        self.user = user
+        self.admin = admin
+        self.admin_logged_in = False
+
+    def browse(self) -> list[int]:
+        """Homepage en een willekeurige categorie."""
+        statuses = [self.client.request('GET', '/')[0]]
+        category_id = random.choice(self.catalog['categories'])
+        statuses.append(self.client.request('GET', f'/category/{category_id}')[0])
+        return statuses
+
+    def product(self) -> list[int]:
+        """Een willekeurige product pagina."""
+        product_id = random.choice(self.catalog['products'])
+        return [self.client.request('GET', f'/product/{product_id}')[0]]
+
+    def search(self) -> list[int]:
+        """Zoeken op een willekeurige term."""
+        term = random.choice(self.catalog['terms'])
+        return [self.client.request('GET', '/api/search?' + urllib.parse.urlencode({'q': term}))[0]]
+
+    def login(self) -> list[int]:
+        """Inloggen en uitloggen als gewone gebruiker."""
+        if self.admin_logged_in:
+            self.client.request('GET', '/auth/logout')
+            self.admin_logged_in = False
+        status, body = self.client.request('GET', '/auth/login')
+        statuses = [status]
+        statuses.append(self._post_form('/auth/login', body, {'email': self.user[0], 'password': self.user[1]}))
+        statuses.append(self.client.request('GET', '/auth/logout')[0])
+        return statuses
+
+    def admin_edit(self) -> list[int]:
+        """Een product bewerken als admin (inloggen alleen de eerste keer)."""
+        statuses = []
+        if not self.admin_logged_in:
+            status, body = self.client.request('GET', '/auth/login')
+            statuses += [status, self._post_form(
+                '/auth/login', body, {'email': self.admin[0], 'password': self.admin[1]})]
+            self.admin_logged_in = statuses[-1] < 400
+        product_id = random.choice(self.catalog['products'])
+        path = f'/admin/product/edit/{product_id}'
+        status, body = self.client.request('GET', path)
+        statuses.append(status)
+        statuses.append(self._post_form(path, body, {
+            'name': f'Product {product_id}',
+            'price': f'{random.uniform(5, 100):.2f}',
+            'stock': str(random.randint(0, 50)),
+            'description': 'Bijgewerkt door de load test',
+            'category_id': str(self.catalog['product_categories'].get(product_id, self.catalog['categories'][0])),
+        }))
+        return statuses
+
+    def _post_form(self, path: str, form_html: str, data: dict) -> int:
+        """POST een formulier, met het CSRF token uit de HTML als dat er is."""
+        match = CSRF_PATTERN.search(form_html)
+        if match:
+            data = {**data, 'csrf_token': match.group(1)}
+        return self.client.request('POST', path, data)[0]
+
+
+ACTIONS = {
+    'browse': Scenario.browse,
+    'product': Scenario.product,
+    'search': Scenario.search,
+    'login': Scenario.login,
+    'admin': Scenario.admin_edit,
+}
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    """'browse=50,product=30' -> {'browse': 50, 'product': 30}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise SystemExit(f"Onbekende actie '{name}', kies uit {', '.join(ACTIONS)}")
+        mix[name] = int(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def build_local_app(db_path: str, categories: int, products: int):
+    """Maak een app met een tijdelijke database vol demo data."""
+    from webshop_app import create_app, db
+    from webshop_app.models import Category, Customer, Product
+
+    app = create_app('default', {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path,
+        'SESSION_DB_PATH': db_path + '.sessions',
+        'CATALOG_VERSION_PATH': db_path + '.version',
+        'TEMPLATE_CACHE_DIR': None,
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        words = ('Boek', 'Laptop', 'Kabel', 'Lamp', 'Stoel', 'Tas')
+        for c in range(categories):
+            category = Category(f'Categorie {c}', f'Demo categorie {c}')
+            db.session.add(category)
+            db.session.flush()
+            for p in range(products // categories):
+                name = f'{random.choice(words)} {random.choice(("Pro", "Mini", "Set", "XL"))} {c}-{p}'
+                db.session.add(Product(name, round(random.uniform(5, 500), 2), random.randint(0, 50),
+                                       category.id, 'Demo product voor de load test'))
+        db.session.add(Customer('Admin', 'admin@webshop.nl', 'admin123', is_admin=True))
+        db.session.add(Customer('Load Test', 'loadtest@webshop.nl', 'loadtest123'))
+        db.session.commit()
+    return app
+
+
+def discover_catalog(client) -> dict:
+    """Haal category en product IDs op via de JSON API."""
+    status, body = client.request('GET', '/api/categories')
+    if status != 200:
+        raise SystemExit(f"Kan /api/categories niet ophalen (status {status})")
+    categories = [item['id'] for item in json.loads(body)['items']]
+    status, body = client.request('GET', '/api/products?fields=id,category_id&per_page=100')
+    items = json.loads(body)['items'] if status == 200 else []
+    if not categories or not items:
+        raise SystemExit("De catalogus is leeg: voeg eerst categorieën en producten toe.")
+    return {
+        'categories': categories,
+        'products': [item['id'] for item in items],
+        'product_categories': {item['id']: item['category_id'] for item in items},
+        'terms': list(SEARCH_TERMS),
+    }
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Percentiel (nearest rank) van een gesorteerde lijst."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, requests: int, seconds: float) -> dict:
+    """Statistieken van één actie (of van alles samen)."""
+    latencies = sorted(latencies)
+    actions = len(latencies)
+    return {
+        'actions': actions,
+        'requests': requests,
+        'errors': errors,
+        'error_rate': errors / requests if requests else 0.0,
+        'requests_per_sec': requests / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def run(make_client, catalog: dict, mix: dict[str, int], concurrency: int, seconds: float,
+        warmup: float, user: tuple[str, str], admin: tuple[str, str]) -> dict:
+    """Draai de load test en geef de resultaten per actie en totaal."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = {name: {'latencies': [], 'errors': 0, 'requests': 0} for name in names}
+    lock = threading.Lock()
+    start_measuring = time.monotonic() + warmup
+    stop = start_measuring + seconds
+
+    def worker():
+        scenario = Scenario(make_client(), catalog, user, admin)
+        while True:
+            now = time.monotonic()
+            if now >= stop:
+                break
+            name = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            statuses = ACTIONS[name](scenario)
+            elapsed = time.perf_counter() - start
+            if now < start_measuring:
+                continue
+            with lock:
+                result = results[name]
+                result['latencies'].append(elapsed)
+                result['requests'] += len(statuses)
+                result['errors'] += sum(1 for status in statuses if status >= 400)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {name: summarize(r['latencies'], r['errors'], r['requests'], seconds) for name, r in results.items()}
+    report['total'] = summarize(
+        [latency for r in results.values() for latency in r['latencies']],
+        sum(r['errors'] for r in results.values()),
+        sum(r['requests'] for r in results.values()),
+        seconds,
+    )
+    return report
+
+
+def print_report(report: dict, previous: dict | None = None) -> None:
+    """Print de resultaten als tabel (met verschil t.o.v. een vorige run)."""
+    print(f"{'actie':<9} {'acties':>7} {'req/s':>8} {'fouten':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for name, stats in report.items():
+        print(f"{name:<9} {stats['actions']:>7} {stats['requests_per_sec']:>8.1f} "
+              f"{stats['error_rate']:>6.1%} {stats['p50_ms']:>8.1f} {stats['p90_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+        old = (previous or {}).get(name)
+        if old:
+            print(f"{'  vorige':<9} {'':>7} {_delta(stats, old, 'requests_per_sec'):>8} "
+                  f"{'':>7} {_delta(stats, old, 'p50_ms'):>8} {_delta(stats, old, 'p90_ms'):>8} "
+                  f"{_delta(stats, old, 'p99_ms'):>8}")
+
+
+def _delta(stats: dict, old: dict, key: str) -> str:
+    """Procentuele verandering t.o.v. de vorige run."""
+    if not old.get(key):
+        return '-'
+    return f'{(stats[key] - old[key]) / old[key]:+.0%}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test voor de webshop.")
+    parser.add_argument('--url', help="Basis URL van een draaiende server (default: WSGI in dit proces)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Gewichten per actie (default {DEFAULT_MIX})")
+    parser.add_argument('--concurrency', type=int, default=8, help="Aantal gelijktijdige gebruikers")
+    parser.add_argument('--seconds', type=float, default=10.0, help="Duur van de meting")
+    parser.add_argument('--warmup', type=float, default=1.0, help="Seconden opwarmen (niet gemeten)")
+    parser.add_argument('--categories', type=int, default=10, help="Aantal categorieën (alleen WSGI)")
+    parser.add_argument('--products', type=int, default=500, help="Aantal producten (alleen WSGI)")
+    parser.add_argument('--user', default='loadtest@webshop.nl:loadtest123', help="email:wachtwoord")
+    parser.add_argument('--admin', default='admin@webshop.nl:admin123', help="email:wachtwoord van een admin")
+    parser.add_argument('--output', help="Bewaar de resultaten als JSON")
+    parser.add_argument('--compare', help="JSON van een vorige run om mee te vergelijken")
+    parser.add_argument('--seed', type=int, help="Random seed (voor reproduceerbare mixen)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    mix = parse_mix(args.mix)
+    user = tuple(args.user.split(':', 1))
+    admin = tuple(args.admin.split(':', 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            target = args.url
+            make_client = lambda: HttpClient(args.url)  # noqa: E731
+        else:
+            target = 'wsgi'
+            app = build_local_app(os.path.join(tmp, 'loadtest.db'), args.categories, args.products)
+            make_client = lambda: WsgiClient(app)  # noqa: E731
+        catalog = discover_catalog(make_client())
+
+        print(f"🚀 {target}: {args.concurrency} gebruikers, {args.seconds:.0f}s, mix {mix}")
+        report = run(make_client, catalog, mix, args.concurrency, args.seconds, args.warmup, user, admin)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+    print_report(report, previous)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now(timezone.utc).isoformat(),
+                    'target': target,
+                    'mix': mix,
+                    'concurrency': args.concurrency,
+                    'seconds': args.seconds,
+                    'products': args.products if not args.url else None,
+                },
+                'results': report,
+            }, f, indent=2)
+        print(f"💾 Resultaten bewaard in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
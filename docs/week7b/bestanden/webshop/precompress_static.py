@@ -0,0 +1,98 @@
+"""
+Comprimeer static files vooraf met gzip en brotli (Week 7b).
+
+Dit is een build stap: draai het script na elke wijziging in een static
+folder (of in je deploy script). Voor elk geschikt bestand ontstaat een
+.gz variant (en een .br variant als de `brotli` package geïnstalleerd
+is). De app serveert die varianten direct, zonder per request opnieuw
+te comprimeren (zie webshop_app/compression.py).
+
+Run met:
+    python precompress_static.py [--min-size 500] [--clean]
+"""
+import argparse
+import os
+
+from webshop_app import create_app
+from webshop_app.compression import COMPRESSIBLE_EXTENSIONS, brotli, compress
+
+
+def static_folders(app) -> list[str]:
+    """Alle static folders van de app en de blueprints die bestaan."""
+    folders = [app.static_folder]
+    folders += [bp.static_folder for bp in app.blueprints.values()]
+    return [folder for folder in dict.fromkeys(folders) if folder and os.path.isdir(folder)]
+
+
+def precompress(folder: str, min_size: int) -> tuple[int, int]:
+    """Maak .gz/.br varianten van alle geschikte bestanden in folder.
+
+    Bestanden waarvan de variant nieuwer is dan het origineel worden
+    overgeslagen.
+
+    Returns:
+        Tuple (aantal nieuwe varianten, bespaarde bytes)
+    """
+    encodings = [('gzip', '.gz')] + ([('br', '.br')] if brotli is not None else [])
+    written = saved = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            if size < min_size:
+                continue
+            data = None
+            for encoding, extension in encodings:
+                target = path + extension
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                compressed = compress(data, encoding, level=11 if encoding == 'br' else 9)
+                if len(compressed) >= size:
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+                saved += size - len(compressed)
+    return written, saved
+
+
+def clean(folder: str) -> int:
+    """Verwijder alle .gz/.br varianten uit folder."""
+    removed = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')) and name[:-3].endswith(COMPRESSIBLE_EXTENSIONS):
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprimeer static files vooraf.")
+    parser.add_argument('--min-size', type=int, default=500, help="Kleinere bestanden overslaan")
+    parser.add_argument('--clean', action='store_true', help="Verwijder alle varianten")
+    args = parser.parse_args()
+
+    app = create_app()
+    folders = static_folders(app)
+    if not folders:
+        print("Geen static folders gevonden.")
+        return
+
+    for folder in folders:
+        if args.clean:
+            print(f"🧹 {folder}: {clean(folder)} varianten verwijderd")
+        else:
+            written, saved = precompress(folder, args.min_size)
+            print(f"✅ {folder}: {written} varianten, {saved / 1024:.1f} KB bespaard")
+    if brotli is None:
+        print("💡 Installeer 'brotli' voor ook .br varianten.")
+
+
+if __name__ == "__main__":
+    main()
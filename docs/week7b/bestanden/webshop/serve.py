@@ -0,0 +1,50 @@
+"""
+Productie server voor de webshop met meerdere worker processen (Week 7b).
+
+`python app.py` start de Flask development server: één proces, met de
+debugger aan. Dit script start een pre-fork server (zie
+webshop_app/prefork.py): de app wordt één keer gemaakt en daarna forkt
+de master N workers.
+
+Run met:
+    python serve.py [--workers 4] [--port 8000] [--max-requests 1000]
+
+Reload (na een config wijziging of build_assets.py):
+    kill -HUP <pid van de master>
+"""
+import argparse
+import os
+
+from webshop_app import create_app, db
+from webshop_app.prefork import PreforkServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start de webshop met meerdere workers.")
+    parser.add_argument('--host', default='127.0.0.1', help="Adres om op te luisteren")
+    parser.add_argument('--port', type=int, default=8000, help="Poort om op te luisteren")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Aantal worker processen")
+    parser.add_argument('--max-requests', type=int, default=1000, help="Worker vervangen na zoveel requests (0 = nooit)")
+    parser.add_argument('--max-requests-jitter', type=int, default=100, help="Willekeurig extra aantal requests")
+    parser.add_argument('--config', default='production', help="Configuratie naam voor create_app()")
+    args = parser.parse_args()
+
+    def app_factory():
+        # Elke worker krijgt een eigen password hash pool: verdeel de CPU's
+        app = create_app(args.config, {'SERVER_WORKERS': args.workers})
+        with app.app_context():
+            db.create_all()
+        return app
+
+    PreforkServer(
+        app_factory, db,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+    ).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,38 +10,129 @@ Voordelen:
 - Blueprints kunnen geregistreerd worden in factory
 - Betere code organisatie en schaalbaarheid
 """
+# Als eerste importeren: meet hoe lang de imports hieronder duren
+from webshop_app.startup import IMPORT_STARTED, StartupTimings
+
 import os
+import time
 from flask import Flask, render_template
 
 # Import extensions from models (voorkomt duplicate instances!)
-from webshop_app.models import db, login_manager
-
-
-def create_app(config_name='default'):
+from webshop_app.models import db, login_manager, principal_cache, password_hasher
+from webshop_app.passwords import HasherBusy
+from webshop_app.ratelimit import limiter
+from webshop_app.sessions import server_sessions
+from webshop_app.catalog import catalog_version
+from webshop_app.page_cache import page_cache
+from webshop_app.suggest import suggest_index
+from webshop_app.facets import facet_index
+from webshop_app.recommendations import recommender
+from webshop_app.images import image_store
+from webshop_app.feeds import feeds
+from webshop_app.carts import carts
+from webshop_app.compression import compression
+from webshop_app.assets import assets
+from webshop_app.template_cache import template_cache
+from webshop_app.metrics import metrics
+from webshop_app.query_budget import query_monitor
+from webshop_app.prefork import enable_sqlite_wal
+from webshop_app.mail import mail_sink
+from webshop_app.jobs import jobs
+from webshop_app import tasks  # noqa: F401 (registreert de job handlers)
+
+# Duur van het importeren van de package (Flask, SQLAlchemy, extensies)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+# Extra instellingen per configuratie naam (bovenop de defaults)
+CONFIGS = {
+    'default': {},
+    'production': {
+        'TEMPLATE_WARMUP': True,
+        'SUGGEST_WARMUP': True,
+    },
+    'testing': {
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'PASSWORD_HASH_WORKERS': 0,
+        'RATELIMIT_ENABLED': False,
+        'SESSION_BACKEND': 'cookie',
+        'CATALOG_VERSION_PATH': None,
+        'USER_CACHE_VERSION_PATH': None,
+        'PAGE_CACHE_ENABLED': False,
+        'TEMPLATE_CACHE_DIR': None,
+        'JOBS_EAGER': True,
+        'MAIL_SINK_DIR': None,
+        'FEEDS_DIR': None,
+    },
+}
+
+
+def create_app(config_name='default', overrides=None):
     """Application Factory voor de webshop.
 
     Deze functie maakt en configureert een Flask applicatie instance.
 
     Args:
         config_name: Configuratie naam ('default', 'testing', 'production')
+        overrides: Optionele dict met config waarden die voorrang krijgen
+            (bijvoorbeeld een eigen database voor benchmarks)
 
     Returns:
         Geconfigureerde Flask app instance
+
+    De duur van elke stap staat in app.extensions['startup'].
     """
+    timings = StartupTimings()
+
     # Bepaal basedir voor database pad
     basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 
     # Maak Flask app aan
-    app = Flask(__name__)
+    with timings.step('flask app'):
+        app = Flask(__name__)
+    app.extensions['startup'] = timings
 
     # Flask configuratie
     app.config['SECRET_KEY'] = 'webshop-secret-key-2025'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'webshop.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Geen cookies bij een POST vanaf een andere site (o.a. /cart/add heeft geen CSRF token)
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    app.config['REMEMBER_COOKIE_SAMESITE'] = 'Lax'
+    # Grotere requests (uploads) krijgen direct een 413, voordat een view de body leest
+    app.config['MAX_CONTENT_LENGTH'] = 8 * 1024 * 1024
+    app.config.update(CONFIGS[config_name])
+    app.config.update(overrides or {})
 
     # Initialize extensions met app
-    db.init_app(app)
-    login_manager.init_app(app)
+    extensions = {
+        'db': db,
+        # Als eerste hooks: meet ook requests die een andere before_request afhandelt
+        'metrics': metrics,
+        'query_monitor': query_monitor,
+        'login_manager': login_manager,
+        'principal_cache': principal_cache,
+        'password_hasher': password_hasher,
+        'limiter': limiter,
+        'server_sessions': server_sessions,
+        'catalog_version': catalog_version,
+        'page_cache': page_cache,
+        'suggest_index': suggest_index,
+        'facet_index': facet_index,
+        'recommender': recommender,
+        'image_store': image_store,
+        'feeds': feeds,
+        'carts': carts,
+        'compression': compression,
+        'mail_sink': mail_sink,
+        'jobs': jobs,
+    }
+    for name, extension in extensions.items():
+        with timings.step(name):
+            extension.init_app(app)
+    with timings.step('sqlite_wal'):
+        enable_sqlite_wal(app, db)
 
     # Login manager configuratie
     login_manager.login_view = "auth.login"  # LET OP: blueprint.view syntax!
@@ -51,13 +142,28 @@ def create_app(config_name='default'):
     # Geen duplicate user_loader hier
 
     # Registreer Blueprints
-    from webshop_app.products.views import products_bp
-    from webshop_app.auth.views import auth_bp
-    from webshop_app.admin.views import admin_bp
-
-    app.register_blueprint(products_bp)
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(admin_bp, url_prefix='/admin')
+    # (import pas hier: de forms van de views worden bij het eerste gebruik geladen)
+    with timings.step('blueprint products'):
+        from webshop_app.products.views import products_bp
+        app.register_blueprint(products_bp)
+    with timings.step('blueprint auth'):
+        from webshop_app.auth.views import auth_bp
+        app.register_blueprint(auth_bp, url_prefix='/auth')
+    with timings.step('blueprint admin'):
+        from webshop_app.admin.views import admin_bp
+        app.register_blueprint(admin_bp, url_prefix='/admin')
+    with timings.step('blueprint api'):
+        from webshop_app.api.views import api_bp
+        app.register_blueprint(api_bp, url_prefix='/api')
+    with timings.step('blueprint cart'):
+        from webshop_app.cart.views import cart_bp
+        app.register_blueprint(cart_bp, url_prefix='/cart')
+
+    # Na de blueprints: assets en template_cache gebruiken ook hun folders
+    with timings.step('assets'):
+        assets.init_app(app)
+    with timings.step('template_cache'):
+        template_cache.init_app(app)
 
     # Error handlers
     @app.errorhandler(404)
@@ -65,10 +171,16 @@ def create_app(config_name='default'):
         """Custom 404 error handler."""
         return render_template("404.html"), 404
 
+    @app.errorhandler(HasherBusy)
+    def hasher_busy(error):
+        """Te veel gelijktijdige logins/registraties: vraag om later terug te komen."""
+        return "Server is bezet, probeer het over een paar seconden opnieuw.", 503, {'Retry-After': '2'}
+
     # Custom context processor (optioneel)
     @app.context_processor
     def inject_app_name():
         """Maak app_name beschikbaar in alle templates."""
         return dict(app_name="Webshop")
 
+    app.logger.debug("create_app(%r) in %.1f ms", config_name, timings.total * 1000)
     return app
@@ -4,6 +4,7 @@ Admin Blueprint Forms (Week 7b).
 Bevat formulieren voor product management in admin panel.
 """
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired
 from wtforms import (
     StringField,
     TextAreaField,
@@ -109,3 +110,32 @@ class EditProductForm(FlaskForm):
     )
 
     submit = SubmitField('Wijzigingen Opslaan')
+
+
+class ImageForm(FlaskForm):
+    """Formulier om een productafbeelding te uploaden.
+
+    Het type controleert ImageStore.save() aan de inhoud van het bestand.
+    """
+
+    image = FileField(
+        'Afbeelding (JPEG, PNG, GIF of WebP)',
+        validators=[FileRequired(message="Kies een afbeelding")]
+    )
+
+    submit = SubmitField('Afbeelding uploaden')
+
+
+class ReportForm(FlaskForm):
+    """Formulier (alleen een knop) om een catalogus rapport aan te vragen.
+
+    Een FlaskForm zodat ook deze POST een CSRF token heeft.
+    """
+
+    submit = SubmitField('Catalogus rapport mailen')
+
+
+class RecommendationsForm(FlaskForm):
+    """Formulier (alleen een knop) om de aanbevelingen bij te werken."""
+
+    submit = SubmitField('Aanbevelingen bijwerken')
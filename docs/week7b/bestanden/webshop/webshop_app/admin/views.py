@@ -5,16 +5,23 @@ Deze blueprint bevat alle admin routes voor product beheer:
 - Product overzicht
 - Product toevoegen
 - Product bewerken
+- Productafbeelding uploaden (varianten worden in een achtergrond job gemaakt)
 - Product verwijderen
+- Catalogus rapport aanvragen (wordt als achtergrond job gemaakt)
+- Aanbevelingen bijwerken (achtergrond job)
 
 Alle routes zijn beschermd met @admin_required decorator.
+Wijzigingen (POST) zijn per admin account beperkt met @rate_limit.
 Deze blueprint wordt geregistreerd met url_prefix='/admin'.
 """
 from flask import Blueprint, render_template, redirect, url_for, flash
 from flask_login import current_user
 from functools import wraps
-from webshop_app.models import db, Category, Product
-from webshop_app.admin.forms import AddProductForm, EditProductForm
+from sqlalchemy.exc import IntegrityError
+from webshop_app.models import db, CartItem, Category, OrderItem, Product
+from webshop_app.images import image_store, InvalidImage
+from webshop_app.jobs import jobs
+from webshop_app.ratelimit import rate_limit
 
 # Maak blueprint aan
 admin_bp = Blueprint(
@@ -60,12 +67,24 @@ def products():
     Returns:
         Rendered HTML template met product lijst
     """
-    all_products = db.session.execute(db.select(Product).join(Category)).scalars().all()
-    return render_template("admin/products.html", products=all_products)
+    # contains_eager: product.category komt uit de join, niet uit een query per product
+    stmt = db.select(Product).join(Category).options(db.contains_eager(Product.category))
+    all_products = db.session.execute(stmt).scalars().all()
+
+    # Forms pas bij het eerste gebruik importeren (Flask-WTF/WTForms vertragen de startup)
+    from webshop_app.admin.forms import ReportForm, RecommendationsForm
+    return render_template(
+        "admin/products.html",
+        products=all_products,
+        report_form=ReportForm(),
+        recommendations_form=RecommendationsForm(),
+        job_stats=jobs.stats()
+    )
 
 
 @admin_bp.route("/product/add", methods=['GET', 'POST'])
 @admin_required
+@rate_limit(per_account=(30, 60))
 def add_product():
     """Admin formulier om een nieuw product toe te voegen.
 
@@ -80,6 +99,7 @@ def add_product():
         GET: Toon formulier
         POST: Verwerk formulier en voeg product toe
     """
+    from webshop_app.admin.forms import AddProductForm
     form = AddProductForm()
 
     # Populate category choices
@@ -107,6 +127,7 @@ def add_product():
 
 @admin_bp.route("/product/edit/<int:product_id>", methods=['GET', 'POST'])
 @admin_required
+@rate_limit(per_account=(30, 60))
 def edit_product(product_id: int):
     """Admin formulier om een bestaand product te bewerken.
 
@@ -130,6 +151,7 @@ def edit_product(product_id: int):
     # Get product or 404
     product_info = db.get_or_404(Product, product_id)
 
+    from webshop_app.admin.forms import EditProductForm, ImageForm
     form = EditProductForm()
 
     # Populate category choices
@@ -160,18 +182,63 @@ def edit_product(product_id: int):
     return render_template(
         "admin/edit_product.html",
         form=form,
+        image_form=ImageForm(formdata=None),
         product=product_info
     )
 
 
+@admin_bp.route("/product/<int:product_id>/image", methods=['POST'])
+@admin_required
+@rate_limit(per_account=(30, 60))
+def upload_image(product_id: int):
+    """Admin route om een productafbeelding te uploaden.
+
+    Route: /admin/product/<id>/image
+
+    Het origineel wordt direct opgeslagen; de verkleinde varianten maakt
+    een achtergrond job.
+
+    Args:
+        product_id: ID van het product
+
+    Returns:
+        Redirect naar de bewerk pagina van het product
+
+    Raises:
+        404: Als product niet bestaat
+    """
+    product_info = db.get_or_404(Product, product_id)
+
+    from webshop_app.admin.forms import ImageForm
+    form = ImageForm()
+
+    if form.validate_on_submit():
+        try:
+            name = image_store.save(form.image.data)
+        except InvalidImage as error:
+            flash(str(error), 'danger')
+        else:
+            product_info.image = name
+            db.session.commit()
+            jobs.enqueue('make_image_variants', name=name)
+            flash(f'Afbeelding van "{product_info.name}" opgeslagen.', 'success')
+    else:
+        for error in form.image.errors:
+            flash(error, 'danger')
+    return redirect(url_for('admin.edit_product', product_id=product_id))
+
+
 @admin_bp.route("/product/delete/<int:product_id>", methods=['POST'])
 @admin_required
+@rate_limit(per_account=(30, 60))
 def delete_product(product_id: int):
     """Admin route om een product te verwijderen.
 
     Route: /admin/product/delete/<id>
 
-    Alleen toegankelijk voor admins.
+    Alleen toegankelijk voor admins. Een product dat al besteld is kan
+    niet weg: de order_items verwijzen ernaar (zet de voorraad dan op 0).
+    Regels in winkelwagens gaan mee weg.
 
     Args:
         product_id: ID van het product om te verwijderen
@@ -190,9 +257,69 @@ def delete_product(product_id: int):
 
     product_name = product_info.name
 
+    ordered = db.session.execute(
+        db.select(OrderItem.id).where(OrderItem.product_id == product_id).limit(1)
+    ).first()
+    if ordered is not None:
+        flash(f'Product "{product_name}" is al besteld en kan niet verwijderd worden. '
+              f'Zet de voorraad op 0 om het uit de verkoop te halen.', 'danger')
+        return redirect(url_for('admin.products'))
+
     # Delete product
-    db.session.delete(product_info)
-    db.session.commit()
+    try:
+        db.session.execute(db.delete(CartItem).where(CartItem.product_id == product_id))
+        db.session.delete(product_info)
+        db.session.commit()
+    except IntegrityError:
+        # Net tussendoor besteld
+        db.session.rollback()
+        flash(f'Product "{product_name}" is al besteld en kan niet verwijderd worden.', 'danger')
+        return redirect(url_for('admin.products'))
 
     flash(f'Product "{product_name}" succesvol verwijderd.', 'success')
     return redirect(url_for('admin.products'))
+
+
+@admin_bp.route("/report", methods=['POST'])
+@admin_required
+@rate_limit(per_account=(5, 60))
+def request_report():
+    """Admin route om een catalogus rapport aan te vragen.
+
+    Route: /admin/report
+
+    Het rapport wordt in een achtergrond job gemaakt en naar het email
+    adres van de admin gestuurd; de admin hoeft er niet op te wachten.
+
+    Returns:
+        Redirect naar admin products overzicht
+    """
+    from webshop_app.admin.forms import ReportForm
+    form = ReportForm()
+
+    if form.validate_on_submit():
+        jobs.enqueue('catalog_report', recipient=current_user.email)
+        flash(f'Het rapport wordt gemaakt en naar {current_user.email} gemaild.', 'info')
+    return redirect(url_for('admin.products'))
+
+
+@admin_bp.route("/recommendations", methods=['POST'])
+@admin_required
+@rate_limit(per_account=(5, 60))
+def update_recommendations():
+    """Admin route om de aanbevelingen bij te werken.
+
+    Route: /admin/recommendations
+
+    De job verwerkt alleen de bestellingen sinds de vorige run.
+
+    Returns:
+        Redirect naar admin products overzicht
+    """
+    from webshop_app.admin.forms import RecommendationsForm
+    form = RecommendationsForm()
+
+    if form.validate_on_submit():
+        jobs.enqueue('update_recommendations')
+        flash('De aanbevelingen worden bijgewerkt.', 'info')
+    return redirect(url_for('admin.products'))
@@ -0,0 +1,300 @@
+"""
+API Blueprint - JSON catalogus API (Week 7b).
+
+Deze blueprint geeft de catalogus als JSON, bijvoorbeeld voor een
+mobiele app:
+- GET /api/categories                 Alle categorieën met aantal producten
+- GET /api/products                   Producten (gepagineerd, filterbaar)
+- GET /api/products?ids=1,2,3         Meerdere producten in één request
+- GET /api/products/<id>              Eén product
+- GET /api/search?q=...               Zoeken op naam en beschrijving
+- GET /api/suggest?q=...              Autocomplete op het begin van een woord
+
+Met ?fields=id,name,price vraag je alleen de velden op die je nodig hebt.
+We selecteren dan ook alleen die kolommen: er worden geen Product
+objecten gemaakt, de rijen gaan direct naar JSON.
+
+Alle antwoorden hebben een ETag op basis van de catalogus versie, zodat
+een client met If-None-Match een 304 krijgt zonder query.
+
+Deze blueprint wordt geregistreerd met url_prefix='/api'.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import Blueprint, request, make_response
+from webshop_app.models import db, Category, Product
+from webshop_app.catalog import catalog_version
+from webshop_app.suggest import suggest_index
+
+try:
+    import orjson
+except ImportError:  # orjson is optioneel, json uit de standaard library werkt ook
+    orjson = None
+
+# Maak blueprint aan
+api_bp = Blueprint('api', __name__)
+
+# Velden die een client mag opvragen, met de bijbehorende kolom
+PRODUCT_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'price': Product.price,
+    'stock': Product.stock,
+    'description': Product.description,
+    'category_id': Product.category_id,
+    'category_name': Category.name.label('category_name'),
+    'updated_at': Product.updated_at,
+}
+DEFAULT_PRODUCT_FIELDS = ('id', 'name', 'price', 'stock', 'category_id')
+MAX_PER_PAGE = 100
+
+
+class ApiError(Exception):
+    """Fout die als JSON met een status code teruggegeven wordt."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_bp.errorhandler(ApiError)
+def api_error(error: ApiError):
+    """Geef een ApiError terug als JSON."""
+    return _json({'error': error.message}, error.status)
+
+
+@api_bp.before_request
+def not_modified():
+    """Beantwoord een request met geldige If-None-Match direct met 304."""
+    if request.if_none_match and request.if_none_match.contains_weak(_etag()):
+        response = make_response('', 304)
+        response.set_etag(_etag())
+        return response
+
+
+@api_bp.route("/categories")
+def categories():
+    """Alle categorieën met het aantal producten (één GROUP BY query).
+
+    Route: /api/categories
+
+    Returns:
+        JSON met een lijst categorieën
+    """
+    stmt = (
+        db.select(
+            Category.id,
+            Category.name,
+            Category.description,
+            db.func.count(Product.id).label('product_count'),
+        )
+        .outerjoin(Product, Product.category_id == Category.id)
+        .group_by(Category.id)
+        .order_by(Category.name)
+    )
+    rows = db.session.execute(stmt).mappings()
+    return _json({'items': [dict(row) for row in rows]})
+
+
+@api_bp.route("/products")
+def products():
+    """Producten, gepagineerd en filterbaar, of een batch via ?ids=.
+
+    Route: /api/products
+
+    Query parameters:
+        fields: Komma-gescheiden velden (default id,name,price,stock,category_id)
+        ids: Komma-gescheiden product IDs (batch lookup, max 100)
+        category_id: Alleen producten uit deze categorie
+        min_price, max_price: Prijsgrenzen
+        in_stock: 1 voor alleen producten op voorraad
+        page, per_page: Paginering (per_page max 100)
+
+    Returns:
+        JSON met items en paginering
+    """
+    columns = _product_columns()
+
+    ids = request.args.get('ids')
+    if ids:
+        id_list = _int_list(ids)
+        stmt = _product_select(columns).where(Product.id.in_(id_list))
+        by_id = {row['id']: row for row in _rows(stmt)}
+        # Zelfde volgorde als gevraagd, onbekende IDs overslaan
+        return _json({'items': [_strip_id(by_id[i], columns) for i in id_list if i in by_id]})
+
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), MAX_PER_PAGE)
+    if page < 1 or per_page < 1:
+        raise ApiError("page en per_page moeten positief zijn")
+
+    stmt = _product_select(columns)
+    category_id = request.args.get('category_id', type=int)
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    min_price = request.args.get('min_price', type=float)
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+    max_price = request.args.get('max_price', type=float)
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    if request.args.get('in_stock') in ('1', 'true'):
+        stmt = stmt.where(Product.stock > 0)
+
+    # Eén rij extra ophalen om te weten of er een volgende pagina is (geen COUNT nodig)
+    stmt = stmt.order_by(Product.id).limit(per_page + 1).offset((page - 1) * per_page)
+    rows = _rows(stmt)
+    return _json({
+        'items': [_strip_id(row, columns) for row in rows[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_next': len(rows) > per_page,
+    })
+
+
+@api_bp.route("/products/<int:product_id>")
+def product(product_id: int):
+    """Eén product.
+
+    Route: /api/products/<id>
+
+    Returns:
+        JSON met het product
+
+    Raises:
+        404: Als product niet bestaat
+    """
+    columns = _product_columns()
+    rows = _rows(_product_select(columns).where(Product.id == product_id))
+    if not rows:
+        raise ApiError("Product niet gevonden", 404)
+    return _json(_strip_id(rows[0], columns))
+
+
+@api_bp.route("/search")
+def search():
+    """Zoek producten op naam en beschrijving.
+
+    Route: /api/search?q=...
+
+    Returns:
+        JSON met maximaal `limit` (default 20) producten
+    """
+    query = request.args.get('q', '').strip()
+    if len(query) < 2:
+        raise ApiError("Zoekterm moet minimaal 2 karakters zijn")
+    limit = min(request.args.get('limit', 20, type=int), MAX_PER_PAGE)
+
+    columns = _product_columns()
+    pattern = f'%{query}%'
+    stmt = (
+        _product_select(columns)
+        .where(db.or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+        .order_by(Product.name)
+        .limit(limit)
+    )
+    return _json({'items': [_strip_id(row, columns) for row in _rows(stmt)]})
+
+
+@api_bp.route("/suggest")
+def suggest():
+    """Suggesties voor een zoekveld, populairste producten eerst.
+
+    Route: /api/suggest?q=...
+
+    Komt uit de prefix trie in het geheugen (geen query per toetsaanslag),
+    zie webshop_app/suggest.py.
+
+    Query parameters:
+        q: Begin van een woord uit de productnaam (of meerdere woorden)
+        limit: Maximaal aantal suggesties (default en max SUGGEST_MAX_RESULTS)
+
+    Returns:
+        JSON met items [{id, name}, ...]
+    """
+    if not suggest_index.enabled:
+        raise ApiError("Suggesties staan uit", 404)
+    query = request.args.get('q', '')
+    if not query.strip():
+        return _json({'items': []})
+    limit = min(request.args.get('limit', suggest_index.k, type=int), suggest_index.k)
+    if limit < 1:
+        raise ApiError("limit moet positief zijn")
+    items = suggest_index.suggest(query, limit)
+    return _json({'items': [{'id': product_id, 'name': name} for product_id, name in items]})
+
+
+def _product_columns() -> list[str]:
+    """Lees en controleer ?fields=. 'id' wordt intern altijd opgehaald."""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(DEFAULT_PRODUCT_FIELDS)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in PRODUCT_FIELDS]
+    if unknown:
+        raise ApiError(f"Onbekende velden: {', '.join(unknown)}")
+    return names
+
+
+def _product_select(columns: list[str]):
+    """SELECT van alleen de gevraagde kolommen (plus id)."""
+    wanted = columns if 'id' in columns else ['id', *columns]
+    stmt = db.select(*(PRODUCT_FIELDS[name] for name in wanted))
+    if 'category_name' in wanted:
+        stmt = stmt.join(Category, Product.category_id == Category.id)
+    return stmt
+
+
+def _rows(stmt) -> list[dict]:
+    """Voer een select uit en geef de rijen als dicts."""
+    return [dict(row) for row in db.session.execute(stmt).mappings()]
+
+
+def _strip_id(row: dict, columns: list[str]) -> dict:
+    """Haal 'id' weg als de client er niet om gevraagd heeft."""
+    if 'id' not in columns:
+        row = {k: v for k, v in row.items() if k != 'id'}
+    return row
+
+
+def _int_list(value: str) -> list[int]:
+    """Zet '1,2,3' om naar [1, 2, 3] (max MAX_PER_PAGE, zonder dubbelen)."""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise ApiError("ids moet een komma-gescheiden lijst getallen zijn")
+    if len(ids) > MAX_PER_PAGE:
+        raise ApiError(f"Maximaal {MAX_PER_PAGE} ids per request")
+    return ids
+
+
+def _etag() -> str:
+    """ETag op basis van catalogus versie en de volledige URL."""
+    url_hash = hashlib.blake2b(request.full_path.encode(), digest_size=8).hexdigest()
+    return f'api-v{catalog_version.version}-{url_hash}'
+
+
+def _default(value):
+    """JSON serialisatie van datetime (voor de standaard json module)."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is niet JSON serializable')
+
+
+def _json(data, status: int = 200):
+    """Maak een JSON response (met orjson als dat geïnstalleerd is)."""
+    if orjson is not None:
+        body = orjson.dumps(data, option=orjson.OPT_NAIVE_UTC)
+    else:
+        body = json.dumps(data, default=_default, separators=(',', ':'), ensure_ascii=False)
+    response = make_response(body, status)
+    response.mimetype = 'application/json'
+    if status == 200:
+        response.set_etag(_etag())
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,132 @@
+"""
+Static assets met fingerprint en lange cache tijden (Week 7b).
+
+Zonder fingerprint in de URL kunnen we browsers niet laten cachen: na
+een wijziging in webshop.css zou de oude versie blijven hangen. Daarom:
+- `python build_assets.py` kopieert elk static bestand naar static/dist/
+  met een content-hash in de naam (css/webshop.css -> css/webshop.3f2a9c1b.css)
+  en schrijft een manifest.json met die vertaling
+- De template helper asset_url('css/webshop.css') geeft de URL van de
+  versie met fingerprint (of de gewone URL als er nog geen build is)
+- Fingerprinted URLs krijgen `Cache-Control: public, max-age=31536000,
+  immutable`; alle andere static files een korte cache tijd
+
+build_id is een korte hash van de geladen manifests (plus DEPLOY_VERSION).
+De catalogus ETags bevatten hem, zodat een browser na een deploy met
+nieuwe assets of templates geen 304 meer krijgt voor de oude HTML.
+
+Bootstrap wordt met `python build_assets.py --vendor` naar static/vendor/
+gedownload. Is dat (nog) niet gebeurd, dan verwijst asset_url naar de CDN.
+"""
+import hashlib
+import json
+import os
+
+from flask import current_app, request, url_for
+
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Vendor bestanden: lokaal pad in static/ -> CDN URL (bron voor --vendor)
+VENDOR_ASSETS = {
+    'vendor/bootstrap/css/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+}
+
+
+def manifest_path(static_folder: str) -> str:
+    """Pad naar het manifest van een static folder."""
+    return os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME)
+
+
+class Assets:
+    """Flask extensie voor asset_url() en cache headers van static files."""
+
+    def __init__(self):
+        """Maak een lege Assets extensie aan."""
+        self.short_max_age = 300
+        self.build_id = ''
+        self._manifests: dict[str | None, dict[str, str]] = {}
+
+    def init_app(self, app) -> None:
+        """Laad de manifests en registreer asset_url() en de cache headers.
+
+        Config keys:
+            ASSET_MAX_AGE: Cache tijd in seconden voor static files zonder
+                fingerprint (default 300)
+            DEPLOY_VERSION: Versie van de code, bijvoorbeeld de git commit
+                (default None); nodig als een deploy alleen templates wijzigt
+
+        Args:
+            app: Flask app instance
+        """
+        self.short_max_age = app.config.setdefault('ASSET_MAX_AGE', 300)
+        self._manifests = {None: self._load(app.static_folder)}
+        for name, blueprint in app.blueprints.items():
+            if blueprint.static_folder:
+                self._manifests[name] = self._load(blueprint.static_folder)
+        deploy = [app.config.setdefault('DEPLOY_VERSION', None), sorted(self._manifests.items(), key=str)]
+        self.build_id = hashlib.blake2b(
+            json.dumps(deploy, sort_keys=True).encode(), digest_size=4
+        ).hexdigest()
+        app.add_template_global(self.asset_url)
+        app.after_request(self._cache_headers)
+        app.extensions['assets'] = self
+
+    def asset_url(self, filename: str, blueprint: str | None = None) -> str:
+        """URL van een static bestand, met fingerprint als die er is.
+
+        Voorbeeld in een template:
+            <link href="{{ asset_url('css/webshop.css') }}" rel="stylesheet">
+
+        Args:
+            filename: Pad relatief aan de static folder
+            blueprint: Naam van de blueprint met de static folder (of None)
+
+        Returns:
+            URL van het bestand
+        """
+        endpoint = f'{blueprint}.static' if blueprint else 'static'
+        hashed = self._manifests.get(blueprint, {}).get(filename)
+        if hashed is not None:
+            return url_for(endpoint, filename=f'{DIST_FOLDER}/{hashed}')
+
+        if blueprint is None and filename in VENDOR_ASSETS:
+            folder = current_app.static_folder
+            if not os.path.isfile(os.path.join(folder, filename)):
+                return VENDOR_ASSETS[filename]
+        return url_for(endpoint, filename=filename)
+
+    def _load(self, static_folder: str | None) -> dict[str, str]:
+        """Lees een manifest (leeg als er nog geen build is)."""
+        if not static_folder:
+            return {}
+        try:
+            with open(manifest_path(static_folder)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _cache_headers(self, response):
+        """Lange cache tijd voor fingerprinted bestanden, kort voor de rest."""
+        endpoint = request.endpoint or ''
+        if endpoint != 'static' and not endpoint.endswith('.static'):
+            return response
+        if response.status_code not in (200, 304):
+            return response
+
+        filename = (request.view_args or {}).get('filename', '')
+        response.cache_control.public = True
+        response.cache_control.no_cache = None
+        if filename.startswith(DIST_FOLDER + '/'):
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.max_age = self.short_max_age
+        return response
+
+
+assets = Assets()
@@ -11,8 +11,8 @@ Deze blueprint wordt geregistreerd met url_prefix='/auth'.
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, login_required, logout_user, current_user
-from webshop_app.models import db, Customer
-from webshop_app.auth.forms import LoginForm, RegistrationForm
+from webshop_app.models import db, Customer, principal_cache, password_hasher
+from webshop_app.ratelimit import rate_limit
 
 # Maak blueprint aan
 auth_bp = Blueprint(
@@ -23,6 +23,7 @@ auth_bp = Blueprint(
 
 
 @auth_bp.route("/login", methods=['GET', 'POST'])
+@rate_limit(per_ip=(20, 60), per_account=(5, 60), account_field='email')
 def login():
     """Handel het login-proces af.
 
@@ -37,6 +38,8 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('auth.welcome'))
 
+    # Forms pas bij het eerste gebruik importeren (Flask-WTF/WTForms vertragen de startup)
+    from webshop_app.auth.forms import LoginForm
     form = LoginForm()
 
     if form.validate_on_submit():
@@ -45,6 +48,11 @@ def login():
 
         # Check wachtwoord
         if user is not None and user.check_password(form.password.data):
+            # Hash gemaakt met oude parameters? Dan nu opnieuw hashen
+            if password_hasher.needs_rehash(user.password_hash):
+                user.set_password(form.password.data)
+                db.session.commit()
+
             # Log user in
             login_user(user)
             flash(f'Welkom terug, {user.name}!', 'success')
@@ -62,6 +70,7 @@ def login():
 
 
 @auth_bp.route("/register", methods=['GET', 'POST'])
+@rate_limit(per_ip=(5, 60))
 def register():
     """Handel het registratieproces af voor nieuwe gebruikers.
 
@@ -76,6 +85,7 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for('auth.welcome'))
 
+    from webshop_app.auth.forms import RegistrationForm
     form = RegistrationForm()
 
     if form.validate_on_submit():
@@ -110,6 +120,7 @@ def logout():
     Returns:
         Redirect naar de home view
     """
+    principal_cache.invalidate(current_user.id)
     logout_user()
     flash('Je bent succesvol uitgelogd.', 'info')
     return redirect(url_for('products.index'))
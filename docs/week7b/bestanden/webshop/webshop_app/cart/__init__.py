@@ -0,0 +1 @@
+"""Cart Blueprint package."""
@@ -0,0 +1,59 @@
+"""
+Cart Blueprint Forms (Week 7b).
+
+Bevat formulieren voor de winkelwagen: toevoegen, aantal aanpassen en
+afrekenen.
+"""
+from flask_wtf import FlaskForm
+from wtforms import IntegerField, SubmitField
+from wtforms.validators import DataRequired, InputRequired, NumberRange
+
+
+class AddToCartForm(FlaskForm):
+    """Formulier op de productpagina om een product in de wagen te leggen.
+
+    Zonder CSRF token: de productpagina blijft dan voor elke bezoeker
+    gelijk (304 antwoorden, geen sessie per bezoeker). De bescherming
+    komt van SESSION_COOKIE_SAMESITE = 'Lax' (zie create_app): bij een
+    POST vanaf een andere site stuurt de browser het sessie cookie niet
+    mee, dus zo'n formulier komt nooit in de wagen van de bezoeker.
+    Afrekenen heeft daarnaast wel een CSRF token.
+    """
+
+    class Meta:
+        csrf = False
+
+    product_id = IntegerField('Product', validators=[DataRequired()])
+
+    quantity = IntegerField(
+        'Aantal',
+        default=1,
+        validators=[
+            DataRequired(message="Aantal is verplicht"),
+            NumberRange(min=1, max=99, message="Aantal moet tussen 1 en 99 zijn")
+        ]
+    )
+
+    submit = SubmitField('Toevoegen aan Winkelwagen')
+
+
+class CartLineForm(FlaskForm):
+    """Formulier om het aantal van een regel aan te passen (0 = verwijderen)."""
+
+    product_id = IntegerField('Product', validators=[DataRequired()])
+
+    quantity = IntegerField(
+        'Aantal',
+        validators=[
+            InputRequired(message="Aantal is verplicht"),
+            NumberRange(min=0, max=99, message="Aantal moet tussen 0 en 99 zijn")
+        ]
+    )
+
+    submit = SubmitField('Bijwerken')
+
+
+class CheckoutForm(FlaskForm):
+    """Formulier (alleen een knop) om de winkelwagen af te rekenen."""
+
+    submit = SubmitField('Bestelling plaatsen')
@@ -0,0 +1,122 @@
+"""
+Cart Blueprint - Winkelwagen views (Week 7b).
+
+Deze blueprint bevat de routes van de winkelwagen:
+- Winkelwagen bekijken (alle regels in één query)
+- Product toevoegen (vanaf de productpagina)
+- Aantal aanpassen of regel verwijderen
+- Afrekenen (alleen ingelogd)
+
+De wagen zelf staat in de database, zie carts.py.
+Deze blueprint wordt geregistreerd met url_prefix='/cart'.
+"""
+from flask import Blueprint, render_template, redirect, url_for, flash
+from flask_login import current_user
+from webshop_app.carts import carts, CartError
+from webshop_app.query_budget import query_budget
+from webshop_app.ratelimit import rate_limit
+
+# Maak blueprint aan
+cart_bp = Blueprint(
+    'cart',
+    __name__,
+    template_folder='templates'
+)
+
+
+@cart_bp.route("/")
+@query_budget(2)
+def view():
+    """Winkelwagen met alle regels en het totaal.
+
+    Returns:
+        Rendered HTML template
+    """
+    # Forms pas bij het eerste gebruik importeren (Flask-WTF/WTForms vertragen de startup)
+    from webshop_app.cart.forms import CartLineForm, CheckoutForm
+    lines = carts.lines()
+    return render_template(
+        "cart/cart.html",
+        lines=lines,
+        total=sum(line.subtotal for line in lines),
+        line_form=CartLineForm(),
+        checkout_form=CheckoutForm(),
+    )
+
+
+@cart_bp.route("/add", methods=['POST'])
+@rate_limit(per_ip=(60, 60))
+def add():
+    """Leg een product in de winkelwagen.
+
+    Returns:
+        Redirect naar de productpagina
+    """
+    from webshop_app.cart.forms import AddToCartForm
+    form = AddToCartForm()
+
+    if not form.validate_on_submit():
+        flash('Kies een aantal tussen 1 en 99.', 'warning')
+        return redirect(url_for('products.product', product_id=form.product_id.data or 0))
+
+    try:
+        quantity = carts.add(form.product_id.data, form.quantity.data)
+    except CartError as error:
+        flash(str(error), 'danger')
+    else:
+        flash(f'Toegevoegd aan je winkelwagen ({quantity} stuks).', 'success')
+    return redirect(url_for('products.product', product_id=form.product_id.data))
+
+
+@cart_bp.route("/update", methods=['POST'])
+@rate_limit(per_ip=(60, 60))
+def update():
+    """Pas het aantal van een regel aan; 0 verwijdert de regel.
+
+    Returns:
+        Redirect naar de winkelwagen
+    """
+    from webshop_app.cart.forms import CartLineForm
+    form = CartLineForm()
+
+    if form.validate_on_submit():
+        carts.update(form.product_id.data, form.quantity.data)
+        flash('Winkelwagen bijgewerkt.', 'info')
+    else:
+        flash('Kies een aantal tussen 0 en 99.', 'warning')
+    return redirect(url_for('cart.view'))
+
+
+@cart_bp.route("/checkout", methods=['POST'])
+@rate_limit(per_account=(5, 60))
+def checkout():
+    """Reken de winkelwagen af: Order en OrderItems in één transactie.
+
+    Anonieme bezoekers gaan eerst naar de login pagina; na het inloggen
+    gaat hun wagen op in die van hun account.
+
+    Returns:
+        Redirect naar het account overzicht (met de nieuwe bestelling),
+        of terug naar de winkelwagen bij een probleem
+    """
+    if not current_user.is_authenticated:
+        flash('Log in om af te rekenen. Je winkelwagen blijft bewaard.', 'info')
+        return redirect(url_for('auth.login', next=url_for('cart.view')))
+
+    from webshop_app.cart.forms import CheckoutForm
+    form = CheckoutForm()
+    if not form.validate_on_submit():
+        return redirect(url_for('cart.view'))
+
+    try:
+        order = carts.checkout(current_user.id)
+    except CartError as error:
+        flash(str(error), 'danger')
+        return redirect(url_for('cart.view'))
+
+    flash(
+        f'Bedankt voor je bestelling! Order #{order.id} (€{order.total_amount:.2f}) is geplaatst. '
+        f'Je ontvangt een bevestiging per mail.',
+        'success'
+    )
+    return redirect(url_for('auth.welcome'))
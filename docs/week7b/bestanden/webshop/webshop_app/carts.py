@@ -0,0 +1,308 @@
+"""
+Winkelwagen in de database (Week 7b).
+
+De winkelwagen van week 2 leefde in het geheugen van één proces. Hier
+staat hij in de tabel cart_items, als compacte (cart_key, product_id,
+quantity) rijen:
+- Klanten: cart_key 'u:<customer_id>', dus dezelfde wagen op elk apparaat
+- Anonieme bezoekers: cart_key 's:<token>', met het token in de sessie
+- Na het inloggen gaat de anonieme wagen op in die van de klant
+
+Naam en prijs staan niet in de wagen: de pagina haalt alle regels met
+hun product in één join op (geen query per regel), met de actuele prijs.
+
+Afrekenen (checkout) maakt van de wagen een Order met OrderItems in één
+transactie. Elke stap is een schrijfactie, vanaf de eerste:
+1. DELETE ... RETURNING leegt de wagen en geeft de regels terug
+2. Per regel UPDATE products SET stock = stock - n WHERE stock >= n
+   RETURNING price: voorraad en prijs in één statement
+3. INSERT van de Order en de OrderItems
+Is er van een product te weinig voorraad, dan volgt een rollback: de
+wagen staat er weer en er is niets verkocht. Twee klanten die tegelijk
+het laatste exemplaar kopen kunnen zo niet allebei slagen.
+
+Een anonieme wagen verdwijnt samen met zijn sessie: de session sweeper
+(zie sessions.py) geeft de verlopen sessies door en hun 's:<token>'
+regels worden verwijderd.
+"""
+import secrets
+from dataclasses import dataclass
+
+from flask import current_app, flash, session
+from flask_login import current_user, user_logged_in
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from webshop_app.jobs import jobs
+from webshop_app.models import db, CartItem, Order, OrderItem, Product
+from webshop_app.sessions import server_sessions
+from webshop_app.suggest import suggest_index
+
+SESSION_KEY = 'cart_id'
+
+
+class CartError(ValueError):
+    """De wagen kan niet (zo) aangepast of afgerekend worden."""
+
+
+@dataclass(frozen=True)
+class CartLine:
+    """Een regel van de winkelwagen, met het product erbij.
+
+    Attributes:
+        product: Het Product
+        quantity: Aantal
+    """
+    product: Product
+    quantity: int
+
+    @property
+    def subtotal(self) -> float:
+        """Prijs x aantal, met de actuele prijs."""
+        return self.product.price * self.quantity
+
+    @property
+    def available(self) -> bool:
+        """Is er genoeg voorraad voor deze regel?"""
+        return self.quantity <= self.product.stock
+
+
+class CartStore:
+    """Flask extensie voor de winkelwagens in cart_items."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) CartStore aan."""
+        self.app = None
+        self.max_quantity = 99
+        self.max_lines = 100
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            CART_MAX_QUANTITY: Maximaal aantal per regel (default 99)
+            CART_MAX_LINES: Maximaal aantal verschillende producten (default 100)
+
+        Args:
+            app: Flask app instance
+        """
+        self.max_quantity = app.config.setdefault('CART_MAX_QUANTITY', 99)
+        self.max_lines = app.config.setdefault('CART_MAX_LINES', 100)
+        self.app = app
+        user_logged_in.connect(self._merge_on_login, app)
+        server_sessions.on_expired(self._remove_expired)
+        app.extensions['carts'] = self
+
+    def key(self, create: bool = False) -> str | None:
+        """Sleutel van de wagen van de huidige bezoeker.
+
+        Args:
+            create: Maak voor een anonieme bezoeker een token aan als die
+                er nog geen heeft
+
+        Returns:
+            'u:<id>' of 's:<token>', of None (anoniem, nog geen wagen)
+        """
+        if current_user.is_authenticated:
+            return f'u:{current_user.id}'
+        token = session.get(SESSION_KEY)
+        if token is None:
+            if not create:
+                return None
+            token = session[SESSION_KEY] = secrets.token_urlsafe(16)
+        return f's:{token}'
+
+    def add(self, product_id: int, quantity: int = 1) -> int:
+        """Leg een product in de wagen (of verhoog het aantal).
+
+        Args:
+            product_id: ID van het product
+            quantity: Aantal erbij
+
+        Returns:
+            Het nieuwe aantal van de regel (begrensd op CART_MAX_QUANTITY)
+
+        Raises:
+            CartError: Als het product niet bestaat of de wagen vol is
+        """
+        stock = db.session.execute(db.select(Product.stock).where(Product.id == product_id)).scalar()
+        if stock is None:
+            raise CartError("Dit product bestaat niet")
+        if stock <= 0:
+            raise CartError("Dit product is uitverkocht")
+        key = self.key(create=True)
+        lines, present = db.session.execute(
+            db.select(db.func.count(), db.func.max(CartItem.product_id == product_id))
+            .where(CartItem.cart_key == key)
+        ).one()
+        if not present and lines >= self.max_lines:
+            raise CartError(f"De winkelwagen kan maximaal {self.max_lines} verschillende producten bevatten")
+        # Eén statement: nieuwe regel of het aantal ophogen (geen select-dan-update)
+        stmt = insert(CartItem).values(
+            cart_key=key, product_id=product_id, quantity=min(quantity, self.max_quantity)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_key, CartItem.product_id],
+            set_={'quantity': db.func.min(CartItem.quantity + stmt.excluded.quantity, self.max_quantity)},
+        ).returning(CartItem.quantity)
+        new_quantity = db.session.execute(stmt).scalar()
+        db.session.commit()
+        return new_quantity
+
+    def update(self, product_id: int, quantity: int) -> None:
+        """Zet het aantal van een regel; 0 haalt de regel weg.
+
+        Args:
+            product_id: ID van het product
+            quantity: Nieuw aantal
+        """
+        key = self.key()
+        if key is None:
+            return
+        where = (CartItem.cart_key == key, CartItem.product_id == product_id)
+        if quantity <= 0:
+            db.session.execute(db.delete(CartItem).where(*where))
+        else:
+            db.session.execute(
+                db.update(CartItem).where(*where).values(quantity=min(quantity, self.max_quantity))
+            )
+        db.session.commit()
+
+    def lines(self) -> list[CartLine]:
+        """Alle regels van de wagen met hun product, in één query.
+
+        Returns:
+            Lijst van CartLine, op volgorde van product naam
+        """
+        key = self.key()
+        if key is None:
+            return []
+        stmt = (
+            db.select(Product, CartItem.quantity)
+            .join(CartItem, CartItem.product_id == Product.id)
+            .where(CartItem.cart_key == key)
+            .order_by(Product.name)
+        )
+        return [CartLine(product, quantity) for product, quantity in db.session.execute(stmt)]
+
+    def checkout(self, customer_id: int) -> Order:
+        """Reken de wagen van de huidige klant af (één transactie).
+
+        Args:
+            customer_id: ID van de klant
+
+        Returns:
+            De nieuwe Order
+
+        Raises:
+            CartError: Als de wagen leeg is of een product niet (genoeg) op voorraad is
+        """
+        key = f'u:{customer_id}'
+        try:
+            # Eerst schrijven: vanaf hier heeft deze transactie de schrijflock
+            lines = db.session.execute(
+                db.delete(CartItem).where(CartItem.cart_key == key)
+                .returning(CartItem.product_id, CartItem.quantity)
+            ).all()
+            if not lines:
+                raise CartError("Je winkelwagen is leeg")
+
+            product_ids, category_ids = db.session.info.setdefault('catalog_changes', (set(), set()))
+            items = []
+            for product_id, quantity in sorted(lines):
+                row = db.session.execute(
+                    db.update(Product)
+                    .where(Product.id == product_id, Product.stock >= quantity)
+                    .values(stock=Product.stock - quantity)
+                    .returning(Product.price, Product.category_id)
+                    .execution_options(synchronize_session=False)
+                ).first()
+                if row is None:
+                    name = db.session.execute(db.select(Product.name).where(Product.id == product_id)).scalar()
+                    if name is None:
+                        raise CartError("Een product in je winkelwagen bestaat niet meer")
+                    raise CartError(f"Niet genoeg voorraad van {name}")
+                price, category_id = row
+                items.append({'product_id': product_id, 'quantity': quantity, 'price': price})
+                # Bulk UPDATE: de after_flush hook ziet deze wijziging niet
+                product_ids.add(product_id)
+                category_ids.add(category_id)
+
+            order = Order(customer_id=customer_id)
+            order.total_amount = round(sum(item['price'] * item['quantity'] for item in items), 2)
+            db.session.add(order)
+            db.session.flush()
+            db.session.execute(db.insert(OrderItem), [{'order_id': order.id, **item} for item in items])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        current_app.logger.info("Order %s: %d regels, totaal %.2f", order.id, len(lines), order.total_amount)
+        for product_id, quantity in lines:
+            suggest_index.record_sale(product_id, quantity)
+        jobs.enqueue('send_order_confirmation', order_id=order.id)
+        return order
+
+    def _merge_on_login(self, app, user) -> None:
+        """Voeg de anonieme wagen samen met die van de klant (signal handler).
+
+        Ook na het samenvoegen geldt CART_MAX_LINES: nieuwe producten die
+        niet meer passen vallen weg (met een melding), bestaande regels
+        worden alleen opgehoogd.
+        """
+        token = session.pop(SESSION_KEY, None)
+        if token is None:
+            return
+        source = f's:{token}'
+        target = f'u:{user.id}'
+        rows = db.session.execute(
+            db.delete(CartItem).where(CartItem.cart_key == source)
+            .returning(CartItem.product_id, CartItem.quantity)
+        ).all()
+        existing = set(db.session.execute(
+            db.select(CartItem.product_id).where(CartItem.cart_key == target)
+        ).scalars())
+        room = self.max_lines - len(existing)
+        merged = []
+        for product_id, quantity in sorted(rows):
+            if product_id not in existing:
+                if room <= 0:
+                    continue
+                room -= 1
+            merged.append((product_id, quantity))
+        if len(merged) < len(rows):
+            flash(f'Niet alles uit je winkelwagen paste erbij: maximaal {self.max_lines} '
+                  f'verschillende producten.', 'warning')
+        rows = merged
+        if rows:
+            stmt = insert(CartItem)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CartItem.cart_key, CartItem.product_id],
+                set_={'quantity': db.func.min(CartItem.quantity + stmt.excluded.quantity, self.max_quantity)},
+            )
+            db.session.execute(stmt, [
+                {'cart_key': target, 'product_id': product_id, 'quantity': quantity}
+                for product_id, quantity in rows
+            ])
+        db.session.commit()
+
+    def _remove_expired(self, sessions: list[dict]) -> None:
+        """Verwijder de anonieme wagens van verlopen sessies (listener van de sweeper)."""
+        keys = [f's:{data[SESSION_KEY]}' for data in sessions if data.get(SESSION_KEY)]
+        if not keys:
+            return
+        with self.app.app_context():
+            try:
+                # In stukken: SQLite heeft een maximum aantal parameters per statement
+                for start in range(0, len(keys), 500):
+                    db.session.execute(
+                        db.delete(CartItem).where(CartItem.cart_key.in_(keys[start:start + 500]))
+                    )
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                self.app.logger.exception("Anonieme winkelwagens opruimen mislukt")
+
+
+carts = CartStore()
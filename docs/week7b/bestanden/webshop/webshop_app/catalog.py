@@ -0,0 +1,257 @@
+"""
+Catalogus versie en conditional GETs (Week 7b).
+
+De catalogus pagina's (index, category, product) veranderen alleen als
+een admin een product toevoegt, wijzigt of verwijdert. Daarom houden we
+een versienummer bij dat bij elke wijziging van Product of Category
+omhoog gaat (zie de SQLAlchemy events in models.py).
+
+Het versienummer staat in een klein bestand, zodat meerdere worker
+processen dezelfde versie zien. Een os.stat() per request is genoeg om
+te zien of de versie veranderd is: geen database query nodig. Verhogen
+gebeurt onder een fcntl.flock lock, zodat twee workers die tegelijk een
+wijziging doorvoeren niet allebei versie N+1 schrijven.
+
+De decorator @conditional_get gebruikt de versie voor ETag en
+Last-Modified headers. Heeft de browser de pagina al (If-None-Match of
+If-Modified-Since), dan antwoorden we direct met 304 Not Modified,
+nog vóór er een query of template aan te pas komt.
+"""
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+
+from webshop_app.assets import assets
+
+try:
+    import fcntl
+except ImportError:  # fcntl bestaat niet op Windows; daar is er ook geen prefork, dus één proces
+    fcntl = None
+
+
+class VersionFile:
+    """Versienummer dat via een bestand gedeeld wordt tussen processen.
+
+    Lezen kost een os.stat(); verhogen gebeurt onder een fcntl.flock lock.
+    Naast de catalogus versie gebruikt ook de principal_cache (zie
+    user_cache.py) zo'n bestand.
+    """
+
+    def __init__(self, path: str | None = None):
+        """Maak een VersionFile aan.
+
+        Args:
+            path: Pad naar het versiebestand, of None voor alleen in het geheugen
+        """
+        self._lock = threading.Lock()
+        self.configure(path)
+
+    def configure(self, path: str | None) -> None:
+        """Stel het versiebestand in (en maak het aan als het nog niet bestaat).
+
+        Args:
+            path: Pad naar het versiebestand, of None
+        """
+        with self._lock:
+            self.path = path
+            self._mtime = None
+            self._version = 1
+            self._timestamp = time.time()
+            if path is not None and not os.path.exists(path):
+                self._write(self._version, self._timestamp)
+
+    def current(self) -> tuple[int, float]:
+        """Geef de huidige versie en het tijdstip van de laatste wijziging.
+
+        Returns:
+            Tuple (versie, unix timestamp)
+        """
+        if self.path is None:
+            return self._version, self._timestamp
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._version, self._timestamp
+        with self._lock:
+            if mtime != self._mtime:
+                self._read()
+                self._mtime = mtime
+            return self._version, self._timestamp
+
+    @property
+    def version(self) -> int:
+        """Het huidige versienummer."""
+        return self.current()[0]
+
+    @property
+    def last_modified(self) -> datetime:
+        """Tijdstip van de laatste wijziging (UTC)."""
+        return datetime.fromtimestamp(int(self.current()[1]), timezone.utc)
+
+    def bump(self) -> int:
+        """Verhoog de versie.
+
+        Returns:
+            Het nieuwe versienummer
+        """
+        with self._lock:
+            if self.path is None:
+                self._version += 1
+                self._timestamp = time.time()
+            else:
+                # Lezen, verhogen en schrijven onder één lock over alle processen
+                with open(f'{self.path}.lock', 'a') as lock:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_EX)
+                    self._read()
+                    self._version += 1
+                    self._timestamp = time.time()
+                    self._write(self._version, self._timestamp)
+                    self._mtime = os.stat(self.path).st_mtime_ns
+            return self._version
+
+    def _read(self) -> None:
+        """Lees versie en timestamp uit het bestand."""
+        try:
+            with open(self.path) as f:
+                version, timestamp = f.read().split()
+            self._version, self._timestamp = int(version), float(timestamp)
+        except (OSError, ValueError):
+            pass
+
+    def _write(self, version: int, timestamp: float) -> None:
+        """Schrijf versie en timestamp atomisch naar het bestand."""
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(f'{version} {timestamp}')
+        os.replace(tmp, self.path)
+
+
+class CatalogVersion(VersionFile):
+    """Versienummer van de catalogus, gedeeld via een bestand."""
+
+    def __init__(self, path: str | None = None):
+        """Maak een CatalogVersion aan.
+
+        Args:
+            path: Pad naar het versiebestand, of None voor alleen in het geheugen
+        """
+        self._listeners = []
+        super().__init__(path)
+
+    def init_app(self, app) -> None:
+        """Lees het pad van het versiebestand uit de app configuratie.
+
+        Config keys:
+            CATALOG_VERSION_PATH: Pad naar het versiebestand
+                (default catalog.version naast webshop.db, None = in geheugen)
+
+        Args:
+            app: Flask app instance
+        """
+        path = app.config.setdefault(
+            'CATALOG_VERSION_PATH', os.path.join(os.path.dirname(app.root_path), 'catalog.version')
+        )
+        self.configure(path)
+        app.extensions['catalog_version'] = self
+
+    def bump(self, product_ids=(), category_ids=()) -> int:
+        """Verhoog de versie na een wijziging in de catalogus.
+
+        Listeners (bijvoorbeeld caches) krijgen de gewijzigde ids mee, plus
+        de versie vlak voor deze bump en de nieuwe versie. Is de vorige
+        versie niet de versie die een cache als laatste zag, dan heeft een
+        ander proces er tussendoor iets gewijzigd: alleen deze ids bijwerken
+        is dan niet genoeg.
+
+        Args:
+            product_ids: IDs van gewijzigde producten
+            category_ids: IDs van gewijzigde categorieën
+
+        Returns:
+            Het nieuwe versienummer
+        """
+        version = super().bump()
+        # bump() verhoogt onder de lock met precies 1
+        previous = version - 1
+        for listener in list(self._listeners):
+            listener(set(product_ids), set(category_ids), previous, version)
+        return version
+
+    def subscribe(self, listener) -> None:
+        """Registreer een functie die na elke bump aangeroepen wordt.
+
+        Args:
+            listener: Functie met argumenten (product_ids, category_ids, previous, version)
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+
+catalog_version = CatalogVersion()
+
+
+def _user_tag() -> str:
+    """Deel van de ETag dat afhangt van de ingelogde gebruiker (navigatiebalk)."""
+    if not current_user.is_authenticated:
+        return 'anon'
+    principal = f'{current_user.id}:{current_user.name}:{current_user.is_admin}'
+    return hashlib.blake2b(principal.encode(), digest_size=6).hexdigest()
+
+
+def catalog_etag() -> str:
+    """ETag voor een catalogus pagina van de huidige gebruiker.
+
+    Naast de catalogus versie zit de build van de assets erin: na een deploy
+    met andere templates of assets past de oude ETag niet meer.
+    """
+    return f'v{catalog_version.version}-{assets.build_id}-{_user_tag()}'
+
+
+def conditional_get(f):
+    """Decorator voor ETag/Last-Modified en 304 antwoorden op catalogus routes.
+
+    Last-Modified is altijd het tijdstip van de laatste catalogus wijziging,
+    dezelfde waarde waarmee If-Modified-Since vergeleken wordt. (Een pagina
+    toont meer dan één product: categorie, aanbevelingen, ...)
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return f(*args, **kwargs)
+
+        etag = catalog_etag()
+        last_modified = catalog_version.last_modified
+        # Flash messages moeten altijd getoond worden
+        fresh = '_flashes' not in session
+
+        if fresh and request.if_none_match:
+            if request.if_none_match.contains_weak(etag):
+                return _not_modified(etag, last_modified)
+        elif fresh and request.if_modified_since and last_modified <= request.if_modified_since:
+            return _not_modified(etag, last_modified)
+
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
+    return decorated_function
+
+
+def _not_modified(etag: str, last_modified: datetime):
+    """Leeg 304 antwoord met dezelfde validators."""
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
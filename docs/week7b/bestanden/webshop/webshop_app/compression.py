@@ -0,0 +1,165 @@
+"""
+Response compressie en voorgecomprimeerde static files (Week 7b).
+
+De HTML van de catalogus templates en de static CSS/JS gaan standaard
+ongecomprimeerd over de lijn. Deze module:
+- Comprimeert dynamische responses met gzip (of brotli als de `brotli`
+  package geïnstalleerd is), alleen boven COMPRESS_MIN_SIZE bytes en
+  alleen voor content types uit COMPRESS_MIMETYPES
+- Serveert static files als .br/.gz variant als die al bestaat. Die
+  varianten maak je één keer met `python precompress_static.py`, zodat
+  ze niet bij elke request opnieuw gecomprimeerd worden
+"""
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli is optioneel, gzip werkt altijd
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/xml',
+    'text/csv',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Extensies van bestanden die precompress_static.py comprimeert
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.map', '.html')
+
+
+def accepted_encodings() -> list[str]:
+    """Encodings die de client accepteert, in volgorde van voorkeur."""
+    encodings = []
+    if brotli is not None and 'br' in request.accept_encodings:
+        encodings.append('br')
+    if 'gzip' in request.accept_encodings:
+        encodings.append('gzip')
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """Comprimeer data met gzip of brotli.
+
+    Args:
+        data: Ongecomprimeerde bytes
+        encoding: 'gzip' of 'br'
+        level: Compressie niveau (gzip 1-9, brotli quality 0-11)
+
+    Returns:
+        Gecomprimeerde bytes
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+
+class Compression:
+    """Flask extensie voor response compressie."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) Compression aan."""
+        self.enabled = True
+        self.min_size = 500
+        self.level = 6
+        self.mimetypes = set(DEFAULT_MIMETYPES)
+        self.compressed = 0
+        self.precompressed = 0
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen en registreer de request hooks.
+
+        Config keys:
+            COMPRESS_ENABLED: Compressie aan/uit (default True)
+            COMPRESS_MIN_SIZE: Minimale grootte in bytes (default 500)
+            COMPRESS_LEVEL: Compressie niveau (default 6)
+            COMPRESS_MIMETYPES: Content types die gecomprimeerd worden
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('COMPRESS_ENABLED', True)
+        self.min_size = app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        self.level = app.config.setdefault('COMPRESS_LEVEL', 6)
+        self.mimetypes = set(app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+        app.before_request(self._serve_precompressed)
+        app.after_request(self._compress_response)
+        app.extensions['compression'] = self
+
+    def _serve_precompressed(self):
+        """Serveer static/<file> als file.br of file.gz als die bestaat."""
+        if not self.enabled or request.endpoint is None:
+            return None
+        if request.endpoint != 'static' and not request.endpoint.endswith('.static'):
+            return None
+
+        encodings = accepted_encodings()
+        if not encodings:
+            return None
+
+        if request.blueprint:
+            folder = current_app.blueprints[request.blueprint].static_folder
+        else:
+            folder = current_app.static_folder
+        path = safe_join(folder, request.view_args['filename']) if folder else None
+        if path is None:
+            return None
+
+        extensions = {'br': '.br', 'gzip': '.gz'}
+        for encoding in encodings:
+            candidate = path + extensions[encoding]
+            if os.path.isfile(candidate):
+                mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+                response = send_file(
+                    candidate,
+                    mimetype=mimetype,
+                    conditional=True,
+                    max_age=current_app.get_send_file_max_age(path),
+                )
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                self.precompressed += 1
+                return response
+        return None
+
+    def _compress_response(self, response):
+        """Comprimeer een geschikte response met gzip of brotli."""
+        if (not self.enabled
+                or response.direct_passthrough
+                or response.status_code < 200
+                or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in self.mimetypes):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encodings = accepted_encodings()
+        if not encodings:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        encoding = encodings[0]
+        response.set_data(compress(data, encoding, self.level))
+        response.headers['Content-Encoding'] = encoding
+        # Een gecomprimeerde variant heeft niet dezelfde bytes: maak de ETag weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        self.compressed += 1
+        return response
+
+
+compression = Compression()
@@ -0,0 +1,334 @@
+"""
+Gefacetteerd zoeken met bitmaps (Week 7b).
+
+Op /browse filtert een bezoeker op categorie, prijsklasse en voorraad,
+en ziet bij elke optie hoeveel producten er overblijven. Met een GROUP BY
+per facet is dat een handvol queries per request. De FacetIndex houdt
+daarom per facet waarde een bitmap in het geheugen: een Python int
+waarin bit n aan staat als product n die waarde heeft.
+
+    category:3    0b0010110...
+    price:25-50   0b0110010...
+    stock:in      0b1110111...
+
+Een combinatie van filters is dan alleen AND (tussen facets) en OR
+(binnen een facet) op ints, en een aantal is int.bit_count(). Zo'n
+bewerking kost een paar microseconden per duizend producten, zonder
+query. Alleen de producten van de getoonde pagina komen uit de database.
+
+Bijhouden gaat net als bij de SuggestIndex: een wijziging in dit proces
+zet alleen de bits van de gewijzigde producten om (catalog_version
+listener), een wijziging in een ander proces geeft een nieuwe build.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.exc import OperationalError
+
+from webshop_app.catalog import catalog_version
+from webshop_app.models import db, Category, Product
+
+# (sleutel, ondergrens, bovengrens of None, label)
+PRICE_BANDS = (
+    ('0-25', 0, 25, 'Tot €25'),
+    ('25-50', 25, 50, '€25 - €50'),
+    ('50-100', 50, 100, '€50 - €100'),
+    ('100-250', 100, 250, '€100 - €250'),
+    ('250+', 250, None, '€250 en meer'),
+)
+
+
+@dataclass(frozen=True)
+class FacetValue:
+    """Eén keuze in een facet, met het aantal producten als je hem aanvinkt.
+
+    Attributes:
+        key: Waarde in de URL (category id of prijsklasse)
+        label: Tekst voor de bezoeker
+        count: Aantal producten met deze waarde binnen de andere filters
+        selected: Staat deze waarde aan
+    """
+    key: str
+    label: str
+    count: int
+    selected: bool
+
+
+@dataclass(frozen=True)
+class FacetResult:
+    """Antwoord van FacetIndex.search().
+
+    Attributes:
+        total: Aantal producten dat aan alle filters voldoet
+        product_ids: IDs van de gevraagde pagina, oplopend
+        categories: Facet waarden voor categorie
+        prices: Facet waarden voor prijsklasse
+        in_stock: Facet waarde voor "op voorraad"
+    """
+    total: int
+    product_ids: list[int]
+    categories: list[FacetValue]
+    prices: list[FacetValue]
+    in_stock: FacetValue
+
+
+def _band(price: float, bands) -> str | None:
+    """Sleutel van de prijsklasse waar `price` in valt."""
+    for key, low, high, _ in bands:
+        if price >= low and (high is None or price < high):
+            return key
+    return None
+
+
+def _keys(price: float, stock: int, category_id: int, bands) -> list[str]:
+    """Bitmap sleutels van één product."""
+    keys = ['all', f'category:{category_id}']
+    band = _band(price, bands)
+    if band is not None:
+        keys.append(f'price:{band}')
+    if stock > 0:
+        keys.append('stock:in')
+    return keys
+
+
+class FacetIndex:
+    """Bitmap index over categorie, prijsklasse en voorraad."""
+
+    def __init__(self):
+        """Maak een lege index aan."""
+        self.enabled = True
+        self.price_bands = PRICE_BANDS
+        self._lock = threading.Lock()
+        # 'category:3' / 'price:0-25' / 'stock:in' / 'all' -> bitmap
+        self._bitmaps: dict[str, int] = {}
+        # product_id -> zijn sleutels (om de oude bits te kunnen wissen)
+        self._products: dict[int, list[str]] = {}
+        self._categories: dict[int, str] = {}
+        self._version = None
+        self._counts = {'searches': 0, 'builds': 0, 'updates': 0}
+        self.build_seconds = 0.0
+        catalog_version.subscribe(self.update_changes)
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            FACETS_ENABLED: Facet index aan/uit (default True)
+            FACET_PRICE_BANDS: Prijsklassen als (sleutel, van, tot, label)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('FACETS_ENABLED', True)
+        self.price_bands = tuple(app.config.setdefault('FACET_PRICE_BANDS', PRICE_BANDS))
+        app.extensions['facet_index'] = self
+        self.clear()
+
+    def search(self, categories=(), prices=(), in_stock: bool = False,
+               page: int = 1, per_page: int = 24) -> FacetResult:
+        """Filter de catalogus en tel de facet waarden.
+
+        Binnen een facet is het OR (categorie 1 of 2), tussen facets AND.
+        Het aantal bij een facet waarde telt de filters van de andere
+        facets mee, maar niet die van zijn eigen facet: zo zie je ook
+        hoeveel er bij komen als je een tweede categorie aanvinkt.
+
+        Args:
+            categories: Gekozen category IDs
+            prices: Gekozen prijsklasse sleutels
+            in_stock: Alleen producten op voorraad
+            page: Paginanummer (vanaf 1)
+            per_page: Producten per pagina
+
+        Returns:
+            FacetResult met totaal, IDs van de pagina en de facet aantallen
+        """
+        self._ensure_current()
+        with self._lock:
+            bitmaps = self._bitmaps
+            category_names = dict(self._categories)
+            self._counts['searches'] += 1
+
+        categories = {int(c) for c in categories}
+        prices = set(prices)
+        selected = {
+            'category': self._union(bitmaps, (f'category:{c}' for c in categories)) if categories else None,
+            'price': self._union(bitmaps, (f'price:{p}' for p in prices)) if prices else None,
+            'stock': bitmaps.get('stock:in', 0) if in_stock else None,
+        }
+
+        def combined(without: str | None = None) -> int:
+            bits = bitmaps.get('all', 0)
+            for facet, facet_bits in selected.items():
+                if facet != without and facet_bits is not None:
+                    bits &= facet_bits
+            return bits
+
+        result = combined()
+        base = combined('category')
+        category_values = [
+            FacetValue(str(category_id), name, (base & bitmaps.get(f'category:{category_id}', 0)).bit_count(),
+                       category_id in categories)
+            for category_id, name in sorted(category_names.items(), key=lambda item: item[1])
+        ]
+        base = combined('price')
+        price_values = [
+            FacetValue(key, label, (base & bitmaps.get(f'price:{key}', 0)).bit_count(), key in prices)
+            for key, _, _, label in self.price_bands
+        ]
+        stock_value = FacetValue(
+            '1', 'Op voorraad', (combined('stock') & bitmaps.get('stock:in', 0)).bit_count(), in_stock
+        )
+        return FacetResult(
+            total=result.bit_count(),
+            product_ids=self._page(result, (page - 1) * per_page, per_page),
+            categories=category_values,
+            prices=price_values,
+            in_stock=stock_value,
+        )
+
+    def build(self) -> None:
+        """Bouw alle bitmaps opnieuw op (twee queries)."""
+        version = catalog_version.version
+        started = time.perf_counter()
+        categories = dict(db.session.execute(db.select(Category.id, Category.name)).all())
+        rows = db.session.execute(db.select(Product.id, Product.price, Product.stock, Product.category_id))
+
+        # Eerst per sleutel de bit posities verzamelen, dan in één keer de int maken:
+        # bits |= 1 << id per product zou elke keer een nieuwe (grote) int maken
+        positions: dict[str, list[int]] = {}
+        products = {}
+        for product_id, price, stock, category_id in rows:
+            keys = _keys(price, stock, category_id, self.price_bands)
+            products[product_id] = keys
+            for key in keys:
+                positions.setdefault(key, []).append(product_id)
+        bitmaps = {key: _bitmap(ids) for key, ids in positions.items()}
+
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._products = products
+            self._categories = categories
+            self._version = version
+            self._counts['builds'] += 1
+            self.build_seconds = time.perf_counter() - started
+
+    def update_changes(self, product_ids: set, category_ids: set, previous: int, version: int) -> None:
+        """Listener voor catalog_version.bump(): zet alleen de bits van de gewijzigde producten om.
+
+        Was de vorige versie niet de versie van deze index, dan heeft een
+        ander proces ook iets gewijzigd: dan bouwt de volgende search alles
+        opnieuw (zie _ensure_current).
+        """
+        with self._lock:
+            if self._version is None:
+                # Nog niet gebouwd: de eerste search bouwt alles
+                return
+            if previous != self._version:
+                self._version = None
+                return
+            product_ids = {product_id for product_id in product_ids if product_id is not None}
+            category_ids = {category_id for category_id in category_ids if category_id is not None}
+            # Listener draait in after_commit: de session zelf mag geen SQL meer doen
+            with db.engine.connect() as connection:
+                rows = connection.execute(
+                    db.select(Product.id, Product.price, Product.stock, Product.category_id)
+                    .where(Product.id.in_(product_ids))
+                ).all() if product_ids else []
+                names = dict(connection.execute(
+                    db.select(Category.id, Category.name).where(Category.id.in_(category_ids))
+                ).all()) if category_ids else {}
+
+            # Nieuwe dicts, zodat een lopende search een consistente snapshot houdt
+            bitmaps = dict(self._bitmaps)
+            products = dict(self._products)
+            for product_id in product_ids:
+                for key in products.pop(product_id, ()):
+                    bitmaps[key] &= ~(1 << product_id)
+            for product_id, price, stock, category_id in rows:
+                keys = _keys(price, stock, category_id, self.price_bands)
+                products[product_id] = keys
+                for key in keys:
+                    bitmaps[key] = bitmaps.get(key, 0) | (1 << product_id)
+
+            categories = dict(self._categories)
+            for category_id in category_ids:
+                if category_id in names:
+                    categories[category_id] = names[category_id]
+                else:
+                    categories.pop(category_id, None)
+                    bitmaps.pop(f'category:{category_id}', None)
+
+            self._bitmaps = bitmaps
+            self._products = products
+            self._categories = categories
+            self._version = version
+            self._counts['updates'] += 1
+
+    def clear(self) -> None:
+        """Gooi de index weg (de volgende search bouwt hem opnieuw)."""
+        with self._lock:
+            self._bitmaps = {}
+            self._products = {}
+            self._categories = {}
+            self._version = None
+
+    def stats(self) -> dict:
+        """Grootte van de index.
+
+        Returns:
+            Dict met products, bitmaps, bytes, build_ms en tellers
+        """
+        with self._lock:
+            return {
+                'products': len(self._products),
+                'bitmaps': len(self._bitmaps),
+                'bytes': sum((bits.bit_length() + 7) // 8 for bits in self._bitmaps.values()),
+                'build_ms': round(self.build_seconds * 1000, 1),
+                **self._counts,
+            }
+
+    def _ensure_current(self) -> None:
+        """Bouw opnieuw als de catalogus in een ander proces gewijzigd is."""
+        if catalog_version.version != self._version:
+            try:
+                self.build()
+            except OperationalError:
+                # Nog geen tabellen: lege index
+                db.session.rollback()
+
+    @staticmethod
+    def _union(bitmaps: dict[str, int], keys) -> int:
+        """OR van de bitmaps van een aantal sleutels (onbekende sleutels tellen als leeg)."""
+        bits = 0
+        for key in keys:
+            bits |= bitmaps.get(key, 0)
+        return bits
+
+    @staticmethod
+    def _page(bits: int, offset: int, limit: int) -> list[int]:
+        """De IDs op positie offset .. offset+limit (laagste bits eerst)."""
+        for _ in range(offset):
+            if not bits:
+                return []
+            bits &= bits - 1  # laagste bit uitzetten
+        ids = []
+        while bits and len(ids) < limit:
+            lowest = bits & -bits
+            ids.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return ids
+
+
+def _bitmap(ids: list[int]) -> int:
+    """Maak een bitmap met de bits van `ids` aan (via een bytearray, in één keer)."""
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for product_id in ids:
+        buffer[product_id >> 3] |= 1 << (product_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+facet_index = FacetIndex()
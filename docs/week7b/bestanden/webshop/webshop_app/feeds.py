@@ -0,0 +1,306 @@
+"""
+Sitemap en product feed, gestreamd en op schijf gecachet (Week 7b).
+
+Zoekmachines lezen /sitemap.xml, vergelijkingssites een product feed
+(/feed/products.xml of /feed/products.csv). Met alle producten als ORM
+objecten in het geheugen gaat dat bij een grote catalogus mis. Deze
+module schrijft de bestanden daarom regel voor regel weg terwijl de rijen
+uit de cursor komen (yield_per): het geheugengebruik hangt alleen af van
+de batchgrootte, niet van het aantal producten.
+
+Een sitemap mag maximaal 50.000 URLs bevatten. Zijn het er meer, dan
+wordt /sitemap.xml een sitemap index die naar /sitemap-1.xml,
+/sitemap-2.xml, ... verwijst.
+
+De bestanden komen in FEEDS_DIR, met de catalogus versie in de naam:
+
+    feeds/sitemap-v42.xml       (+ .gz)
+    feeds/sitemap-v42-2.xml
+    feeds/products-v42.csv
+
+Zolang de catalogus niet verandert, krijgt elke crawler hetzelfde
+bestand (via send_file, met ETag en Range). Na een wijziging maakt het
+eerste request de bestanden opnieuw.
+
+De URLs in de bestanden zijn absoluut. Ze beginnen met FEEDS_BASE_URL,
+niet met de Host header van het request: die kiest de client zelf, en het
+bestand wordt daarna aan iedereen gestuurd.
+"""
+import atexit
+import csv
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import threading
+from xml.sax.saxutils import escape
+
+from flask import abort, current_app, send_file, url_for
+
+from webshop_app.catalog import catalog_version
+from webshop_app.compression import accepted_encodings
+from webshop_app.models import db, Category, Product
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+FEED_COLUMNS = ['id', 'title', 'description', 'link', 'image_link', 'price', 'availability', 'product_type']
+# Zonder FEEDS_BASE_URL en SERVER_NAME: de poort van serve.py
+DEFAULT_BASE_URL = 'http://localhost:8000'
+_VERSION = re.compile(r'-v(\d+)[-.]')
+
+
+class FeedGenerator:
+    """Flask extensie die sitemap en product feed maakt en serveert."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) FeedGenerator aan."""
+        self.directory = None
+        self.base_url = None
+        self.max_urls = 50000
+        self.batch_size = 1000
+        self.max_age = 3600
+        self._lock = threading.Lock()
+        self._counts = {'generated': 0, 'served': 0}
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            FEEDS_DIR: Map voor de gegenereerde bestanden (default feeds/ naast webshop.db,
+                None = een tijdelijke map die bij het afsluiten verdwijnt)
+            FEEDS_BASE_URL: Begin van de URLs in de bestanden, bijvoorbeeld
+                'https://www.webshop.nl' (default: PREFERRED_URL_SCHEME en SERVER_NAME)
+            SITEMAP_MAX_URLS: URLs per sitemap bestand (default 50000, het maximum van het protocol)
+            FEEDS_BATCH: Rijen per batch uit de cursor (default 1000)
+            FEEDS_MAX_AGE: Cache tijd in seconden voor crawlers (default 3600)
+
+        Args:
+            app: Flask app instance
+        """
+        self.directory = app.config.setdefault(
+            'FEEDS_DIR', os.path.join(os.path.dirname(app.root_path), 'feeds')
+        )
+        self.base_url = app.config.setdefault('FEEDS_BASE_URL', None)
+        if self.base_url is None and app.config.get('SERVER_NAME'):
+            self.base_url = f"{app.config['PREFERRED_URL_SCHEME']}://{app.config['SERVER_NAME']}"
+        self.max_urls = app.config.setdefault('SITEMAP_MAX_URLS', 50000)
+        self.batch_size = app.config.setdefault('FEEDS_BATCH', 1000)
+        self.max_age = app.config.setdefault('FEEDS_MAX_AGE', 3600)
+        app.extensions['feeds'] = self
+
+    def send_sitemap(self, shard: int | None = None):
+        """Response met de sitemap (of de sitemap index) of één deel ervan.
+
+        Args:
+            shard: Nummer van het deel (vanaf 1), of None voor /sitemap.xml
+
+        Returns:
+            Flask response met het bestand
+
+        Raises:
+            404: Als het deel niet bestaat
+        """
+        key = self._key()
+        main = self._path(f'sitemap-{key}.xml')
+        self._ensure(main, lambda: self._write_sitemap(key))
+        path = main if shard is None else self._path(f'sitemap-{key}-{shard}.xml')
+        if not os.path.exists(path):
+            abort(404)
+        return self._send(path, 'application/xml')
+
+    def send_product_feed(self, fmt: str):
+        """Response met de product feed.
+
+        Args:
+            fmt: 'xml' (RSS 2.0 met Google Merchant velden) of 'csv'
+
+        Returns:
+            Flask response met het bestand
+        """
+        key = self._key()
+        path = self._path(f'products-{key}.{fmt}')
+        writer = self._write_feed_csv if fmt == 'csv' else self._write_feed_xml
+        self._ensure(path, lambda: writer(path))
+        return self._send(path, 'text/csv' if fmt == 'csv' else 'application/xml')
+
+    def stats(self) -> dict:
+        """Tellers en bestanden in FEEDS_DIR.
+
+        Returns:
+            Dict met generated, served en files
+        """
+        files = os.listdir(self.directory) if self.directory and os.path.isdir(self.directory) else []
+        return {**self._counts, 'files': len(files)}
+
+    def _key(self) -> str:
+        """Deel van de bestandsnaam: de catalogus versie."""
+        return f'v{catalog_version.version}'
+
+    def _dir(self) -> str:
+        """FEEDS_DIR, of bij None een tijdelijke map (pas bij het eerste bestand)."""
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='webshop-feeds-')
+            atexit.register(shutil.rmtree, self.directory, ignore_errors=True)
+        return self.directory
+
+    def _path(self, filename: str) -> str:
+        """Pad van een bestand in FEEDS_DIR."""
+        return os.path.join(self._dir(), filename)
+
+    def _url(self, endpoint: str, **values) -> str:
+        """Absolute URL met FEEDS_BASE_URL (nooit met de Host header van het request)."""
+        return (self.base_url or DEFAULT_BASE_URL).rstrip('/') + url_for(endpoint, **values)
+
+    def _ensure(self, path: str, generate) -> None:
+        """Maak een bestand als het er voor deze versie nog niet is."""
+        if os.path.exists(path):
+            return
+        with self._lock:
+            # Misschien heeft een andere thread hem net gemaakt
+            if os.path.exists(path):
+                return
+            os.makedirs(self._dir(), exist_ok=True)
+            if self.base_url is None:
+                current_app.logger.warning(
+                    "FEEDS_BASE_URL is niet ingesteld, de feeds verwijzen naar %s", DEFAULT_BASE_URL
+                )
+            generate()
+            self._compress(path)
+            self._counts['generated'] += 1
+            self._remove_old()
+
+    def _send(self, path: str, mimetype: str):
+        """Stuur een bestand, gecomprimeerd als de client gzip accepteert."""
+        self._counts['served'] += 1
+        gzipped = path + '.gz'
+        if 'gzip' in accepted_encodings() and os.path.exists(gzipped):
+            response = send_file(gzipped, mimetype=mimetype, conditional=True, max_age=self.max_age)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_file(path, mimetype=mimetype, conditional=True, max_age=self.max_age)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        return response
+
+    def _write_sitemap(self, key: str) -> None:
+        """Schrijf de sitemap in delen van max_urls URLs, plus zo nodig een index."""
+        lastmod = catalog_version.last_modified.strftime('%Y-%m-%d')
+        pages = [(self._url('products.index'), lastmod)]
+        pages += [
+            (self._url('products.category', category_id=category_id), lastmod)
+            for category_id in db.session.execute(db.select(Category.id).order_by(Category.id)).scalars()
+        ]
+        # url_for() per product is (bij een miljoen producten) merkbaar: de URL eindigt op het ID
+        product_url = self._url('products.product', product_id=0)[:-1]
+        stmt = db.select(Product.id, Product.updated_at).order_by(Product.id)
+
+        def urls():
+            yield from pages
+            for product_id, updated_at in db.session.execute(stmt.execution_options(yield_per=self.batch_size)):
+                yield f'{product_url}{product_id}', updated_at.strftime('%Y-%m-%d')
+
+        shards = 0
+        out = None
+        count = 0
+        for loc, modified in urls():
+            if out is None or count == self.max_urls:
+                if out is not None:
+                    self._close(out, '</urlset>\n')
+                shards += 1
+                out = self._open(self._path(f'sitemap-{key}-{shards}.xml'))
+                out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n')
+                count = 0
+            out.write(f'<url><loc>{escape(loc)}</loc><lastmod>{modified}</lastmod></url>\n')
+            count += 1
+        self._close(out, '</urlset>\n')
+
+        main = self._path(f'sitemap-{key}.xml')
+        if shards == 1:
+            # Past in één bestand: geen index nodig
+            os.replace(self._path(f'sitemap-{key}-1.xml'), main)
+            return
+        out = self._open(main)
+        out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n')
+        for shard in range(1, shards + 1):
+            self._compress(self._path(f'sitemap-{key}-{shard}.xml'))
+            loc = self._url('products.sitemap_shard', shard=shard)
+            out.write(f'<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></sitemap>\n')
+        self._close(out, '</sitemapindex>\n')
+
+    def _feed_rows(self):
+        """Alle producten als tuples voor de feed, per batch uit de cursor."""
+        product_url = self._url('products.product', product_id=0)[:-1]
+        stmt = (
+            db.select(Product.id, Product.name, Product.description, Product.price,
+                      Product.stock, Product.image, Category.name)
+            .join(Category, Product.category_id == Category.id)
+            .order_by(Product.id)
+        )
+        for product_id, name, description, price, stock, image, category in db.session.execute(
+                stmt.execution_options(yield_per=self.batch_size)):
+            image_link = self._url('image', size='large', name=image) if image else ''
+            yield (product_id, name, description or '', f'{product_url}{product_id}', image_link,
+                   f'{price:.2f} EUR', 'in stock' if stock > 0 else 'out of stock', category)
+
+    def _write_feed_csv(self, path: str) -> None:
+        """Schrijf de product feed als CSV."""
+        out = self._open(path)
+        writer = csv.writer(out)
+        writer.writerow(FEED_COLUMNS)
+        writer.writerows(self._feed_rows())
+        self._close(out)
+
+    def _write_feed_xml(self, path: str) -> None:
+        """Schrijf de product feed als RSS 2.0 met Google Merchant (g:) velden."""
+        out = self._open(path)
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+                  f'<title>Webshop</title>\n<link>{escape(self._url("products.index"))}</link>\n'
+                  '<description>Alle producten</description>\n')
+        for row in self._feed_rows():
+            fields = ''.join(f'<g:{column}>{escape(str(value))}</g:{column}>'
+                             for column, value in zip(FEED_COLUMNS, row) if value != '')
+            out.write(f'<item>{fields}</item>\n')
+        self._close(out, '</channel>\n</rss>\n')
+
+    @staticmethod
+    def _open(path: str):
+        """Open een tijdelijk bestand naast `path` (zie _close)."""
+        out = open(f'{path}.{os.getpid()}.tmp', 'w', encoding='utf-8', newline='')
+        out.final_path = path
+        return out
+
+    @staticmethod
+    def _close(out, footer: str = '') -> None:
+        """Schrijf de footer en zet het bestand atomisch op zijn plek."""
+        out.write(footer)
+        out.close()
+        os.replace(out.name, out.final_path)
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        """Maak een .gz versie naast het bestand (sitemaps comprimeren goed)."""
+        if not os.path.exists(path) or os.path.exists(path + '.gz'):
+            return
+        tmp = f'{path}.gz.{os.getpid()}.tmp'
+        with open(path, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, path + '.gz')
+
+    def _remove_old(self) -> None:
+        """Verwijder bestanden van oudere catalogus versies.
+
+        De vorige versie blijft staan: een andere worker kan hem nog aan het
+        versturen zijn.
+        """
+        current = catalog_version.version
+        for filename in os.listdir(self._dir()):
+            match = _VERSION.search(filename)
+            if match and int(match.group(1)) < current - 1:
+                try:
+                    os.remove(self._path(filename))
+                except FileNotFoundError:
+                    pass
+
+
+feeds = FeedGenerator()
@@ -0,0 +1,235 @@
+"""
+Productafbeeldingen, content-addressed opgeslagen (Week 7b).
+
+Een geüploade afbeelding krijgt als naam de SHA-256 van zijn inhoud:
+
+    media/original/3f/3fa2...c9.jpg
+    media/card/3f/3fa2...c9.jpg       (400 px, gemaakt door een job)
+    media/thumb/3f/3fa2...c9.jpg      (200 px)
+
+Dezelfde afbeelding twee keer uploaden geeft hetzelfde bestand, en de
+inhoud achter een URL verandert nooit. Daarom mogen browsers en proxies
+de afbeeldingen een jaar cachen (`immutable`): een nieuwe afbeelding
+heeft een nieuwe URL. Product.image bewaart alleen de naam
+(`<sha256>.<ext>`), dus catalogus queries worden er niet zwaarder van.
+
+De verkleinde varianten maakt de `make_image_variants` job (zie
+tasks.py) met Pillow, dus de upload wacht er niet op. Pillow wordt pas in
+die job geïmporteerd, niet bij create_app(). Zonder Pillow, of
+zolang de job nog niet gedraaid heeft, verwijst een variant URL tijdelijk
+(302, niet gecachet) naar het origineel.
+
+De afbeeldingen gaan via send_file() naar de client: Range requests
+(206) en If-None-Match werken vanzelf, en onder een WSGI server met
+wsgi.file_wrapper (gunicorn) gaat het bestand met sendfile() over de
+socket. Met USE_X_SENDFILE = True laat Flask het versturen aan de
+webserver over.
+"""
+import hashlib
+import io
+import os
+import re
+import uuid
+
+from flask import abort, redirect, send_file, url_for
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ORIGINAL = 'original'
+
+# Herkennen aan de eerste bytes, niet aan de bestandsnaam of het Content-Type van de browser
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+MIMETYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+PIL_FORMATS = {'jpg': 'JPEG', 'png': 'PNG', 'gif': 'GIF', 'webp': 'WEBP'}
+_NAME = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif|webp)$')
+
+
+class InvalidImage(ValueError):
+    """Het bestand is geen (ondersteunde) afbeelding of is te groot."""
+
+
+def sniff(data: bytes) -> str | None:
+    """Bepaal het type van een afbeelding aan de hand van de eerste bytes.
+
+    Args:
+        data: (Begin van de) inhoud van het bestand
+
+    Returns:
+        Extensie ('jpg', 'png', 'gif', 'webp') of None
+    """
+    for signature, ext in SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class ImageStore:
+    """Flask extensie voor het opslaan en serveren van productafbeeldingen."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) ImageStore aan."""
+        self.directory = None
+        self.max_bytes = 5 * 1024 * 1024
+        self.sizes = {'thumb': 200, 'card': 400, 'large': 800}
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie en registreer de route.
+
+        Config keys:
+            IMAGE_DIR: Map voor de afbeeldingen (default media/ naast webshop.db)
+            IMAGE_MAX_BYTES: Maximale grootte van een upload (default 5 MB; houd
+                MAX_CONTENT_LENGTH groter, die geldt voor het hele request)
+            IMAGE_SIZES: Varianten als {naam: maximale breedte/hoogte in pixels}
+            IMAGE_URL_PATH: URL prefix van de afbeeldingen (default /media)
+
+        Args:
+            app: Flask app instance
+        """
+        self.directory = app.config.setdefault(
+            'IMAGE_DIR', os.path.join(os.path.dirname(app.root_path), 'media')
+        )
+        self.max_bytes = app.config.setdefault('IMAGE_MAX_BYTES', 5 * 1024 * 1024)
+        self.sizes = dict(app.config.setdefault('IMAGE_SIZES', {'thumb': 200, 'card': 400, 'large': 800}))
+        path = app.config.setdefault('IMAGE_URL_PATH', '/media')
+        app.add_url_rule(f'{path}/<size>/<name>', 'image', self.serve)
+        app.add_template_global(self.image_url)
+        app.extensions['image_store'] = self
+
+    def save(self, stream) -> str:
+        """Sla een geüploade afbeelding op onder de hash van de inhoud.
+
+        Args:
+            stream: File-achtig object (bijvoorbeeld een FileStorage)
+
+        Returns:
+            Naam van de afbeelding (`<sha256>.<ext>`) voor Product.image
+
+        Raises:
+            InvalidImage: Als het bestand te groot of geen JPEG/PNG/GIF/WebP is
+        """
+        data = stream.read(self.max_bytes + 1)
+        if len(data) > self.max_bytes:
+            raise InvalidImage(f"De afbeelding is groter dan {self.max_bytes // (1024 * 1024)} MB")
+        ext = sniff(data)
+        if ext is None:
+            raise InvalidImage("Alleen JPEG, PNG, GIF en WebP afbeeldingen zijn toegestaan")
+        name = f'{hashlib.sha256(data).hexdigest()}.{ext}'
+        path = self.path(ORIGINAL, name)
+        # Bestaat het bestand al, dan is het dezelfde inhoud: niets te doen
+        if not os.path.exists(path):
+            self._write(path, data)
+        return name
+
+    def make_variants(self, name: str) -> list[str]:
+        """Maak de verkleinde varianten van een afbeelding (idempotent).
+
+        Args:
+            name: Naam van de afbeelding
+
+        Returns:
+            Namen van de varianten die (nu of eerder) gemaakt zijn; leeg zonder Pillow
+        """
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:  # Pillow is optioneel, zonder Pillow is er alleen het origineel
+            return []
+        original = self.path(ORIGINAL, name)
+        ext = name.rsplit('.', 1)[1]
+        done = []
+        with Image.open(original) as image:
+            # Foto's van telefoons staan vaak gedraaid, met de stand in de EXIF data
+            image = ImageOps.exif_transpose(image)
+            if ext == 'jpg' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            # Groot naar klein, dan kan elke variant van de vorige gemaakt worden
+            for size, pixels in sorted(self.sizes.items(), key=lambda item: -item[1]):
+                path = self.path(size, name)
+                if not os.path.exists(path):
+                    image = image.copy()
+                    image.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+                    self._write(path, self._encode(image, ext))
+                done.append(size)
+        return done
+
+    def path(self, size: str, name: str) -> str:
+        """Pad van een afbeelding: <IMAGE_DIR>/<size>/<eerste 2 tekens>/<name>."""
+        return os.path.join(self.directory, size, name[:2], name)
+
+    def image_url(self, name: str | None, size: str = ORIGINAL) -> str | None:
+        """URL van een afbeelding (template helper).
+
+        Voorbeeld:
+            <img src="{{ image_url(product.image, 'card') }}">
+
+        Args:
+            name: Product.image (of None)
+            size: Naam van de variant of 'original'
+
+        Returns:
+            URL, of None als er geen afbeelding is
+        """
+        if not name:
+            return None
+        return url_for('image', size=size, name=name)
+
+    def serve(self, size: str, name: str):
+        """View voor /media/<size>/<name>.
+
+        Args:
+            size: Naam van de variant of 'original'
+            name: Naam van de afbeelding
+
+        Returns:
+            Het bestand (200/206/304), of een redirect naar het origineel als
+            de variant er (nog) niet is
+
+        Raises:
+            404: Bij een ongeldige naam, onbekende variant of onbekende afbeelding
+        """
+        if not _NAME.match(name) or (size != ORIGINAL and size not in self.sizes):
+            abort(404)
+        path = self.path(size, name)
+        if not os.path.exists(path):
+            if size == ORIGINAL or not os.path.exists(self.path(ORIGINAL, name)):
+                abort(404)
+            # Variant nog niet gemaakt: tijdelijk het origineel, zonder cache
+            response = redirect(url_for('image', size=ORIGINAL, name=name))
+            response.cache_control.no_store = True
+            return response
+        # De inhoud hoort bij de naam: de naam is een sterke ETag
+        response = send_file(
+            path,
+            mimetype=MIMETYPES[name.rsplit('.', 1)[1]],
+            conditional=True,
+            etag=f'{size}-{name}',
+            max_age=IMMUTABLE_MAX_AGE,
+        )
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    @staticmethod
+    def _encode(image, ext: str) -> bytes:
+        """Codeer een Pillow image in het formaat van het origineel."""
+        buffer = io.BytesIO()
+        options = {'quality': 85, 'optimize': True} if ext in ('jpg', 'webp') else {'optimize': True}
+        image.save(buffer, PIL_FORMATS[ext], **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """Schrijf een bestand atomisch (een lezer ziet nooit een half bestand)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{uuid.uuid4().hex[:8]}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+image_store = ImageStore()
@@ -0,0 +1,387 @@
+"""
+Achtergrond jobs in een SQLite wachtrij (Week 7b).
+
+Mail versturen of een rapport maken hoort niet in de request: de
+bezoeker wacht dan op een SMTP server of op een grote query. Een view
+zet daarom alleen een job in de wachtrij en antwoordt direct:
+
+    @jobs.task('send_contact_mail')
+    def send_contact_mail(name, email, subject, message):
+        ...
+
+    jobs.enqueue('send_contact_mail', name=..., email=..., ...)
+
+De wachtrij staat in een SQLite tabel, dus een job gaat niet verloren
+als het proces stopt. Per proces halen een paar worker threads jobs op:
+- Een job die een exception geeft wordt opnieuw geprobeerd na een
+  oplopende wachttijd (exponential backoff met wat jitter)
+- Na JOBS_MAX_ATTEMPTS pogingen gaat de job naar de dead_jobs tabel
+- Stopt een proces midden in een job, dan pakt een ander proces de job
+  weer op zodra de lease verlopen is
+
+Met meerdere workers (serve.py) draait in elk proces een eigen pool. Die
+start bij het eerste request van het proces (na de fork), niet pas bij
+de eerste enqueue(): jobs van een ander proces of van voor een herstart
+blijven anders liggen. Het ophalen gebeurt in één UPDATE, zodat een job
+maar door één thread wordt uitgevoerd.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import traceback
+
+
+class UnknownTask(Exception):
+    """Er is geen handler geregistreerd voor deze job naam."""
+
+
+class SQLiteJobStore:
+    """Opslag van de wachtrij in een SQLite bestand (één connectie per thread)."""
+
+    def __init__(self, path: str):
+        """Maak de store aan en zorg dat de tabellen bestaan.
+
+        Args:
+            path: Pad naar het SQLite bestand
+        """
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_at REAL NOT NULL,
+                locked_until REAL,
+                last_error TEXT,
+                created REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_run_at ON jobs (run_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_jobs (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                error TEXT,
+                created REAL NOT NULL,
+                failed REAL NOT NULL
+            )
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Geef de connectie van deze thread (en dit proces)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add(self, name: str, payload: str, run_at: float) -> int:
+        """Zet een job in de wachtrij.
+
+        Returns:
+            ID van de job
+        """
+        return self._connect().execute(
+            "INSERT INTO jobs (name, payload, run_at, created) VALUES (?, ?, ?, ?)",
+            (name, payload, run_at, time.time())
+        ).lastrowid
+
+    def claim(self, lease: float) -> tuple | None:
+        """Pak de oudste job die klaar staat (of waarvan de lease verlopen is).
+
+        Eén UPDATE ... RETURNING: SQLite laat maar één schrijver tegelijk
+        toe, dus twee threads of processen kunnen niet dezelfde job pakken.
+
+        Args:
+            lease: Seconden dat de job van deze worker is
+
+        Returns:
+            Tuple (id, name, payload, attempts) of None
+        """
+        now = time.time()
+        return self._connect().execute("""
+            UPDATE jobs SET locked_until = ?, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE run_at <= ? AND (locked_until IS NULL OR locked_until < ?)
+                ORDER BY run_at LIMIT 1
+            )
+            RETURNING id, name, payload, attempts
+        """, (now + lease, now, now)).fetchone()
+
+    def done(self, job_id: int) -> None:
+        """Verwijder een geslaagde job."""
+        self._connect().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: int, run_at: float, error: str) -> None:
+        """Zet een mislukte job opnieuw klaar voor later."""
+        self._connect().execute(
+            "UPDATE jobs SET run_at = ?, locked_until = NULL, last_error = ? WHERE id = ?",
+            (run_at, error, job_id)
+        )
+
+    def bury(self, job_id: int, error: str) -> None:
+        """Verplaats een job definitief naar de dead_jobs tabel."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO dead_jobs (id, name, payload, attempts, error, created, failed)
+                SELECT id, name, payload, attempts, ?, created, ? FROM jobs WHERE id = ?
+            """, (error, time.time(), job_id))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def revive(self, job_id: int) -> bool:
+        """Zet een dead job terug in de wachtrij (met nul pogingen).
+
+        Returns:
+            True als de job bestond
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            moved = conn.execute("""
+                INSERT INTO jobs (id, name, payload, run_at, created)
+                SELECT id, name, payload, ?, created FROM dead_jobs WHERE id = ?
+            """, (time.time(), job_id)).rowcount
+            conn.execute("DELETE FROM dead_jobs WHERE id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(moved)
+
+    def dead(self, limit: int = 50) -> list[tuple]:
+        """De laatst mislukte jobs.
+
+        Returns:
+            Lijst van (id, name, payload, attempts, error, failed)
+        """
+        return self._connect().execute(
+            "SELECT id, name, payload, attempts, error, failed FROM dead_jobs ORDER BY failed DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+    def counts(self) -> dict:
+        """Aantal wachtende, lopende en mislukte jobs."""
+        now = time.time()
+        conn = self._connect()
+        running = conn.execute("SELECT COUNT(*) FROM jobs WHERE locked_until >= ?", (now,)).fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        dead = conn.execute("SELECT COUNT(*) FROM dead_jobs").fetchone()[0]
+        return {'queued': total - running, 'running': running, 'dead': dead}
+
+
+class JobQueue:
+    """Flask extensie met een duurzame wachtrij en een pool worker threads."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) JobQueue aan."""
+        self.store = None
+        self.app = None
+        self.eager = False
+        self.workers = 2
+        self.max_attempts = 5
+        self.backoff = 2.0
+        self.lease = 300.0
+        self.poll_interval = 1.0
+        self.processed = 0
+        self.failed = 0
+        self._tasks = {}
+        self._threads = []
+        self._workers_pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            JOBS_DB_PATH: Pad naar het wachtrij bestand
+            JOBS_EAGER: Jobs direct in de request uitvoeren (voor tests)
+            JOBS_WORKERS: Aantal worker threads per proces (default 2)
+            JOBS_MAX_ATTEMPTS: Pogingen voor een job naar dead_jobs gaat (default 5)
+            JOBS_BACKOFF: Wachttijd na de eerste fout in seconden, daarna
+                steeds twee keer zo lang (default 2)
+            JOBS_LEASE: Seconden voor een onderbroken job opnieuw mag (default 300)
+            JOBS_POLL_INTERVAL: Seconden tussen het kijken naar nieuwe jobs
+                van andere processen (default 1)
+
+        Args:
+            app: Flask app instance
+        """
+        self.app = app
+        self.eager = app.config.setdefault('JOBS_EAGER', False)
+        self.workers = app.config.setdefault('JOBS_WORKERS', 2)
+        self.max_attempts = app.config.setdefault('JOBS_MAX_ATTEMPTS', 5)
+        self.backoff = app.config.setdefault('JOBS_BACKOFF', 2.0)
+        self.lease = app.config.setdefault('JOBS_LEASE', 300.0)
+        self.poll_interval = app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+        path = app.config.setdefault(
+            'JOBS_DB_PATH', os.path.join(os.path.dirname(app.root_path), 'jobs.db')
+        )
+        self.store = None if self.eager else SQLiteJobStore(path)
+        if not self.eager:
+            app.before_request(self._ensure_workers)
+        app.extensions['jobs'] = self
+
+    def task(self, name: str | None = None):
+        """Decorator die een functie als job handler registreert.
+
+        Args:
+            name: Naam van de job (default de functienaam)
+
+        Returns:
+            Decorator voor de handler
+        """
+        def decorator(f):
+            self._tasks[name or f.__name__] = f
+            return f
+        return decorator
+
+    def enqueue(self, name: str, /, **payload) -> int | None:
+        """Zet een job in de wachtrij en keer direct terug.
+
+        Args:
+            name: Naam van een geregistreerde task (positional-only, zodat
+                de payload zelf ook een 'name' mag hebben)
+            **payload: Argumenten voor de handler (moeten naar JSON kunnen)
+
+        Returns:
+            ID van de job (None met JOBS_EAGER)
+
+        Raises:
+            UnknownTask: Als er geen handler is met deze naam
+        """
+        if name not in self._tasks:
+            raise UnknownTask(name)
+        if self.eager:
+            self._tasks[name](**payload)
+            return None
+        job_id = self.store.add(name, json.dumps(payload), time.time())
+        self._ensure_workers()
+        self._wakeup.set()
+        return job_id
+
+    def run_pending(self, limit: int | None = None) -> int:
+        """Voer klaarstaande jobs uit in de huidige thread (handig in scripts).
+
+        Args:
+            limit: Maximaal aantal jobs (None = tot de wachtrij leeg is)
+
+        Returns:
+            Aantal uitgevoerde jobs
+        """
+        count = 0
+        while limit is None or count < limit:
+            if not self._run_one():
+                break
+            count += 1
+        return count
+
+    def retry_dead(self, job_id: int) -> bool:
+        """Zet een job uit dead_jobs terug in de wachtrij.
+
+        Returns:
+            True als de job gevonden is
+        """
+        revived = self.store.revive(job_id)
+        if revived:
+            self._ensure_workers()
+            self._wakeup.set()
+        return revived
+
+    def stats(self) -> dict:
+        """Aantallen in de wachtrij plus de tellers van dit proces."""
+        counts = self.store.counts() if self.store is not None else {}
+        return {**counts, 'processed': self.processed, 'failed': self.failed}
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop de worker threads van dit proces (lopende jobs worden afgemaakt)."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._workers_pid = None
+        self._stop.clear()
+
+    def _ensure_workers(self) -> None:
+        """Start de worker threads (opnieuw na een fork)."""
+        # Snel pad voor elk request: de pool van dit proces draait al
+        if self._workers_pid == os.getpid():
+            return
+        with self._lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers_pid = os.getpid()
+            self._threads = []
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f'job-worker-{n}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self) -> None:
+        """Voer jobs uit tot shutdown(); wacht op enqueue() of de poll interval."""
+        while not self._stop.is_set():
+            try:
+                if self._run_one():
+                    continue
+            except sqlite3.Error:
+                # Database even bezet of weg: later opnieuw proberen
+                pass
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _run_one(self) -> bool:
+        """Pak één job en voer die uit.
+
+        Returns:
+            False als er geen job klaarstond
+        """
+        job = self.store.claim(self.lease)
+        if job is None:
+            return False
+        job_id, name, payload, attempts = job
+        try:
+            handler = self._tasks.get(name)
+            if handler is None:
+                raise UnknownTask(name)
+            with self.app.app_context():
+                handler(**json.loads(payload))
+        except Exception as exc:
+            self.failed += 1
+            error = ''.join(traceback.format_exception_only(exc)).strip()
+            if attempts >= self.max_attempts or isinstance(exc, UnknownTask):
+                self.app.logger.error("Job %s #%d naar dead_jobs na %d pogingen: %s",
+                                      name, job_id, attempts, error)
+                self.store.bury(job_id, traceback.format_exc())
+            else:
+                delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+                self.app.logger.warning("Job %s #%d mislukt (poging %d), opnieuw over %.1fs: %s",
+                                        name, job_id, attempts, delay, error)
+                self.store.retry(job_id, time.time() + delay, error)
+        else:
+            self.processed += 1
+            self.store.done(job_id)
+        return True
+
+
+jobs = JobQueue()
+
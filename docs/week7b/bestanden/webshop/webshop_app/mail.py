@@ -0,0 +1,87 @@
+"""
+Lokale mail sink (Week 7b).
+
+De webshop heeft (nog) geen SMTP server. In plaats daarvan schrijft de
+MailSink elke mail als .eml bestand in een map, zodat je ze kunt openen
+in een mailprogramma of met `cat` bekijken. Met MAIL_SINK_DIR = None
+blijven de mails alleen in het geheugen (mail_sink.outbox), handig in tests.
+
+Mail versturen gebeurt vanuit achtergrond jobs (zie tasks.py), nooit
+direct in een request.
+"""
+import os
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+
+
+class MailSink:
+    """Flask extensie die mails naar bestanden schrijft in plaats van te versturen."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) MailSink aan."""
+        self.directory = None
+        self.sender = 'webshop@localhost'
+        self.outbox: list[EmailMessage] = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            MAIL_SINK_DIR: Map voor de .eml bestanden (None = alleen in het geheugen)
+            MAIL_SENDER: Afzender van alle mails
+            MAIL_ADMIN: Ontvanger van contactberichten en rapporten
+
+        Args:
+            app: Flask app instance
+        """
+        self.directory = app.config.setdefault(
+            'MAIL_SINK_DIR', os.path.join(os.path.dirname(app.root_path), 'outbox')
+        )
+        self.sender = app.config.setdefault('MAIL_SENDER', 'webshop@localhost')
+        app.config.setdefault('MAIL_ADMIN', 'admin@webshop.nl')
+        app.extensions['mail_sink'] = self
+
+    def send(self, to: str, subject: str, body: str, reply_to: str | None = None,
+             attachments: list[tuple[str, bytes, str]] | None = None) -> EmailMessage:
+        """"Verstuur" een mail door hem weg te schrijven.
+
+        Args:
+            to: Ontvanger
+            subject: Onderwerp
+            body: Tekst van de mail
+            reply_to: Optioneel Reply-To adres
+            attachments: Optionele lijst van (bestandsnaam, inhoud, mimetype)
+
+        Returns:
+            De opgebouwde EmailMessage
+        """
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to
+        message['Subject'] = subject
+        if reply_to:
+            message['Reply-To'] = reply_to
+        message.set_content(body)
+        for filename, content, mimetype in attachments or []:
+            maintype, subtype = mimetype.split('/', 1)
+            message.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+
+        with self._lock:
+            self.outbox.append(message)
+            # Niet onbeperkt laten groeien in een langlopend proces
+            del self.outbox[:-100]
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.eml"
+            path = os.path.join(self.directory, name)
+            # Eerst naar een tijdelijk bestand: een lezer ziet nooit een halve mail
+            with open(path + '.tmp', 'wb') as f:
+                f.write(message.as_bytes())
+            os.replace(path + '.tmp', path)
+        return message
+
+
+mail_sink = MailSink()
@@ -0,0 +1,243 @@
+"""
+Latency metrics per route en een /metrics endpoint (Week 7b).
+
+Voor elke request meten we per endpoint (bijvoorbeeld products.category):
+- de totale duur van de request
+- de tijd in database queries (via SQLAlchemy engine events)
+- de tijd in het renderen van templates (via Flask signals)
+- het aantal antwoorden per status code
+
+De histogrammen staan in het Prometheus text format op /metrics, zodat
+Prometheus (of een simpele curl) ze kan ophalen. Bijvoorbeeld:
+
+    webshop_request_duration_seconds_bucket{endpoint="products.index",le="0.05"} 12
+
+/metrics vraagt METRICS_TOKEN als bearer token
+(`Authorization: Bearer <token>`). Zonder token is /metrics alleen in
+debug of testing bereikbaar, en dan alleen vanaf localhost. Achter een
+reverse proxy komt elk request van localhost, dus daar is remote_addr
+pas te vertrouwen met werkzeug's ProxyFix.
+
+Let op: elke worker houdt zijn eigen metrics bij, in zijn eigen geheugen.
+Onder serve.py delen de workers één poort, dus elke scrape komt bij een
+willekeurige worker terecht. De tellers springen dan heen en weer en
+rate() klopt niet. Meet met één worker, of tel de scrapes niet op als
+totaal voor de hele server.
+"""
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from flask import (Response, abort, current_app, g, has_request_context, request,
+                   before_render_template, template_rendered)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Prometheus histogram met een vaste set buckets, per label waarde."""
+
+    def __init__(self, name: str, help_text: str, buckets):
+        """Maak een leeg histogram aan.
+
+        Args:
+            name: Metric naam, bv. 'webshop_request_duration_seconds'
+            help_text: Beschrijving voor de # HELP regel
+            buckets: Oplopende bovengrenzen in seconden
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # endpoint -> [aantallen per bucket (+Inf als laatste), som]
+        self._series: dict[str, list] = {}
+
+    def observe(self, endpoint: str, value: float) -> None:
+        """Tel een meting (lock moet al vastgehouden worden)."""
+        series = self._series.get(endpoint)
+        if series is None:
+            series = self._series[endpoint] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        """Regels in het Prometheus text format (cumulatieve buckets)."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for endpoint, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{endpoint="{endpoint}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{endpoint="{endpoint}"}} {cumulative}')
+        return lines
+
+
+class Metrics:
+    """Flask extensie die latency en status codes per endpoint bijhoudt."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) Metrics extensie aan."""
+        self.enabled = True
+        self.token = None
+        self._lock = threading.Lock()
+        self._reset(DEFAULT_BUCKETS)
+        # Eén keer voor alle engines en apps: tel query en render tijd bij de request op
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        before_render_template.connect(_before_render)
+        template_rendered.connect(_after_render)
+
+    def init_app(self, app) -> None:
+        """Registreer de request hooks en de /metrics route.
+
+        Config keys:
+            METRICS_ENABLED: Metingen aan/uit (default True)
+            METRICS_BUCKETS: Bovengrenzen van de buckets in seconden
+            METRICS_PATH: URL van de metrics (default /metrics, None = geen route)
+            METRICS_TOKEN: Bearer token voor /metrics (default None = alleen in
+                debug/testing, vanaf localhost)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('METRICS_ENABLED', True)
+        self._reset(app.config.setdefault('METRICS_BUCKETS', DEFAULT_BUCKETS))
+        path = app.config.setdefault('METRICS_PATH', '/metrics')
+        self.token = app.config.setdefault('METRICS_TOKEN', None)
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        if path:
+            app.add_url_rule(path, 'metrics', self.metrics_view)
+        app.extensions['metrics'] = self
+
+    def observe(self, endpoint: str, status: int, total: float, db_time: float, render_time: float) -> None:
+        """Tel één afgehandelde request.
+
+        Args:
+            endpoint: Flask endpoint, bv. 'products.index'
+            status: HTTP status code
+            total: Totale duur in seconden
+            db_time: Tijd in database queries in seconden
+            render_time: Tijd in templates renderen in seconden
+        """
+        with self._lock:
+            self.duration.observe(endpoint, total)
+            self.db.observe(endpoint, db_time)
+            self.render.observe(endpoint, render_time)
+            key = (endpoint, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render_text(self) -> str:
+        """Alle metrics in het Prometheus text format."""
+        with self._lock:
+            lines = []
+            for histogram in (self.duration, self.db, self.render):
+                lines += histogram.render()
+            lines.append('# HELP webshop_responses_total Aantal antwoorden per endpoint en status code')
+            lines.append('# TYPE webshop_responses_total counter')
+            for (endpoint, status), count in sorted(self.responses.items()):
+                lines.append(f'webshop_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        """Route: /metrics (Prometheus text format).
+
+        Raises:
+            403: Zonder geldig token; zonder token alleen in debug/testing
+                vanaf localhost toegestaan
+        """
+        if self.token is not None:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+                abort(403)
+        elif not (current_app.debug or current_app.testing):
+            # Achter een proxy is remote_addr altijd 127.0.0.1: niet op vertrouwen
+            abort(403)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403)
+        return Response(self.render_text(), mimetype='text/plain; version=0.0.4')
+
+    def _reset(self, buckets) -> None:
+        """Begin met lege histogrammen en tellers."""
+        with self._lock:
+            self.duration = Histogram(
+                'webshop_request_duration_seconds', 'Totale duur van requests per endpoint', buckets)
+            self.db = Histogram(
+                'webshop_request_db_seconds', 'Tijd in database queries per request', buckets)
+            self.render = Histogram(
+                'webshop_request_render_seconds', 'Tijd in template rendering per request', buckets)
+            self.responses: dict[tuple[str, int], int] = {}
+
+    def _start_request(self):
+        """Start de klok voor deze request."""
+        if self.enabled:
+            g._metrics = {'start': time.perf_counter(), 'db': 0.0, 'render': 0.0, 'status': 500}
+
+    def _record_status(self, response):
+        """Onthoud de status code (teardown krijgt de response niet mee)."""
+        timing = g.get('_metrics')
+        if timing is not None:
+            timing['status'] = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        """Tel de request na afloop, ook als er een exception was."""
+        timing = g.pop('_metrics', None)
+        if timing is None:
+            return
+        # Alleen bekende routes als label, anders groeit het aantal series onbeperkt
+        endpoint = request.endpoint if request.url_rule is not None else 'unmatched'
+        self.observe(endpoint, timing['status'], time.perf_counter() - timing['start'],
+                     timing['db'], timing['render'])
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Onthoud het starttijdstip van een query."""
+    conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Tel de duur van een query bij de huidige request op."""
+    starts = conn.info.get('_metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        timing = g.get('_metrics')
+        if timing is not None:
+            timing['db'] += elapsed
+
+
+def _handle_error(context):
+    """Gooi het starttijdstip weg van een query die een exception gaf.
+
+    after_cursor_execute komt dan niet; zonder dit zou de volgende query op
+    deze connectie de verkeerde starttijd poppen.
+    """
+    if context.connection is not None:
+        context.connection.info.pop('_metrics_query_start', None)
+
+
+def _before_render(sender, template, context, **extra):
+    """Onthoud het starttijdstip van render_template()."""
+    timing = g.get('_metrics')
+    if timing is not None:
+        timing.setdefault('render_start', []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    """Tel de duur van render_template() bij de huidige request op."""
+    timing = g.get('_metrics')
+    if timing is not None and timing.get('render_start'):
+        timing['render'] += time.perf_counter() - timing['render_start'].pop()
+
+
+metrics = Metrics()
@@ -8,6 +8,9 @@ Week 7b toevoegingen:
 - Password hashing met Werkzeug
 - Admin vs Customer roles
 - UserMixin voor ingebouwde Flask-Login methoden
+- Gecachte user_loader (zie user_cache.py)
+- Password hashing in een process pool (zie passwords.py)
+- Catalogus versie bij elke wijziging van Product/Category (zie catalog.py)
 
 Models:
 - Category: Productcategorieën
@@ -15,16 +18,25 @@ Models:
 - Customer: Klanten met authenticatie
 - Order: Bestellingen (met foreign key naar Customer)
 - OrderItem: Bestelregels (many-to-many tussen Order en Product)
+- ProductPair: Hoe vaak twee producten samen besteld zijn (zie recommendations.py)
+- ProductRecommendation: Top-N "vaak samen gekocht" per product
+- RecommendationRun: Verwerkte bestellingen per run van de recommendations job
+- CartItem: Regels van de winkelwagen (zie carts.py)
 """
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ForeignKey
+from itertools import chain
+from sqlalchemy.orm import Mapped, mapped_column, relationship, Session
+from sqlalchemy import String, ForeignKey, event, inspect
+from webshop_app.user_cache import PrincipalCache, CachedUser
+from webshop_app.passwords import PasswordHasher
+from webshop_app.catalog import catalog_version
 
 db = SQLAlchemy()
 login_manager = LoginManager()
+principal_cache = PrincipalCache()
+password_hasher = PasswordHasher()
 
 
 @login_manager.user_loader
@@ -32,15 +44,30 @@ def load_user(user_id: int) -> 'Customer | None':
     """Laad een gebruiker op basis van het user ID.
 
     Deze functie wordt gebruikt door Flask-Login om de huidige gebruiker
-    te laden uit de sessie.
+    te laden uit de sessie. Staat de gebruiker in de principal_cache, dan
+    is er geen database query nodig.
 
     Args:
         user_id: Het ID van de gebruiker om te laden
 
     Returns:
-        De Customer instantie als gevonden, anders None
+        Een CachedUser of Customer instantie als gevonden, anders None
     """
-    return db.session.get(Customer, int(user_id))
+    user_id = int(user_id)
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return CachedUser(principal, _get_customer)
+
+    generation = principal_cache.generation()
+    customer = _get_customer(user_id)
+    if customer is not None:
+        principal_cache.put(customer, generation)
+    return customer
+
+
+def _get_customer(user_id: int) -> 'Customer | None':
+    """Haal een Customer op uit de database."""
+    return db.session.get(Customer, user_id)
 
 
 class Category(db.Model):
@@ -92,6 +119,8 @@ class Product(db.Model):
         stock: Voorraad aantal
         description: Product beschrijving
         category_id: Foreign key naar Category
+        updated_at: Tijdstip van de laatste wijziging
+        image: Naam van de afbeelding (`<sha256>.<ext>`, zie images.py) of None
 
     Relationships:
         category: Many-to-One naar Category
@@ -104,6 +133,11 @@ class Product(db.Model):
     price: Mapped[float]
     stock: Mapped[int] = mapped_column(default=0)
     description: Mapped[str | None]
+    image: Mapped[str | None] = mapped_column(String(80))
+    updated_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
 
     # Foreign Key
     category_id: Mapped[int] = mapped_column(ForeignKey('categories.id'))
@@ -192,9 +226,17 @@ class Customer(db.Model, UserMixin):
         """
         self.name = name
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        self.set_password(password)
         self.is_admin = is_admin
 
+    def set_password(self, password: str) -> None:
+        """Hash en bewaar een (nieuw) wachtwoord.
+
+        Args:
+            password: Wachtwoord in plain text
+        """
+        self.password_hash = password_hasher.hash(password)
+
     def check_password(self, password: str) -> bool:
         """Controleer of het opgegeven wachtwoord correct is.
 
@@ -204,7 +246,7 @@ class Customer(db.Model, UserMixin):
         Returns:
             True als het wachtwoord overeenkomt, anders False
         """
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
     def __repr__(self) -> str:
         """String representatie voor debugging."""
@@ -221,6 +263,57 @@ class Customer(db.Model, UserMixin):
         return len(self.orders)
 
 
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context) -> None:
+    """Onthoud welke klanten in deze transactie wijzigen of verdwijnen."""
+    for obj in chain(session.dirty, session.deleted):
+        if isinstance(obj, Customer) and (obj in session.deleted or session.is_modified(obj)):
+            session.info.setdefault('user_changes', set()).add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_principals(session) -> None:
+    """Haal gewijzigde klanten na de commit uit de principal_cache (alle processen).
+
+    Pas na de commit: daarvoor kan een ander request de oude rij nog laden
+    en opnieuw cachen, bijvoorbeeld na een wachtwoord- of rolwijziging.
+    """
+    user_ids = session.info.pop('user_changes', None)
+    if user_ids:
+        principal_cache.invalidate_everywhere(user_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_catalog_changes(session, flush_context) -> None:
+    """Onthoud welke producten en categorieën in deze transactie wijzigen."""
+    product_ids, category_ids = session.info.setdefault('catalog_changes', (set(), set()))
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Product):
+            product_ids.add(obj.id)
+            category_ids.add(obj.category_id)
+            # Product verplaatst? Dan verandert de oude categorie ook
+            category_ids.update(inspect(obj).attrs.category_id.history.deleted)
+        elif isinstance(obj, Category):
+            category_ids.add(obj.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_catalog_version(session) -> None:
+    """Verhoog de catalogus versie na een commit met catalogus wijzigingen."""
+    changes = session.info.pop('catalog_changes', None)
+    if changes and (changes[0] or changes[1]):
+        catalog_version.bump(*changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_changes(session) -> None:
+    """Vergeet verzamelde wijzigingen na een rollback."""
+    session.info.pop('catalog_changes', None)
+    session.info.pop('user_changes', None)
+
+
 class Order(db.Model):
     """Model voor bestellingen.
 
@@ -333,3 +426,106 @@ class OrderItem(db.Model):
             Quantity * price
         """
         return self.quantity * self.price
+
+
+class ProductPair(db.Model):
+    """Co-occurrence: in hoeveel bestellingen twee producten samen zitten.
+
+    De tabel is symmetrisch (a, b) en (b, a), zodat alle partners van een
+    product met één index range scan op product_id te vinden zijn. De
+    diagonaal (product_id == other_id) is het aantal bestellingen met het
+    product zelf.
+
+    Attributes:
+        product_id: ID van het product
+        other_id: ID van het andere product
+        orders: Aantal bestellingen met beide producten
+    """
+    __tablename__ = 'product_pairs'
+
+    product_id: Mapped[int] = mapped_column(primary_key=True)
+    other_id: Mapped[int] = mapped_column(primary_key=True)
+    orders: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        """String representatie voor debugging."""
+        return f'<ProductPair {self.product_id}-{self.other_id} x{self.orders}>'
+
+
+class ProductRecommendation(db.Model):
+    """Model voor "vaak samen gekocht" aanbevelingen.
+
+    De primary key (product_id, rank) is meteen de index voor de product
+    pagina: één range scan geeft de aanbevelingen in volgorde.
+
+    Attributes:
+        product_id: Foreign key naar Product (het bekeken product)
+        rank: Positie in de lijst (0 = beste)
+        related_id: Foreign key naar Product (de aanbeveling)
+        score: Cosine of lift score
+    """
+    __tablename__ = 'product_recommendations'
+
+    product_id: Mapped[int] = mapped_column(ForeignKey('products.id'), primary_key=True)
+    rank: Mapped[int] = mapped_column(primary_key=True)
+    related_id: Mapped[int] = mapped_column(ForeignKey('products.id'))
+    score: Mapped[float]
+
+    def __repr__(self) -> str:
+        """String representatie voor debugging."""
+        return f'<ProductRecommendation {self.product_id} #{self.rank}: {self.related_id}>'
+
+
+class CartItem(db.Model):
+    """Model voor een regel in een winkelwagen: alleen (product, aantal).
+
+    Naam en prijs komen bij het tonen uit products (één join), zodat een
+    winkelwagen altijd de actuele prijs laat zien. De tabel is een SQLite
+    WITHOUT ROWID tabel: de rijen staan direct in de primary key index,
+    zonder extra rowid en zonder tweede b-tree.
+
+    Attributes:
+        cart_key: 'u:<customer_id>' voor klanten, 's:<token>' voor anonieme bezoekers
+        product_id: ID van het product
+        quantity: Aantal
+    """
+    __tablename__ = 'cart_items'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    cart_key: Mapped[str] = mapped_column(String(32), primary_key=True)
+    product_id: Mapped[int] = mapped_column(primary_key=True)
+    quantity: Mapped[int]
+
+    def __repr__(self) -> str:
+        """String representatie voor debugging."""
+        return f'<CartItem {self.cart_key}: {self.quantity}x Product #{self.product_id}>'
+
+
+class RecommendationRun(db.Model):
+    """Model voor een run van de recommendations job.
+
+    De hoogste last_order_id is het watermerk: de volgende run telt alleen
+    bestellingen met een hoger ID.
+
+    Attributes:
+        id: Primary key
+        last_order_id: Hoogste verwerkte order ID
+        orders: Aantal verwerkte bestellingen
+        pairs: Aantal bijgewerkte productparen
+        products: Aantal producten met nieuwe aanbevelingen
+        seconds: Duur van de run
+        created_at: Tijdstip van de run
+    """
+    __tablename__ = 'recommendation_runs'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    last_order_id: Mapped[int] = mapped_column(index=True)
+    orders: Mapped[int] = mapped_column(default=0)
+    pairs: Mapped[int] = mapped_column(default=0)
+    products: Mapped[int] = mapped_column(default=0)
+    seconds: Mapped[float] = mapped_column(default=0.0)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self) -> str:
+        """String representatie voor debugging."""
+        return f'<RecommendationRun {self.id} tot order {self.last_order_id}>'
@@ -0,0 +1,239 @@
+"""
+Cache van gerenderde catalogus pagina's voor anonieme bezoekers (Week 7b).
+
+Anonieme bezoekers van products.index en products.category krijgen
+allemaal exact dezelfde HTML. Toch doet elke request opnieuw de queries
+en de Jinja render. De decorator @cached_page bewaart de gerenderde
+pagina per URL in een LRU-cache die begrensd is op bytes.
+
+Wat niet in de cache komt (bypass):
+- Ingelogde gebruikers (navigatiebalk bevat hun naam)
+- Requests met flash messages in de sessie
+- Alles behalve GET, en antwoorden anders dan 200
+
+Elke pagina krijgt tags (bijvoorbeeld 'category:3'). Wijzigt een admin
+een product of categorie, dan worden precies de pagina's met de
+betreffende tags verwijderd. Een wijziging in een ander worker proces
+zien we alleen aan de catalogus versie; dan wordt de hele cache geleegd.
+Dat geldt ook als de versie vóór onze eigen wijziging al niet meer de
+versie was die deze cache kende.
+
+Een pagina die gerenderd werd terwijl de catalogus veranderde, komt niet
+in de cache: put() krijgt de versie van vóór de render mee.
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request, session
+from flask_login import current_user
+
+from webshop_app.catalog import catalog_version
+
+
+class PageCache:
+    """LRU-cache van gerenderde pagina's, begrensd op het aantal bytes."""
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        """Maak een lege cache aan.
+
+        Args:
+            max_bytes: Maximale totale grootte van de bewaarde pagina's
+        """
+        self.enabled = True
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[bytes, str, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'misses': 0, 'bypass': 0, 'evictions': 0, 'invalidations': 0}
+        catalog_version.subscribe(self.invalidate_changes)
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            PAGE_CACHE_ENABLED: Cache aan/uit (default True)
+            PAGE_CACHE_MAX_BYTES: Maximale grootte in bytes (default 16 MB)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        self.max_bytes = app.config.setdefault('PAGE_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+        app.extensions['page_cache'] = self
+        self.clear()
+
+    def get(self, key: str) -> tuple[bytes, str] | None:
+        """Zoek een pagina op.
+
+        Args:
+            key: URL (path + query string)
+
+        Returns:
+            Tuple (body, mimetype) of None
+        """
+        version = catalog_version.version
+        with self._lock:
+            if version != self._version:
+                # Gewijzigd in een ander proces: we weten niet wat, dus alles weg
+                self._clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, body: bytes, mimetype: str, tags: tuple[str, ...],
+            version: int | None = None) -> None:
+        """Bewaar een pagina.
+
+        Args:
+            key: URL (path + query string)
+            body: Gerenderde HTML
+            mimetype: Content type van het antwoord
+            tags: Tags voor invalidatie, bv. ('index',) of ('category:3',)
+            version: Catalogus versie van vóór de render; is die intussen
+                veranderd, dan is de pagina misschien al verouderd en
+                wordt hij niet bewaard
+        """
+        if len(body) > self.max_bytes:
+            return
+        if version is not None and version != catalog_version.version:
+            return
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._remove(key)
+            self._entries[key] = (body, mimetype, tags)
+            self._bytes += len(body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counts['evictions'] += 1
+
+    def invalidate_tags(self, tags) -> None:
+        """Verwijder alle pagina's met een van de tags.
+
+        Args:
+            tags: Iterable met tags
+        """
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._counts['invalidations'] += 1
+
+    def invalidate_changes(self, product_ids: set, category_ids: set, previous: int, version: int) -> None:
+        """Listener voor catalog_version.bump(): verwijder de geraakte pagina's.
+
+        Zag deze cache als laatste een andere versie dan `previous`, dan is
+        er in een ander proces ook iets gewijzigd: dan gaat alles weg.
+        """
+        with self._lock:
+            if previous != self._version:
+                self._clear()
+                self._version = version
+                return
+        tags = [f'product:{p}' for p in product_ids]
+        tags += [f'category:{c}' for c in category_ids]
+        if category_ids:
+            # De index toont het aantal producten per categorie
+            tags.append('index')
+        self.invalidate_tags(tags)
+        with self._lock:
+            self._version = version
+
+    def clear(self) -> None:
+        """Leeg de cache."""
+        with self._lock:
+            self._clear()
+            self._version = catalog_version.version
+
+    def count_bypass(self) -> None:
+        """Tel een request die de cache niet mocht gebruiken."""
+        with self._lock:
+            self._counts['bypass'] += 1
+
+    def stats(self) -> dict:
+        """Geef hit ratio en grootte van de cache.
+
+        Returns:
+            Dict met entries, bytes, hits, misses, bypass, hit_ratio, ...
+        """
+        with self._lock:
+            lookups = self._counts['hits'] + self._counts['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                **self._counts,
+                'hit_ratio': self._counts['hits'] / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        """Verwijder één entry (lock moet al vastgehouden worden)."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[0])
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _clear(self) -> None:
+        """Leeg de cache (lock moet al vastgehouden worden)."""
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+
+page_cache = PageCache()
+
+
+def cached_page(tags):
+    """Decorator die de pagina voor anonieme GET requests cachet.
+
+    Voorbeeld:
+        @products_bp.route("/category/<int:category_id>")
+        @cached_page(lambda category_id: [f'category:{category_id}'])
+        def category(category_id):
+            ...
+
+    Args:
+        tags: Functie die met de view argumenten de tags van de pagina geeft
+
+    Returns:
+        Decorator voor een view functie
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if (not page_cache.enabled or request.method != 'GET'
+                    or current_user.is_authenticated or '_flashes' in session):
+                page_cache.count_bypass()
+                return f(*args, **kwargs)
+
+            key = request.full_path
+            cached = page_cache.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                return make_response(body, 200, {'Content-Type': mimetype})
+
+            # Versie van vóór de render: een wijziging tijdens de render mag niet in de cache
+            version = catalog_version.version
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                page_cache.put(key, response.get_data(), response.content_type, tuple(tags(**kwargs)), version)
+            return response
+        return decorated_function
+    return decorator
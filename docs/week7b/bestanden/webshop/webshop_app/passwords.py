@@ -0,0 +1,161 @@
+"""
+Password hashing in een process pool (Week 7b).
+
+Werkzeug's generate_password_hash() en check_password_hash() zijn met
+opzet traag (scrypt/pbkdf2). Als dat in de request thread gebeurt, kan
+een golf logins of registraties alle workers bezet houden, waardoor ook
+gewone catalogus requests moeten wachten.
+
+Deze module verplaatst het hashen naar een begrensde process pool:
+- Maximaal PASSWORD_HASH_MAX_PENDING taken tegelijk (back-pressure)
+- Is de pool vol, dan volgt na PASSWORD_HASH_TIMEOUT een HasherBusy
+- De hash methode is instelbaar met PASSWORD_HASH_METHOD
+- needs_rehash() geeft aan of een opgeslagen hash een oude methode gebruikt
+
+Met PASSWORD_HASH_WORKERS = 0 wordt er gewoon in de huidige thread
+gehashed (handig voor tests en scripts).
+
+Onder serve.py heeft elke worker een eigen pool. De default verdeelt de
+CPU's daarom over de workers (SERVER_WORKERS, gezet door serve.py): met
+4 workers op 8 CPU's krijgt elke pool 2 processen, niet 8.
+"""
+import os
+import threading
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(Exception):
+    """De hash pool heeft te veel openstaande taken."""
+
+
+class PasswordHasher:
+    """Hasht en controleert wachtwoorden in een begrensde process pool."""
+
+    def __init__(self, method: str = 'scrypt', workers: int = 0,
+                 max_pending: int | None = None, timeout: float = 5.0):
+        """Maak een PasswordHasher aan.
+
+        Args:
+            method: Werkzeug hash methode, bv. 'scrypt' of 'pbkdf2:sha256:600000'
+            workers: Aantal worker processen (0 = hashen in de huidige thread)
+            max_pending: Maximaal aantal gelijktijdige taken (default 4 per worker)
+            timeout: Seconden wachten op een vrije plek voordat HasherBusy volgt
+        """
+        self._pool = None
+        self._lock = threading.Lock()
+        self.configure(method, workers, max_pending, timeout)
+
+    def configure(self, method: str, workers: int,
+                  max_pending: int | None = None, timeout: float = 5.0) -> None:
+        """Stel de hasher (opnieuw) in. Een bestaande pool wordt afgesloten.
+
+        Args:
+            method: Werkzeug hash methode
+            workers: Aantal worker processen
+            max_pending: Maximaal aantal gelijktijdige taken
+            timeout: Wachttijd in seconden bij een volle pool
+        """
+        self.shutdown()
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending or max(1, workers) * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._prefix = None
+        self.rejected = 0
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            PASSWORD_HASH_METHOD: Hash methode (default 'scrypt')
+            PASSWORD_HASH_WORKERS: Aantal processen per pool (default aantal CPU's
+                gedeeld door SERVER_WORKERS, minimaal 1)
+            SERVER_WORKERS: Aantal app processen met elk een eigen pool (default 1,
+                serve.py zet hier --workers in)
+            PASSWORD_HASH_MAX_PENDING: Maximaal aantal openstaande taken
+            PASSWORD_HASH_TIMEOUT: Wachttijd bij een volle pool (default 5)
+
+        Args:
+            app: Flask app instance
+        """
+        server_workers = app.config.setdefault('SERVER_WORKERS', 1)
+        self.configure(
+            app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt'),
+            app.config.setdefault('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // server_workers)),
+            app.config.setdefault('PASSWORD_HASH_MAX_PENDING', None),
+            app.config.setdefault('PASSWORD_HASH_TIMEOUT', 5.0),
+        )
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password: str) -> str:
+        """Hash een wachtwoord met de ingestelde methode.
+
+        Args:
+            password: Wachtwoord in plain text
+
+        Returns:
+            De Werkzeug hash string
+
+        Raises:
+            HasherBusy: Als de pool vol zit
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        """Controleer een wachtwoord tegen een opgeslagen hash.
+
+        Args:
+            pwhash: Opgeslagen Werkzeug hash
+            password: Wachtwoord in plain text
+
+        Returns:
+            True als het wachtwoord klopt
+
+        Raises:
+            HasherBusy: Als de pool vol zit
+        """
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Check of een hash met andere parameters gemaakt is.
+
+        Args:
+            pwhash: Opgeslagen Werkzeug hash
+
+        Returns:
+            True als de hash opnieuw gemaakt moet worden
+        """
+        if self._prefix is None:
+            # Prefix zoals 'scrypt:32768:8:1', zonder salt en hash
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self) -> None:
+        """Sluit de process pool af (als die bestaat)."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _run(self, func, *args):
+        """Voer func uit in de pool, met back-pressure via een semaphore."""
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            self.rejected += 1
+            raise HasherBusy('Te veel openstaande password hash taken')
+        try:
+            return self._get_pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_pool(self):
+        """Maak de pool pas aan bij het eerste gebruik."""
+        with self._lock:
+            if self._pool is None:
+                # Pas hier importeren: multiprocessing is niet nodig met workers = 0
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
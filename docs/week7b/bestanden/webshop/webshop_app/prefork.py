@@ -0,0 +1,247 @@
+"""
+Pre-fork server met meerdere worker processen (Week 7b).
+
+`app.run()` is één proces: één trage request houdt alles op. De
+PreforkServer maakt de app één keer aan in het master proces en forkt
+daarna N workers die allemaal requests op dezelfde socket accepteren
+(hetzelfde model als gunicorn met --preload).
+
+Wat er per worker geregeld wordt:
+- Na de fork gooit de worker de geërfde database connecties weg
+  (engine.dispose), zodat geen twee processen één SQLite connectie delen
+- De database draait in WAL mode met een busy_timeout, zodat lezers niet
+  op schrijvers wachten en gelijktijdige admin writes niet direct falen
+- Na max_requests (plus wat jitter) stopt een worker netjes en start de
+  master een nieuwe (recycling tegen geheugen lekken)
+
+Signalen naar de master:
+- SIGHUP:          graceful reload: de master maakt de app opnieuw aan
+                   (nieuwe config, asset manifest, ...) en vervangt de
+                   workers één voor één. Code wijzigingen vragen een herstart.
+- SIGTERM/SIGINT:  workers maken hun huidige request af en stoppen
+
+Start met `python serve.py --workers 4`.
+"""
+import os
+import random
+import signal
+import socket
+import sqlite3
+import sys
+import time
+
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+# Worden bij elke nieuwe SQLite connectie uitgevoerd
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Engine event: zet WAL mode en busy_timeout op een nieuwe connectie."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def enable_sqlite_wal(app, db) -> None:
+    """Zet WAL mode aan voor de SQLite database van de app.
+
+    Config keys:
+        SQLITE_WAL: WAL mode en busy_timeout aan/uit (default True)
+
+    Args:
+        app: Flask app instance
+        db: Flask-SQLAlchemy instance
+    """
+    if not app.config.setdefault('SQLITE_WAL', True):
+        return
+    if ':memory:' in app.config['SQLALCHEMY_DATABASE_URI']:
+        return
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite' and not event.contains(db.engine, 'connect', _set_sqlite_pragmas):
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
+
+
+def after_fork(app, db) -> None:
+    """Maak een net geforkte worker klaar voor gebruik.
+
+    De connecties in de pool zijn van de master: die mogen we niet
+    gebruiken en ook niet sluiten (de master gebruikt ze misschien nog).
+
+    Args:
+        app: Flask app instance
+        db: Flask-SQLAlchemy instance
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+    random.seed()
+
+
+class PreforkServer:
+    """Master proces dat N worker processen beheert."""
+
+    def __init__(self, app_factory, db, host: str = '127.0.0.1', port: int = 8000, workers: int = 2,
+                 max_requests: int = 0, max_requests_jitter: int = 0, graceful_timeout: float = 30.0):
+        """Maak een PreforkServer aan.
+
+        Args:
+            app_factory: Functie zonder argumenten die de Flask app maakt
+                (bij de start en bij elke reload, altijd vóór de fork)
+            db: Flask-SQLAlchemy instance (voor engine.dispose na de fork)
+            host: Adres om op te luisteren
+            port: Poort om op te luisteren
+            workers: Aantal worker processen
+            max_requests: Worker vervangen na zoveel requests (0 = nooit)
+            max_requests_jitter: Willekeurig extra aantal, zodat niet alle
+                workers tegelijk herstarten
+            graceful_timeout: Seconden die een worker krijgt om te stoppen
+        """
+        self.app_factory = app_factory
+        self.app = None
+        self.db = db
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.socket = None
+        self.children: set[int] = set()
+        self._stopping = False
+        self._reload = False
+
+    def serve(self) -> None:
+        """Start de workers en beheer ze tot SIGTERM of SIGINT."""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.socket.listen(128)
+        self.socket.set_inheritable(True)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        self.app = self.app_factory()
+        self._log(f"luistert op http://{self.host}:{self.port} met {self.workers} workers")
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self._reload_workers()
+            self._reap()
+            time.sleep(0.2)
+            while len(self.children) < self.workers and not self._stopping:
+                # Gerecyclede (of gecrashte) worker vervangen
+                self._spawn()
+
+        self._stop_workers()
+        self.socket.close()
+        self._log("gestopt")
+
+    def _spawn(self) -> int:
+        """Fork een nieuwe worker."""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self._run_worker()
+            finally:
+                os._exit(0)
+        self.children.add(pid)
+        return pid
+
+    def _run_worker(self) -> None:
+        """Hoofdlus van een worker: requests afhandelen tot stop of recycling."""
+        stop = []
+        signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        after_fork(self.app, self.db)
+
+        handled = [0]
+
+        def counting_app(environ, start_response):
+            handled[0] += 1
+            return self.app(environ, start_response)
+
+        server = make_server(self.host, self.port, counting_app, fd=self.socket.fileno())
+        # handle_request() wacht maximaal zo lang, daarna kijken we weer naar stop
+        server.timeout = 0.5
+        limit = self.max_requests + random.randint(0, self.max_requests_jitter) if self.max_requests else 0
+        while not stop and (not limit or handled[0] < limit):
+            server.handle_request()
+        if limit and handled[0] >= limit:
+            self._log(f"worker {os.getpid()} gerecycled na {handled[0]} requests")
+        server.server_close()
+        # os._exit() slaat atexit over: lopende jobs afmaken en de hash pool afsluiten
+        for name in ('jobs', 'password_hasher'):
+            extension = self.app.extensions.get(name)
+            if extension is not None:
+                extension.shutdown()
+
+    def _reap(self) -> None:
+        """Ruim gestopte workers op (zonder te blokkeren)."""
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            self.children.discard(pid)
+
+    def _reload_workers(self) -> None:
+        """Vervang de workers één voor één: eerst de nieuwe, dan de oude stoppen."""
+        self._log("graceful reload")
+        self.app = self.app_factory()
+        for old in list(self.children):
+            self._spawn()
+            os.kill(old, signal.SIGTERM)
+            self._wait_for(old)
+
+    def _stop_workers(self) -> None:
+        """Stuur SIGTERM en wacht; na graceful_timeout volgt SIGKILL."""
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.discard(pid)
+        for pid in list(self.children):
+            self._wait_for(pid)
+
+    def _wait_for(self, pid: int) -> None:
+        """Wacht tot een worker gestopt is (of forceer het na de timeout)."""
+        deadline = time.monotonic() + self.graceful_timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.discard(pid)
+
+    def _handle_stop(self, signum, frame) -> None:
+        """SIGTERM/SIGINT: stop na de huidige ronde van de master lus."""
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame) -> None:
+        """SIGHUP: vervang de workers in de master lus."""
+        self._reload = True
+
+    def _log(self, message: str) -> None:
+        """Log naar stderr met het pid van de master of worker."""
+        print(f"[prefork {os.getpid()}] {message}", file=sys.stderr, flush=True)
@@ -5,13 +5,24 @@ Deze blueprint bevat alle routes voor de publieke product catalog:
 - Homepage met categorieën
 - Categorie pagina met producten
 - Product detail pagina
+- Browse pagina met filters (facets)
+- Sitemap en product feed (gestreamd en op schijf gecachet, zie feeds.py)
 - Contact pagina
 
 Deze views zijn publiek toegankelijk (geen login vereist).
+De catalogus views gebruiken @conditional_get: is de catalogus niet
+veranderd sinds het vorige bezoek, dan volgt direct een 304.
+Voor anonieme bezoekers komen index en category uit de @cached_page cache.
 """
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 from webshop_app.models import db, Category, Product
-from webshop_app.products.forms import ContactForm
+from webshop_app.catalog import conditional_get
+from webshop_app.facets import facet_index
+from webshop_app.feeds import feeds
+from webshop_app.jobs import jobs
+from webshop_app.recommendations import recommender
+from webshop_app.page_cache import cached_page
+from webshop_app.query_budget import query_budget
 
 # Maak blueprint aan
 # template_folder is relatief aan deze file (views.py)
@@ -23,17 +34,30 @@ products_bp = Blueprint(
 
 
 @products_bp.route("/")
+@conditional_get
+@cached_page(lambda: ['index'])
+@query_budget(2)
 def index():
     """Homepage met overzicht van alle categorieën.
 
     Returns:
         Rendered HTML template
     """
-    categories = db.session.execute(db.select(Category)).scalars().all()
+    # Aantal producten in dezelfde query (category.product_count in de template
+    # zou per categorie een extra query doen: N+1)
+    stmt = (
+        db.select(Category.id, Category.name, db.func.count(Product.id).label('product_count'))
+        .outerjoin(Product, Product.category_id == Category.id)
+        .group_by(Category.id)
+    )
+    categories = db.session.execute(stmt).all()
     return render_template("products/index.html", categories=categories)
 
 
 @products_bp.route("/category/<int:category_id>")
+@conditional_get
+@cached_page(lambda category_id: [f'category:{category_id}'])
+@query_budget(3)
 def category(category_id: int):
     """Categorie overzicht met alle producten.
 
@@ -57,8 +81,10 @@ def category(category_id: int):
 
 
 @products_bp.route("/product/<int:product_id>")
+@conditional_get
+@query_budget(3)
 def product(product_id: int):
-    """Product detail pagina.
+    """Product detail pagina, met "vaak samen gekocht" aanbevelingen.
 
     Args:
         product_id: ID van het product
@@ -70,7 +96,101 @@ def product(product_id: int):
         404: Als product niet bestaat
     """
     product_info = db.get_or_404(Product, product_id)
-    return render_template("products/product.html", product=product_info)
+    # Voorberekend door de update_recommendations job: één index lookup
+    related = recommender.related(product_id)
+    return render_template("products/product.html", product=product_info, related=related)
+
+
+@products_bp.route("/browse")
+@conditional_get
+@query_budget(3)  # 1 query, plus 2 bij het (opnieuw) bouwen van de facet index
+def browse():
+    """Alle producten met filters op categorie, prijsklasse en voorraad.
+
+    Filteren en tellen gebeurt in de facet index (bitmaps in het geheugen);
+    alleen de producten van de huidige pagina komen uit de database.
+
+    Query parameters:
+        category: Category ID (meerdere keren mogelijk)
+        price: Prijsklasse, bijvoorbeeld 25-50 (meerdere keren mogelijk)
+        in_stock: 1 = alleen producten op voorraad
+        page: Paginanummer
+
+    Returns:
+        Rendered HTML template
+
+    Raises:
+        404: Als de facet index uit staat
+    """
+    if not facet_index.enabled:
+        abort(404)
+    per_page = 24
+    page = max(request.args.get('page', 1, type=int), 1)
+    categories = [value for value in request.args.getlist('category') if value.isdigit()]
+    bands = {band[0] for band in facet_index.price_bands}
+    result = facet_index.search(
+        categories=categories,
+        prices=[value for value in request.args.getlist('price') if value in bands],
+        in_stock=request.args.get('in_stock') == '1',
+        page=page,
+        per_page=per_page,
+    )
+    by_id = {}
+    if result.product_ids:
+        stmt = db.select(Product).where(Product.id.in_(result.product_ids))
+        by_id = {product.id: product for product in db.session.execute(stmt).scalars()}
+    # Volgorde van de index aanhouden (IN geeft geen volgorde garantie)
+    products = [by_id[product_id] for product_id in result.product_ids if product_id in by_id]
+
+    # Huidige filters zonder page, voor de paginatie links
+    filters = {key: request.args.getlist(key) for key in ('category', 'price', 'in_stock')}
+    return render_template(
+        "products/browse.html",
+        result=result,
+        products=products,
+        filters=filters,
+        page=page,
+        pages=max(-(-result.total // per_page), 1),
+    )
+
+
+@products_bp.route("/sitemap.xml")
+def sitemap():
+    """Sitemap voor zoekmachines (een sitemap index bij meer dan SITEMAP_MAX_URLS URLs).
+
+    Returns:
+        XML bestand
+    """
+    return feeds.send_sitemap()
+
+
+@products_bp.route("/sitemap-<int:shard>.xml")
+def sitemap_shard(shard: int):
+    """Eén deel van een gedeelde sitemap.
+
+    Args:
+        shard: Nummer van het deel (vanaf 1)
+
+    Returns:
+        XML bestand
+
+    Raises:
+        404: Als het deel niet bestaat
+    """
+    return feeds.send_sitemap(shard)
+
+
+@products_bp.route("/feed/products.<any(xml, csv):fmt>")
+def product_feed(fmt: str):
+    """Product feed voor vergelijkingssites.
+
+    Args:
+        fmt: 'xml' (RSS 2.0 met g: velden) of 'csv'
+
+    Returns:
+        XML of CSV bestand
+    """
+    return feeds.send_product_feed(fmt)
 
 
 @products_bp.route("/contact", methods=['GET', 'POST'])
@@ -82,11 +202,27 @@ def contact():
 
     Methods:
         GET: Toon formulier
-        POST: Verwerk formulier (toon bevestiging)
+        POST: Zet de mails in de wachtrij (toon direct een bevestiging)
     """
+    # Forms pas bij het eerste gebruik importeren (Flask-WTF/WTForms vertragen de startup)
+    from webshop_app.products.forms import ContactForm
     form = ContactForm()
 
     if form.validate_on_submit():
+        # Versturen gebeurt in een achtergrond job: de bezoeker wacht niet op de mail
+        jobs.enqueue(
+            'send_contact_mail',
+            name=form.name.data,
+            email=form.email.data,
+            subject=form.subject.data,
+            message=form.message.data,
+        )
+        jobs.enqueue(
+            'send_contact_confirmation',
+            name=form.name.data,
+            email=form.email.data,
+            subject=form.subject.data,
+        )
         flash(
             f'Bedankt voor je bericht, {form.name.data}! '
             f'We nemen zo snel mogelijk contact met je op.',
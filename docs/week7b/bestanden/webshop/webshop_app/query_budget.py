@@ -0,0 +1,189 @@
+"""
+Query budget per request en N+1 detectie (Week 7b).
+
+Een template als `{{ category.product_count }}` in een for-loop doet per
+categorie een extra query (N+1). Dat valt lokaal met vijf categorieën
+niet op, maar wel met duizend. Deze module telt alle SQL statements per
+request en herkent statements die met alleen andere parameters steeds
+opnieuw uitgevoerd worden.
+
+In debug (en in tests) krijgt elke response headers:
+    X-Query-Count: 7
+    X-Query-Warning: N+1: SELECT products.id, ... WHERE ? = products.category_id (x5)
+en volgt een waarschuwing in de log als het budget overschreden wordt of
+als er een N+1 patroon is. Een route kan een eigen budget krijgen:
+
+    @products_bp.route("/")
+    @query_budget(3)
+    def index():
+        ...
+
+In tests gebruik je assert_max_queries() uit webshop_app.testing.
+"""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Lijsten van placeholders (IN (?, ?, ?)) en literals tellen niet als verschil
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+# Actieve QueryCounters (assert_max_queries), los van requests
+_counters: list['QueryCounter'] = []
+_counters_lock = threading.Lock()
+
+
+def normalize(statement: str) -> str:
+    """Maak een statement onafhankelijk van de parameters.
+
+    Voorbeeld:
+        "SELECT * FROM products WHERE id IN (?, ?, ?)" -> "SELECT * FROM products WHERE id IN (?)"
+    """
+    statement = _LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class QueryCounter:
+    """Verzamelt de uitgevoerde statements (per request of per test)."""
+
+    def __init__(self):
+        """Maak een lege teller aan."""
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        """Aantal uitgevoerde statements."""
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements die minstens `threshold` keer (met andere parameters) liepen.
+
+        Args:
+            threshold: Minimaal aantal herhalingen
+
+        Returns:
+            Lijst van (genormaliseerd statement, aantal), de vaakste eerst
+        """
+        counts = Counter(normalize(statement) for statement in self.statements)
+        return [(statement, n) for statement, n in counts.most_common() if n >= threshold]
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    """Engine event: tel het statement bij de request en actieve counters."""
+    if has_request_context():
+        counter = g.get('_query_counter')
+        if counter is not None:
+            counter.statements.append(statement)
+    for counter in _counters:
+        counter.statements.append(statement)
+
+
+class QueryMonitor:
+    """Flask extensie die queries per request telt en N+1 patronen meldt."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) QueryMonitor aan."""
+        self.enabled = None
+        self.default_budget = 20
+        self.threshold = 3
+        event.listen(Engine, 'before_cursor_execute', _count_statement)
+
+    def init_app(self, app) -> None:
+        """Registreer de request hooks.
+
+        Config keys:
+            QUERY_BUDGET_ENABLED: Tellen en waarschuwen (default None = alleen
+                in debug en testing)
+            QUERY_BUDGET: Maximaal aantal queries per request (default 20)
+            QUERY_REPEAT_THRESHOLD: Zo vaak hetzelfde statement = N+1 (default 3)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('QUERY_BUDGET_ENABLED', None)
+        self.default_budget = app.config.setdefault('QUERY_BUDGET', 20)
+        self.threshold = app.config.setdefault('QUERY_REPEAT_THRESHOLD', 3)
+        app.before_request(self._start_request)
+        app.after_request(self._check_request)
+        app.extensions['query_monitor'] = self
+
+    def is_enabled(self) -> bool:
+        """Tellen we in deze app? (DEBUG wordt vaak pas na create_app() gezet.)"""
+        if self.enabled is None:
+            return current_app.debug or current_app.testing
+        return self.enabled
+
+    def budget_for(self, endpoint: str | None) -> int:
+        """Budget van een endpoint (@query_budget) of de default."""
+        view = current_app.view_functions.get(endpoint) if endpoint else None
+        return getattr(view, 'query_budget', self.default_budget)
+
+    def _start_request(self):
+        """Begin met tellen voor deze request."""
+        if self.is_enabled():
+            g._query_counter = QueryCounter()
+
+    def _check_request(self, response):
+        """Zet de headers en waarschuw bij een overschreden budget of N+1."""
+        counter = g.pop('_query_counter', None)
+        if counter is None:
+            return response
+
+        response.headers['X-Query-Count'] = str(counter.count)
+        warnings = []
+        budget = self.budget_for(request.endpoint)
+        if counter.count > budget:
+            warnings.append(f'{counter.count} queries (budget {budget})')
+        for statement, n in counter.repeated(self.threshold):
+            warnings.append(f'N+1: {statement[:120]} (x{n})')
+
+        if warnings:
+            response.headers['X-Query-Warning'] = '; '.join(warnings)
+            for warning in warnings:
+                current_app.logger.warning("%s %s: %s", request.method, request.path, warning)
+        return response
+
+
+query_monitor = QueryMonitor()
+
+
+def query_budget(max_queries: int):
+    """Decorator die het query budget van een route instelt.
+
+    Args:
+        max_queries: Maximaal aantal queries voor deze route
+
+    Returns:
+        Decorator voor een view functie
+    """
+    def decorator(f):
+        # Geen wrapper nodig; @wraps van de andere decorators neemt het attribuut over
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+
+@contextmanager
+def count_queries():
+    """Tel alle statements die binnen het with-blok uitgevoerd worden.
+
+    Voorbeeld:
+        with count_queries() as counter:
+            client.get('/')
+        print(counter.count)
+    """
+    counter = QueryCounter()
+    with _counters_lock:
+        _counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _counters_lock:
+            _counters.remove(counter)
@@ -0,0 +1,226 @@
+"""
+Rate limiting met token buckets (Week 7b).
+
+Elke login poging kost een database query en een dure password check.
+Zonder limiet kan iemand /auth/login en /auth/register eindeloos
+bestoken. Deze module geeft een decorator @rate_limit die per IP-adres
+en per account een token bucket bijhoudt.
+
+Token bucket in het kort:
+- Een bucket bevat maximaal `capacity` tokens
+- Elke request kost 1 token
+- Tokens lopen weer bij met `capacity / period` per seconde
+- Geen token over? Dan volgt 429 Too Many Requests met Retry-After
+
+Buckets staan in een begrensde OrderedDict (RATELIMIT_MAX_KEYS). Een
+bucket die lang genoeg niet gebruikt is, is weer vol en wordt dus
+"lui" opgeruimd: bij gebruik of als hij aan de beurt is om te vervallen.
+
+Let op: de buckets staan in het geheugen van het proces. Onder serve.py
+heeft elke worker zijn eigen buckets, en de kernel verdeelt de requests
+over de workers. Met N workers is de echte limiet dus tot N keer de
+ingestelde: (5, 60) met 4 workers laat tot 20 pogingen per minuut door.
+Kies de limieten daarnaar, of zet een gedeelde limiet in de reverse proxy.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request
+from flask_login import current_user
+
+
+class TokenBuckets:
+    """Verzameling token buckets met dezelfde capaciteit en snelheid.
+
+    Alleen voor dit proces: andere workers hebben hun eigen buckets.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int = 10000):
+        """Maak een lege verzameling buckets aan.
+
+        Args:
+            capacity: Maximaal aantal tokens (burst)
+            period: Seconden waarin een lege bucket weer vol loopt
+            max_keys: Maximaal aantal buckets in het geheugen
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.period = period
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str) -> float:
+        """Neem een token uit de bucket van key.
+
+        Args:
+            key: Sleutel van de bucket (bv. IP-adres of e-mailadres)
+
+        Returns:
+            0.0 als de request door mag, anders het aantal seconden
+            tot er weer een token beschikbaar is
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._buckets.pop(key, None)
+            if entry is None:
+                tokens = float(self.capacity)
+            else:
+                tokens = min(self.capacity, entry[0] + (now - entry[1]) * self.rate)
+
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def _expire(self, now: float) -> None:
+        """Ruim een paar van de oudste buckets op als ze weer vol zijn."""
+        for _ in range(2):
+            if not self._buckets:
+                return
+            key, (tokens, updated) = next(iter(self._buckets.items()))
+            if tokens + (now - updated) * self.rate < self.capacity:
+                return
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        """Aantal buckets in het geheugen."""
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Houdt de buckets en statistieken van alle @rate_limit routes bij."""
+
+    def __init__(self):
+        """Maak een lege RateLimiter aan."""
+        self.enabled = True
+        self.max_keys = 10000
+        self._buckets: dict[tuple[str, str], TokenBuckets] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            RATELIMIT_ENABLED: Rate limiting aan/uit (default True)
+            RATELIMIT_MAX_KEYS: Maximaal aantal buckets per limiet (default 10000)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('RATELIMIT_ENABLED', True)
+        self.max_keys = app.config.setdefault('RATELIMIT_MAX_KEYS', 10000)
+        app.extensions['rate_limiter'] = self
+        with self._lock:
+            self._buckets.clear()
+
+    def check(self, name: str, scope: str, key: str, limit: tuple[int, float]) -> float:
+        """Verbruik een token voor key en geef de eventuele wachttijd terug.
+
+        Args:
+            name: Naam van de limiet (meestal de endpoint naam)
+            scope: 'ip' of 'account'
+            key: IP-adres of account sleutel
+            limit: Tuple (capacity, period in seconden)
+
+        Returns:
+            0.0 als de request door mag, anders seconden tot de volgende token
+        """
+        with self._lock:
+            buckets = self._buckets.get((name, scope))
+            if buckets is None:
+                buckets = TokenBuckets(limit[0], limit[1], self.max_keys)
+                self._buckets[(name, scope)] = buckets
+        return buckets.consume(key)
+
+    def record(self, name: str, allowed: bool) -> None:
+        """Tel een toegestane of geweigerde request."""
+        with self._lock:
+            counts = self._counts.setdefault(name, {'allowed': 0, 'shed': 0})
+            counts['allowed' if allowed else 'shed'] += 1
+
+    def stats(self) -> dict:
+        """Geef per limiet het aantal toegestane en geweigerde requests.
+
+        Returns:
+            Dict met per naam allowed, shed, shed_ratio en het aantal buckets
+        """
+        with self._lock:
+            result = {}
+            for name, counts in self._counts.items():
+                total = counts['allowed'] + counts['shed']
+                result[name] = {
+                    **counts,
+                    'shed_ratio': counts['shed'] / total if total else 0.0,
+                    'buckets': sum(len(b) for (n, _), b in self._buckets.items() if n == name),
+                }
+            return result
+
+
+limiter = RateLimiter()
+
+
+def _client_ip() -> str:
+    """IP-adres van de client."""
+    return request.remote_addr or 'unknown'
+
+
+def rate_limit(per_ip: tuple[int, float] | None = None,
+               per_account: tuple[int, float] | None = None,
+               account_field: str | None = None,
+               methods: tuple[str, ...] = ('POST',)):
+    """Decorator die een route beschermt met token buckets.
+
+    Voorbeeld:
+        @auth_bp.route("/login", methods=['GET', 'POST'])
+        @rate_limit(per_ip=(20, 60), per_account=(5, 60), account_field='email')
+        def login():
+            ...
+
+    Args:
+        per_ip: (capacity, period) per IP-adres, of None
+        per_account: (capacity, period) per account, of None
+        account_field: Formulierveld met de account sleutel (bv. 'email').
+            Zonder dit veld wordt de ingelogde gebruiker gebruikt.
+        methods: HTTP methodes die meetellen (default alleen POST)
+
+    Returns:
+        Decorator voor een view functie
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not limiter.enabled or request.method not in methods:
+                return f(*args, **kwargs)
+
+            name = request.endpoint
+            wait = 0.0
+            if per_ip is not None:
+                wait = limiter.check(name, 'ip', _client_ip(), per_ip)
+            if not wait and per_account is not None:
+                if account_field is not None:
+                    account = (request.form.get(account_field) or '').strip().lower()
+                elif current_user.is_authenticated:
+                    account = str(current_user.id)
+                else:
+                    account = ''
+                if account:
+                    wait = limiter.check(name, 'account', account, per_account)
+
+            limiter.record(name, allowed=not wait)
+            if wait:
+                retry_after = str(int(wait) + 1)
+                return "Te veel verzoeken, probeer het later opnieuw.", 429, {'Retry-After': retry_after}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,338 @@
+"""
+"Vaak samen gekocht" aanbevelingen (Week 7b).
+
+Uit order_items tellen we hoe vaak twee producten in dezelfde bestelling
+zitten: de co-occurrence matrix. Die matrix is ijl (de meeste producten
+worden nooit samen gekocht), dus we bewaren alleen de paren die
+voorkomen, in de tabel product_pairs. De diagonaal is het aantal
+bestellingen met het product zelf.
+
+Per product maakt de job daar een top-N van, met als score:
+- cosine: n(a,b) / sqrt(n(a) * n(b))
+- lift:   n(a,b) * N / (n(a) * n(b))   (N = aantal bestellingen)
+Beide corrigeren voor populariteit: een product dat in elke bestelling
+zit, is geen goede aanbeveling bij alles. De top-N komt in de tabel
+product_recommendations, zodat de product pagina er met één index lookup
+bij kan.
+
+De job is incrementeel: hij telt alleen bestellingen na het watermerk
+van de vorige run (recommendation_runs) en rekent alleen de producten
+opnieuw door waarvan een telling veranderd is. Alles gebeurt in één
+transactie, dus een mislukte run kan veilig opnieuw. Die transactie
+begint met BEGIN IMMEDIATE: twee gelijktijdige runs (twee job threads,
+of twee keer op de knop in de admin) tellen dezelfde bestellingen dus
+niet dubbel. De tweede wacht en vindt daarna niets nieuws meer.
+
+Tellen gaat met NumPy als dat geïnstalleerd is (gevectoriseerd per
+bestelgrootte), anders met een Counter. NumPy wordt pas bij het eerste
+tellen geïmporteerd, niet bij create_app().
+"""
+import math
+import time
+from collections import Counter
+from itertools import combinations_with_replacement
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import aliased
+
+from webshop_app.catalog import catalog_version
+from webshop_app.models import db, OrderItem, Product, ProductPair, ProductRecommendation, RecommendationRun
+
+SCORES = ('cosine', 'lift')
+# False = altijd met een Counter tellen (zie bench_recommendations.py --no-numpy)
+USE_NUMPY = True
+
+
+def load_numpy():
+    """Importeer NumPy bij het eerste gebruik (het laden kost ~100 ms).
+
+    Returns:
+        De numpy module, of None als NumPy niet geïnstalleerd is of USE_NUMPY uit staat
+    """
+    if not USE_NUMPY:
+        return None
+    try:
+        import numpy
+    except ImportError:  # numpy is optioneel, tellen met een Counter werkt ook
+        return None
+    return numpy
+
+
+def count_pairs(baskets: list[tuple[int, ...]]) -> dict[tuple[int, int], int]:
+    """Tel alle productparen (a <= b, inclusief a == a) in een lijst bestellingen.
+
+    Args:
+        baskets: Per bestelling de gesorteerde, unieke product IDs
+
+    Returns:
+        Dict (a, b) -> aantal bestellingen met a en b
+    """
+    np = load_numpy()
+    if np is not None:
+        return _count_pairs_numpy(np, baskets)
+    counts = Counter()
+    for basket in baskets:
+        counts.update(combinations_with_replacement(basket, 2))
+    return dict(counts)
+
+
+def _count_pairs_numpy(np, baskets: list[tuple[int, ...]]) -> dict[tuple[int, int], int]:
+    """count_pairs() met NumPy: alle bestellingen van dezelfde grootte in één keer.
+
+    Een paar (a, b) wordt één getal a * width + b, zodat np.unique() de
+    ijle matrix in één sortering telt.
+    """
+    if not baskets:
+        return {}
+    width = max(max(basket) for basket in baskets) + 1
+    by_size: dict[int, list[tuple[int, ...]]] = {}
+    for basket in baskets:
+        by_size.setdefault(len(basket), []).append(basket)
+    codes = []
+    for size, group in by_size.items():
+        matrix = np.array(group, dtype=np.int64)  # bestellingen x size
+        rows, cols = np.triu_indices(size)
+        codes.append((matrix[:, rows] * width + matrix[:, cols]).ravel())
+    keys, counts = np.unique(np.concatenate(codes), return_counts=True)
+    return {(int(key // width), int(key % width)): int(count) for key, count in zip(keys, counts)}
+
+
+def score(together: int, orders_a: int, orders_b: int, total_orders: int, method: str = 'cosine') -> float:
+    """Score van product b als aanbeveling bij product a.
+
+    Args:
+        together: Aantal bestellingen met a en b
+        orders_a: Aantal bestellingen met a
+        orders_b: Aantal bestellingen met b
+        total_orders: Aantal bestellingen in totaal (alleen voor lift)
+        method: 'cosine' of 'lift'
+
+    Returns:
+        De score (hoger is beter)
+    """
+    if method == 'lift':
+        return together * total_orders / (orders_a * orders_b)
+    return together / math.sqrt(orders_a * orders_b)
+
+
+class Recommender:
+    """Flask extensie die de aanbevelingen bijwerkt en opzoekt."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) Recommender aan."""
+        self.top_n = 4
+        self.min_orders = 2
+        self.method = 'cosine'
+        self.max_basket = 50
+        self.batch_size = 5000
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen uit de app configuratie.
+
+        Config keys:
+            RECOMMENDATIONS_TOP_N: Aanbevelingen per product (default 4)
+            RECOMMENDATIONS_MIN_ORDERS: Minimaal aantal gezamenlijke bestellingen (default 2)
+            RECOMMENDATIONS_SCORE: 'cosine' (default) of 'lift'
+            RECOMMENDATIONS_MAX_BASKET: Grotere bestellingen tellen niet mee (default 50)
+            RECOMMENDATIONS_BATCH: Bestellingen per batch bij het tellen (default 5000)
+
+        Args:
+            app: Flask app instance
+
+        Raises:
+            ValueError: Bij een onbekende RECOMMENDATIONS_SCORE
+        """
+        self.top_n = app.config.setdefault('RECOMMENDATIONS_TOP_N', 4)
+        self.min_orders = app.config.setdefault('RECOMMENDATIONS_MIN_ORDERS', 2)
+        self.method = app.config.setdefault('RECOMMENDATIONS_SCORE', 'cosine')
+        self.max_basket = app.config.setdefault('RECOMMENDATIONS_MAX_BASKET', 50)
+        self.batch_size = app.config.setdefault('RECOMMENDATIONS_BATCH', 5000)
+        if self.method not in SCORES:
+            raise ValueError(f"RECOMMENDATIONS_SCORE moet een van {SCORES} zijn, niet {self.method!r}")
+        app.extensions['recommender'] = self
+
+    def related(self, product_id: int) -> list[Product]:
+        """De aanbevelingen bij een product, in volgorde (één query).
+
+        Args:
+            product_id: ID van het bekeken product
+
+        Returns:
+            Lijst van Product objecten (leeg als er nog geen aanbevelingen zijn)
+        """
+        stmt = (
+            db.select(Product)
+            .join(ProductRecommendation, ProductRecommendation.related_id == Product.id)
+            .where(ProductRecommendation.product_id == product_id)
+            .order_by(ProductRecommendation.rank)
+        )
+        return list(db.session.execute(stmt).scalars())
+
+    def update(self) -> dict:
+        """Verwerk de bestellingen sinds de vorige run.
+
+        Returns:
+            Dict met orders, pairs, products en seconds van deze run
+        """
+        started = time.perf_counter()
+        # Eerst de schrijflock, dan pas het watermerk lezen: een gelijktijdige run wacht hier
+        self._begin_immediate()
+        watermark = db.session.execute(db.select(db.func.max(RecommendationRun.last_order_id))).scalar() or 0
+        # Vast eindpunt: bestellingen die tijdens de run binnenkomen zijn voor de volgende run
+        last_order_id = db.session.execute(db.select(db.func.max(OrderItem.order_id))).scalar() or 0
+        if last_order_id <= watermark:
+            # Niets nieuws (of een andere run was ons net voor)
+            db.session.commit()
+            return {'orders': 0, 'pairs': 0, 'products': 0, 'seconds': round(time.perf_counter() - started, 3)}
+
+        orders = pairs = 0
+        touched: set[int] = set()
+        for start in range(watermark, last_order_id, self.batch_size):
+            baskets = self._baskets(start, min(start + self.batch_size, last_order_id))
+            counts = count_pairs(baskets)
+            self._add_pairs(counts)
+            orders += len(baskets)
+            pairs += len(counts)
+            touched.update(a for a, _ in counts)
+
+        rescored = set()
+        if touched:
+            previous = db.session.execute(db.select(db.func.sum(RecommendationRun.orders))).scalar() or 0
+            rescored = self._rescore(touched, previous + orders)
+        db.session.add(RecommendationRun(
+            last_order_id=last_order_id, orders=orders, pairs=pairs,
+            products=len(rescored), seconds=time.perf_counter() - started,
+        ))
+        db.session.commit()
+        if rescored:
+            # Product pagina's tonen de aanbevelingen: hun ETag en caches moeten mee
+            catalog_version.bump(rescored)
+        return {'orders': orders, 'pairs': pairs, 'products': len(rescored),
+                'seconds': round(time.perf_counter() - started, 3)}
+
+    def rebuild(self) -> dict:
+        """Gooi alle tellingen weg en verwerk alle bestellingen opnieuw.
+
+        Nodig na het wijzigen van RECOMMENDATIONS_MAX_BASKET of na het
+        verwijderen van bestellingen.
+
+        Returns:
+            Dict zoals bij update()
+        """
+        for model in (ProductPair, ProductRecommendation, RecommendationRun):
+            db.session.execute(db.delete(model))
+        return self.update()
+
+    def stats(self) -> dict:
+        """Samenvatting voor de admin.
+
+        Returns:
+            Dict met pairs, recommendations, last_order_id en last_run
+        """
+        last_run = db.session.execute(
+            db.select(RecommendationRun).order_by(RecommendationRun.id.desc()).limit(1)
+        ).scalar()
+        return {
+            'pairs': db.session.execute(db.select(db.func.count()).select_from(ProductPair)).scalar(),
+            'recommendations': db.session.execute(
+                db.select(db.func.count()).select_from(ProductRecommendation)
+            ).scalar(),
+            'last_order_id': last_run.last_order_id if last_run else 0,
+            'last_run': last_run.created_at if last_run else None,
+            'numpy': load_numpy() is not None,
+        }
+
+    @staticmethod
+    def _begin_immediate() -> None:
+        """Begin de transactie met BEGIN IMMEDIATE (de schrijflock van SQLite).
+
+        pysqlite stuurt zelf pas BEGIN bij de eerste INSERT/UPDATE/DELETE:
+        alles wat daarvoor gelezen wordt, kan een andere run ook lezen.
+        Heeft de transactie al geschreven (rebuild), dan is de lock er al.
+        """
+        connection = db.session.connection()
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+    def _baskets(self, after: int, until: int) -> list[tuple[int, ...]]:
+        """De producten per bestelling voor after < order_id <= until."""
+        stmt = (
+            db.select(OrderItem.order_id, OrderItem.product_id)
+            .where(OrderItem.order_id > after, OrderItem.order_id <= until)
+            .order_by(OrderItem.order_id)
+        )
+        baskets: dict[int, set[int]] = {}
+        for order_id, product_id in db.session.execute(stmt.execution_options(yield_per=2000)):
+            baskets.setdefault(order_id, set()).add(product_id)
+        return [tuple(sorted(products)) for products in baskets.values() if len(products) <= self.max_basket]
+
+    def _add_pairs(self, counts: dict[tuple[int, int], int]) -> None:
+        """Tel de nieuwe paren op bij product_pairs (in beide richtingen)."""
+        rows = []
+        for (a, b), n in counts.items():
+            rows.append({'product_id': a, 'other_id': b, 'orders': n})
+            if a != b:
+                rows.append({'product_id': b, 'other_id': a, 'orders': n})
+        if not rows:
+            return
+        stmt = insert(ProductPair)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['product_id', 'other_id'],
+            set_={'orders': ProductPair.orders + stmt.excluded.orders},
+        )
+        # executemany met één gecompileerd statement (een VALUES lijst compileren is trager dan de insert)
+        db.session.connection().execute(stmt, rows)
+
+    def _rescore(self, touched: set[int], total_orders: int) -> set[int]:
+        """Bereken de top-N opnieuw voor de geraakte producten en hun partners.
+
+        Verandert n(b), dan verandert de score van b bij al zijn partners:
+        die worden dus ook opnieuw doorgerekend.
+
+        Args:
+            touched: IDs van producten in de nieuwe bestellingen
+            total_orders: Aantal verwerkte bestellingen in totaal (voor lift)
+
+        Returns:
+            IDs van de producten waarvan de aanbevelingen opnieuw berekend zijn
+        """
+        partners = set()
+        ids = sorted(touched)
+        for start in range(0, len(ids), 500):
+            partners.update(db.session.execute(
+                db.select(ProductPair.other_id).where(ProductPair.product_id.in_(ids[start:start + 500]))
+            ).scalars())
+        products = sorted(touched | partners)
+
+        own = aliased(ProductPair)
+        other = aliased(ProductPair)
+        for start in range(0, len(products), 500):
+            chunk = products[start:start + 500]
+            stmt = (
+                db.select(ProductPair.product_id, ProductPair.other_id, ProductPair.orders,
+                          own.orders, other.orders)
+                .join(own, (own.product_id == ProductPair.product_id) & (own.other_id == ProductPair.product_id))
+                .join(other, (other.product_id == ProductPair.other_id) & (other.other_id == ProductPair.other_id))
+                .where(ProductPair.product_id.in_(chunk),
+                       ProductPair.other_id != ProductPair.product_id,
+                       ProductPair.orders >= self.min_orders)
+            )
+            candidates: dict[int, list[tuple[float, int]]] = {product_id: [] for product_id in chunk}
+            for product_id, other_id, together, orders_a, orders_b in db.session.execute(stmt):
+                candidates[product_id].append(
+                    (score(together, orders_a, orders_b, total_orders, self.method), other_id)
+                )
+
+            db.session.execute(db.delete(ProductRecommendation).where(ProductRecommendation.product_id.in_(chunk)))
+            rows = [
+                {'product_id': product_id, 'rank': rank, 'related_id': other_id, 'score': value}
+                for product_id, scored in candidates.items()
+                # Hoogste score eerst, bij gelijke score het laagste ID (stabiele volgorde)
+                for rank, (value, other_id) in enumerate(sorted(scored, key=lambda s: (-s[0], s[1]))[:self.top_n])
+            ]
+            if rows:
+                db.session.execute(db.insert(ProductRecommendation), rows)
+        return set(products)
+
+
+recommender = Recommender()
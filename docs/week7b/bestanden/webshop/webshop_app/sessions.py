@@ -0,0 +1,334 @@
+"""
+Server-side sessies in SQLite (Week 7b).
+
+Flask bewaart de sessie standaard in een gesigneerde cookie. Flash
+messages, login status en (later) de winkelwagen gaan dan bij elke
+request heen en weer, en worden elke keer gedecodeerd en gecontroleerd.
+
+Met SESSION_BACKEND = 'sqlite' staat in de cookie alleen nog een
+willekeurig sessie ID. De inhoud staat in een SQLite tabel:
+- Lazy loading: de tabel wordt pas gelezen als de view de sessie gebruikt
+- Alleen schrijven als de inhoud echt veranderd is (of bijna verloopt)
+- Een achtergrond thread ruimt verlopen sessies op; extensies met data
+  die bij een sessie hoort (de anonieme winkelwagen) krijgen de inhoud
+  van de verlopen sessies mee via on_expired()
+- Geen session fixation: een onbekend sessie ID uit de cookie wordt niet
+  overgenomen, en bij inloggen en uitloggen krijgt de sessie een nieuw ID
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask import session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_login import user_logged_in, user_logged_out
+
+
+class SQLiteSessionStore:
+    """Opslag van sessies in een SQLite bestand (één connectie per thread)."""
+
+    def __init__(self, path: str):
+        """Maak de store aan en zorg dat de tabel bestaat.
+
+        Args:
+            path: Pad naar het SQLite bestand
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Geef de connectie van deze thread (en dit proces)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, sid: str) -> tuple[str, float] | None:
+        """Haal een niet-verlopen sessie op.
+
+        Returns:
+            Tuple (data, expires) of None
+        """
+        row = self._connect().execute(
+            "SELECT data, expires FROM sessions WHERE id = ? AND expires > ?",
+            (sid, time.time())
+        ).fetchone()
+        return row
+
+    def save(self, sid: str, data: str, expires: float) -> None:
+        """Sla een sessie op (insert of update)."""
+        self._connect().execute(
+            "INSERT INTO sessions (id, data, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires = excluded.expires",
+            (sid, data, expires)
+        )
+
+    def delete(self, sid: str) -> None:
+        """Verwijder een sessie."""
+        self._connect().execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+    def sweep(self) -> list[str]:
+        """Verwijder alle verlopen sessies.
+
+        Returns:
+            De (geserialiseerde) inhoud van de verwijderde sessies
+        """
+        return [data for data, in self._connect().execute(
+            "DELETE FROM sessions WHERE expires <= ? RETURNING data", (time.time(),)
+        )]
+
+
+class LazySession(SessionMixin):
+    """Sessie die de opgeslagen inhoud pas bij eerste gebruik inleest."""
+
+    def __init__(self, sid: str, loader, new: bool = False):
+        """Maak een LazySession aan.
+
+        Args:
+            sid: Sessie ID (uit de cookie of nieuw)
+            loader: Functie die (data dict, raw, expires) teruggeeft
+            new: True als er nog geen opgeslagen sessie is
+        """
+        self.sid = sid
+        self.new = new
+        # Vorig ID na regenerate() of een onbekend ID: wordt bij het opslaan opgeruimd
+        self.replaced_sid = None
+        self.modified = False
+        self.accessed = False
+        self._loader = loader
+        self._data = None
+        self.raw = None
+        self.expires = None
+
+    @property
+    def loaded(self) -> bool:
+        """True als de inhoud al ingelezen is."""
+        return self._data is not None
+
+    def _load(self) -> dict:
+        self.accessed = True
+        if self._data is None:
+            self._data, self.raw, self.expires = self._loader(self.sid)
+            if self.raw is None and not self.new:
+                # Onbekend of verlopen ID: niet overnemen (een aanvaller kan het gekozen hebben)
+                self.replaced_sid = self.sid
+                self.sid = secrets.token_urlsafe(32)
+                self.new = True
+        return self._data
+
+    def regenerate(self) -> None:
+        """Geef de sessie een nieuw ID, met dezelfde inhoud.
+
+        Na het inloggen of uitloggen: wie het oude ID kent (bijvoorbeeld
+        via een vooraf geplaatste cookie) heeft er daarna niets meer aan.
+        """
+        self._load()
+        if not self.new:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, key):
+        return key in self._load()
+
+    def get(self, key, default=None):
+        return self._load().get(key, default)
+
+    def setdefault(self, key, default=None):
+        data = self._load()
+        if key not in data:
+            data[key] = default
+            self.modified = True
+        return data[key]
+
+    def pop(self, key, *args):
+        data = self._load()
+        if key in data:
+            self.modified = True
+        return data.pop(key, *args)
+
+    def clear(self):
+        if self._load():
+            self.modified = True
+        self._data.clear()
+
+
+class ServerSideSessions(SessionInterface):
+    """Flask SessionInterface die sessies in SQLite opslaat."""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) session interface aan."""
+        self.store = None
+        self.sweep_interval = 300.0
+        self.writes = 0
+        self.skipped_writes = 0
+        self._sweeper_pid = None
+        self._expired_listeners = []
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        """Koppel server-side sessies aan de app als dat ingesteld is.
+
+        Config keys:
+            SESSION_BACKEND: 'sqlite' of 'cookie' (Flask default)
+            SESSION_DB_PATH: Pad naar het sessie bestand
+            SESSION_SWEEP_INTERVAL: Seconden tussen opruimrondes (default 300)
+
+        Args:
+            app: Flask app instance
+        """
+        backend = app.config.setdefault('SESSION_BACKEND', 'sqlite')
+        if backend != 'sqlite':
+            return
+        path = app.config.setdefault(
+            'SESSION_DB_PATH', os.path.join(os.path.dirname(app.root_path), 'sessions.db')
+        )
+        self.sweep_interval = app.config.setdefault('SESSION_SWEEP_INTERVAL', 300.0)
+        self.store = SQLiteSessionStore(path)
+        app.session_interface = self
+        user_logged_in.connect(self._regenerate, app)
+        user_logged_out.connect(self._regenerate, app)
+        app.extensions['server_sessions'] = self
+
+    def on_expired(self, listener) -> None:
+        """Registreer een functie die de inhoud van verlopen sessies krijgt.
+
+        Args:
+            listener: Functie met als argument een lijst van sessie dicts
+        """
+        if listener not in self._expired_listeners:
+            self._expired_listeners.append(listener)
+
+    def sweep(self) -> int:
+        """Verwijder verlopen sessies en geef hun inhoud aan de listeners.
+
+        Returns:
+            Aantal verwijderde sessies
+        """
+        expired = [self.serializer.loads(data) for data in self.store.sweep()]
+        if expired:
+            for listener in list(self._expired_listeners):
+                listener(expired)
+        return len(expired)
+
+    def open_session(self, app, request):
+        """Maak een LazySession op basis van de cookie (zonder DB toegang)."""
+        self._ensure_sweeper()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return LazySession(secrets.token_urlsafe(32), self._empty, new=True)
+        return LazySession(sid, self._load)
+
+    def save_session(self, app, session: LazySession, response) -> None:
+        """Schrijf de sessie alleen weg als de inhoud veranderd is."""
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session.loaded:
+            return
+        if session.replaced_sid is not None:
+            self.store.delete(session.replaced_sid)
+
+        if not session:
+            if not session.new or session.replaced_sid is not None:
+                if not session.new:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        raw = self.serializer.dumps(dict(session))
+        # Ongewijzigd en nog niet over de helft van de levensduur? Niet schrijven
+        if (raw == session.raw and session.replaced_sid is None
+                and session.expires - time.time() > lifetime / 2):
+            self.skipped_writes += 1
+            return
+
+        self.store.save(session.sid, raw, time.time() + lifetime)
+        self.writes += 1
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    @staticmethod
+    def _regenerate(app, **extra) -> None:
+        """Nieuw sessie ID na inloggen of uitloggen (signal handler)."""
+        if isinstance(session._get_current_object(), LazySession):
+            session.regenerate()
+
+    def _empty(self, sid: str) -> tuple[dict, None, float]:
+        """Inhoud van een nieuwe sessie."""
+        return {}, None, 0.0
+
+    def _load(self, sid: str) -> tuple[dict, str | None, float]:
+        """Lees een sessie uit de store (onbekend of verlopen = leeg)."""
+        row = self.store.load(sid)
+        if row is None:
+            return {}, None, 0.0
+        data, expires = row
+        return self.serializer.loads(data), data, expires
+
+    def _ensure_sweeper(self) -> None:
+        """Start de opruim thread (opnieuw na een fork)."""
+        if self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+        thread = threading.Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+        thread.start()
+
+    def _sweep_loop(self) -> None:
+        """Ruim periodiek verlopen sessies op."""
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except sqlite3.Error:
+                pass
+
+
+server_sessions = ServerSideSessions()
@@ -0,0 +1,104 @@
+"""
+Startup timings van de app factory (Week 7b).
+
+Elke worker en elke test die een app maakt betaalt de startup: imports
+van Flask en SQLAlchemy, de extensies en het registreren van de
+blueprints. StartupTimings meet hoe lang elke stap van create_app()
+duurt, zodat een trage import of extensie direct opvalt:
+
+    app = create_app()
+    app.extensions['startup'].report()
+
+measure_startup() meet de volledige cold start (inclusief alle imports)
+in een nieuw Python proces. check_startup.py gebruikt dat als budget
+controle, bijvoorbeeld in CI.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# Tijdstip waarop de webshop_app package begon met importeren
+IMPORT_STARTED = time.perf_counter()
+
+
+class StartupTimings:
+    """Duur van de stappen van create_app(), in volgorde."""
+
+    def __init__(self):
+        """Maak een lege lijst timings aan."""
+        self.steps: list[tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str):
+        """Meet de duur van een stap.
+
+        Voorbeeld:
+            with timings.step('blueprint products'):
+                from webshop_app.products.views import products_bp
+
+        Args:
+            name: Naam van de stap
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def add(self, name: str, seconds: float) -> None:
+        """Voeg een elders gemeten stap toe."""
+        self.steps.append((name, seconds))
+
+    @property
+    def total(self) -> float:
+        """Totale duur van alle stappen in seconden."""
+        return sum(seconds for _, seconds in self.steps)
+
+    def as_dict(self) -> dict[str, float]:
+        """Timings in milliseconden per stap."""
+        return {name: seconds * 1000 for name, seconds in self.steps}
+
+    def report(self) -> str:
+        """Tabel met de duur per stap, de traagste eerst."""
+        lines = [f"{name:<28} {seconds * 1000:>8.1f} ms"
+                 for name, seconds in sorted(self.steps, key=lambda s: -s[1])]
+        lines.append(f"{'totaal':<28} {self.total * 1000:>8.1f} ms")
+        return '\n'.join(lines)
+
+
+# Code die in een nieuw proces draait: meet import en create_app
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from webshop_app import create_app
+imported = time.perf_counter()
+app = create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'steps': app.extensions['startup'].as_dict(),
+}))
+"""
+
+
+def measure_startup(config_name: str = 'testing') -> dict:
+    """Meet import en create_app() in een nieuw Python proces.
+
+    Args:
+        config_name: Configuratie naam voor create_app()
+
+    Returns:
+        Dict met import_ms, create_app_ms, total_ms en steps (ms per stap)
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', _CHILD, config_name],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total_ms'] = timings['import_ms'] + timings['create_app_ms']
+    return timings
@@ -0,0 +1,395 @@
+"""
+Autocomplete met een prefix trie (Week 7b).
+
+Een zoekveld dat bij elke toetsaanslag /api/search aanroept, doet elke
+keer een LIKE '%...%' scan over alle producten. Voor suggesties is dat
+niet nodig: de bezoeker typt het begin van een woord. De SuggestIndex
+houdt daarom een prefix trie in het geheugen:
+
+- Sleutels zijn de genormaliseerde productnaam vanaf elk woord:
+  "Gaming Laptop Pro" geeft "gaming laptop pro", "laptop pro" en "pro",
+  zodat "lap" en "laptop p" allebei het product vinden
+- Elke knoop bewaart de top-k product ID's van zijn hele subtree, al
+  gesorteerd op populariteit (aantal verkochte stuks). Een suggestie is
+  dus alleen een wandeling van len(prefix) stappen: microseconden
+- Ketens van knopen met één kind zijn samengevoegd tot één knoop met een
+  label van meerdere tekens (radix tree): de helft minder knopen
+
+De index wordt bij de start gebouwd (SUGGEST_WARMUP, in production) of
+bij de eerste suggestie. Een wijziging door een admin in dit proces
+werkt alleen de geraakte producten bij (via catalog_version.subscribe).
+Wijzigt de catalogus in een ander worker proces, dan zien we dat aan de
+catalogus versie en bouwen we de index opnieuw op.
+"""
+import sys
+import threading
+import time
+import unicodedata
+
+from sqlalchemy.exc import OperationalError
+
+from webshop_app.catalog import catalog_version
+from webshop_app.models import db, OrderItem, Product
+
+# Langere sleutels voegen weinig toe, maar kosten wel knopen
+MAX_KEY_LENGTH = 32
+
+
+def normalize(text: str) -> str:
+    """Kleine letters, zonder accenten en leestekens, enkele spaties.
+
+    Voorbeeld:
+        "Crème-Brûlée  Set" -> "creme brulee set"
+    """
+    text = unicodedata.normalize('NFKD', text.lower())
+    chars = [c if c.isalnum() else ' ' for c in text if not unicodedata.combining(c)]
+    return ' '.join(''.join(chars).split())
+
+
+def keys_for(name: str) -> set[str]:
+    """Alle sleutels van een productnaam: de naam vanaf elk woord."""
+    words = normalize(name).split()
+    return {' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))}
+
+
+def _rank(product_id: int, name: str, popularity: int) -> tuple:
+    """Sorteersleutel: meest verkocht eerst, daarna op naam."""
+    return -popularity, name.lower(), product_id
+
+
+class _Node:
+    """Knoop in de trie. Zonder __dict__, want er zijn er veel."""
+
+    __slots__ = ('label', 'children', 'ids', 'top')
+
+    def __init__(self, label: str = ''):
+        self.label = label    # tekens op de rand van de ouder naar deze knoop
+        self.children = None  # dict eerste teken van het label -> _Node
+        self.ids = None       # tuple van product ID's waarvan een sleutel hier eindigt
+        self.top = ()         # beste product ID's in deze subtree, beste eerst
+
+
+def _insert(root: _Node, key: str) -> list[_Node]:
+    """Zorg dat `key` in de trie staat en geef het pad van de root tot de knoop."""
+    path = [root]
+    node = root
+    i = 0
+    while i < len(key):
+        if node.children is None:
+            node.children = {}
+        child = node.children.get(key[i])
+        if child is None:
+            child = node.children[key[i]] = _Node(key[i:])
+            path.append(child)
+            break
+        label = child.label
+        n = 1
+        while n < len(label) and i + n < len(key) and label[n] == key[i + n]:
+            n += 1
+        if n < len(label):
+            # Sleutel wijkt halverwege het label af: rand splitsen
+            middle = _Node(label[:n])
+            middle.children = {label[n]: child}
+            middle.top = child.top
+            child.label = label[n:]
+            node.children[key[i]] = child = middle
+        path.append(child)
+        node = child
+        i += n
+    return path
+
+
+def _merge_chain(path: list[_Node]) -> None:
+    """Voeg de laatste knoop van het pad samen met zijn enige kind (na een verwijdering)."""
+    node = path[-1]
+    if len(path) > 1 and node.ids is None and node.children is not None and len(node.children) == 1:
+        (child,) = node.children.values()
+        node.label += child.label
+        node.children, node.ids, node.top = child.children, child.ids, child.top
+
+
+def _find(root: _Node, prefix: str) -> _Node | None:
+    """Knoop waaronder alle sleutels met `prefix` staan (of None)."""
+    node = root
+    i = 0
+    while i < len(prefix):
+        child = node.children.get(prefix[i]) if node.children is not None else None
+        if child is None:
+            return None
+        label = child.label
+        if prefix.startswith(label, i):
+            i += len(label)
+        elif label.startswith(prefix[i:]):
+            # Prefix eindigt halverwege het label
+            return child
+        else:
+            return None
+        node = child
+    return node
+
+
+class SuggestIndex:
+    """Prefix trie over productnamen met een top-k per knoop."""
+
+    def __init__(self, k: int = 10):
+        """Maak een lege index aan.
+
+        Args:
+            k: Aantal suggesties dat elke knoop bewaart (maximale limit)
+        """
+        self.k = k
+        self.enabled = True
+        self.warmup = False
+        self._lock = threading.RLock()
+        self._root = _Node()
+        # product_id -> (naam, populariteit); de sleutels volgen uit de naam
+        self._products: dict[int, tuple[str, int]] = {}
+        # product_id -> sorteersleutel (meest verkocht eerst, daarna op naam)
+        self._rank: dict[int, tuple] = {}
+        self._version = None
+        self._counts = {'lookups': 0, 'builds': 0, 'updates': 0}
+        self.build_seconds = 0.0
+        catalog_version.subscribe(self.update_changes)
+
+    def init_app(self, app) -> None:
+        """Lees de instellingen en bouw de index als dat gevraagd is.
+
+        Config keys:
+            SUGGEST_ENABLED: Autocomplete aan/uit (default True)
+            SUGGEST_MAX_RESULTS: Maximaal aantal suggesties (default 10)
+            SUGGEST_WARMUP: Index al in create_app() bouwen (default False)
+
+        Args:
+            app: Flask app instance
+        """
+        self.enabled = app.config.setdefault('SUGGEST_ENABLED', True)
+        self.k = app.config.setdefault('SUGGEST_MAX_RESULTS', 10)
+        self.warmup = app.config.setdefault('SUGGEST_WARMUP', False)
+        app.extensions['suggest_index'] = self
+        self.clear()
+        if self.enabled and self.warmup:
+            with app.app_context():
+                try:
+                    self.build()
+                except OperationalError:
+                    # Nog geen tabellen (eerste start): dan bij de eerste suggestie
+                    db.session.rollback()
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Producten waarvan een woord met `prefix` begint, populairste eerst.
+
+        Args:
+            prefix: Wat de bezoeker tot nu toe getypt heeft
+            limit: Maximaal aantal resultaten (niet meer dan k)
+
+        Returns:
+            Lijst van (product_id, naam)
+        """
+        if catalog_version.version != self._version:
+            with self._lock:
+                # Nog een keer kijken: een andere thread kan net gebouwd hebben
+                if catalog_version.version != self._version:
+                    self.build()
+        key = normalize(prefix)[:MAX_KEY_LENGTH]
+        with self._lock:
+            self._counts['lookups'] += 1
+            node = _find(self._root, key)
+            if node is None:
+                return []
+            return [(product_id, self._products[product_id][0]) for product_id in node.top[:limit]]
+
+    def build(self) -> None:
+        """Bouw de index opnieuw op uit de database (twee queries)."""
+        version = catalog_version.version
+        started = time.perf_counter()
+        sold = dict(db.session.execute(
+            db.select(OrderItem.product_id, db.func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+        ).all())
+        products = {
+            product_id: (name, int(sold.get(product_id) or 0))
+            for product_id, name in db.session.execute(db.select(Product.id, Product.name))
+        }
+
+        root = _Node()
+        for product_id, (name, _) in products.items():
+            for key in keys_for(name):
+                node = _insert(root, key)[-1]
+                node.ids = (*(node.ids or ()), product_id)
+        # Eén keer bottom-up alle top-k lijsten vullen
+        rank = {product_id: _rank(product_id, name, popularity)
+                for product_id, (name, popularity) in products.items()}
+        self._fill_top(root, rank.__getitem__)
+
+        with self._lock:
+            self._root = root
+            self._products = products
+            self._rank = rank
+            self._version = version
+            self._counts['builds'] += 1
+            self.build_seconds = time.perf_counter() - started
+
+    def update_changes(self, product_ids: set, category_ids: set, previous: int, version: int) -> None:
+        """Listener voor catalog_version.bump(): werk alleen de gewijzigde producten bij.
+
+        Was de vorige versie niet de versie van deze index, dan heeft een
+        ander proces ook iets gewijzigd. Welke producten dat waren weten we
+        niet, dus dan bouwt de volgende suggestie de hele index opnieuw.
+        """
+        with self._lock:
+            if self._version is None:
+                # Nog niet gebouwd: de eerste suggestie bouwt alles
+                return
+            if previous != self._version:
+                # Listener draait in after_commit: niet hier bouwen, maar bij de volgende suggestie
+                self._version = None
+                return
+            product_ids = {product_id for product_id in product_ids if product_id is not None}
+            rows = {}
+            if product_ids:
+                # Listener draait in after_commit: de session zelf mag geen SQL meer doen
+                with db.engine.connect() as connection:
+                    rows = dict(connection.execute(
+                        db.select(Product.id, Product.name).where(Product.id.in_(product_ids))
+                    ).all())
+            for product_id in product_ids:
+                old = self._products.get(product_id)
+                name = rows.get(product_id)
+                if old is not None and name == old[0]:
+                    continue
+                self._remove(product_id)
+                if name is not None:
+                    popularity = old[1] if old is not None else 0
+                    self._add(product_id, name, popularity)
+            self._version = version
+            self._counts['updates'] += 1
+
+    def record_sale(self, product_id: int, quantity: int = 1) -> None:
+        """Verhoog de populariteit van een product (bijvoorbeeld na een bestelling).
+
+        Args:
+            product_id: ID van het verkochte product
+            quantity: Aantal verkochte stuks
+        """
+        with self._lock:
+            old = self._products.get(product_id)
+            if old is None:
+                return
+            self._remove(product_id)
+            self._add(product_id, old[0], old[1] + quantity)
+
+    def clear(self) -> None:
+        """Gooi de index weg (de volgende suggestie bouwt hem opnieuw)."""
+        with self._lock:
+            self._root = _Node()
+            self._products = {}
+            self._rank = {}
+            self._version = None
+
+    def stats(self) -> dict:
+        """Grootte en geheugengebruik van de index.
+
+        Het geheugen is een schatting met sys.getsizeof: knopen, labels,
+        dicts en tuples van de trie plus de product tabel (de strings van
+        de namen zelf niet meegeteld; gedeelde tuples één keer).
+
+        Returns:
+            Dict met products, keys, nodes, bytes, build_ms en tellers
+        """
+        with self._lock:
+            nodes = keys = size = 0
+            seen = set()
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                nodes += 1
+                size += sys.getsizeof(node) + sys.getsizeof(node.label)
+                for part in (node.top, node.ids):
+                    if part is not None and id(part) not in seen:
+                        seen.add(id(part))
+                        size += sys.getsizeof(part)
+                if node.ids is not None:
+                    keys += len(node.ids)
+                if node.children is not None:
+                    size += sys.getsizeof(node.children)
+                    stack.extend(node.children.values())
+            size += sys.getsizeof(self._products) + sys.getsizeof(self._rank)
+            size += sum(sys.getsizeof(entry) for entry in self._products.values())
+            size += sum(sys.getsizeof(rank) for rank in self._rank.values())
+            return {
+                'products': len(self._products),
+                'keys': keys,
+                'nodes': nodes,
+                'bytes': size,
+                'bytes_per_product': size // len(self._products) if self._products else 0,
+                'build_ms': round(self.build_seconds * 1000, 1),
+                **self._counts,
+            }
+
+    def _fill_top(self, node: _Node, rank) -> None:
+        """Vul de top-k van node en zijn subtree (bottom-up, zonder recursie)."""
+        order = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            order.append(current)
+            if current.children is not None:
+                stack.extend(current.children.values())
+        # Kinderen staan later in `order` dan hun ouder: van achter naar voren
+        for current in reversed(order):
+            self._recompute(current, rank)
+
+    def _recompute(self, node: _Node, rank) -> None:
+        """Top-k van een knoop uit zijn eigen ID's en de top-k van zijn kinderen."""
+        children = node.children
+        if node.ids is None and children is not None and len(children) == 1:
+            # Maar één kind (de root, of na een split): tuple delen in plaats van kopiëren
+            node.top = next(iter(children.values())).top
+            return
+        if children is None:
+            # Blad: de ID's zelf op volgorde houden, dan zijn ze ook de top-k
+            ids = tuple(sorted(node.ids or (), key=rank))
+            node.ids = ids or None
+            node.top = ids if len(ids) <= self.k else ids[:self.k]
+            return
+        candidates = set(node.ids or ())
+        for child in children.values():
+            candidates.update(child.top)
+        node.top = tuple(sorted(candidates, key=rank)[:self.k])
+
+    def _add(self, product_id: int, name: str, popularity: int) -> None:
+        """Voeg één product toe (lock moet al vastgehouden worden)."""
+        self._products[product_id] = (name, popularity)
+        self._rank[product_id] = _rank(product_id, name, popularity)
+        rank = self._rank.__getitem__
+        for key in keys_for(name):
+            path = _insert(self._root, key)
+            path[-1].ids = (*(path[-1].ids or ()), product_id)
+            for node in reversed(path):
+                self._recompute(node, rank)
+
+    def _remove(self, product_id: int) -> None:
+        """Haal één product uit de trie (lock moet al vastgehouden worden)."""
+        entry = self._products.get(product_id)
+        if entry is None:
+            return
+        rank = self._rank.__getitem__
+        for key in keys_for(entry[0]):
+            # De sleutel staat in de trie, dus _insert() maakt niets nieuws
+            path = _insert(self._root, key)
+            node = path[-1]
+            node.ids = tuple(other for other in node.ids if other != product_id) or None
+            if node.ids is None and node.children is None and len(path) > 1:
+                # Lege knoop weg; de ouder kan daarna samengevoegd worden
+                del path[-2].children[node.label[0]]
+                path.pop()
+                if not path[-1].children:
+                    path[-1].children = None
+            _merge_chain(path)
+            for node in reversed(path):
+                if product_id in node.top:
+                    self._recompute(node, rank)
+        del self._products[product_id]
+        del self._rank[product_id]
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,147 @@
+"""
+Achtergrond jobs van de webshop (Week 7b).
+
+Elke functie hier is een job handler voor de wachtrij uit jobs.py. Een
+handler krijgt alleen JSON argumenten (ID's, geen model objecten): de
+job kan later of in een ander proces draaien, dus de handler haalt de
+actuele gegevens zelf op. Handlers draaien in een app context.
+
+Een handler moet veilig opnieuw uitgevoerd kunnen worden: na een fout
+(of een gestopt proces) probeert de wachtrij hem nog een keer.
+"""
+import csv
+import io
+from datetime import datetime
+
+from flask import current_app
+
+from webshop_app.images import image_store
+from webshop_app.jobs import jobs
+from webshop_app.mail import mail_sink
+from webshop_app.models import db, Category, Order, OrderItem, Product
+from webshop_app.recommendations import recommender
+
+
+@jobs.task('send_contact_mail')
+def send_contact_mail(name: str, email: str, subject: str, message: str) -> None:
+    """Stuur een contactbericht door naar de admin.
+
+    De bevestiging aan de klant is een aparte job: faalt een van de twee
+    mails, dan stuurt de nieuwe poging de andere niet nog een keer.
+
+    Args:
+        name: Naam van de afzender
+        email: Email adres van de afzender
+        subject: Onderwerp
+        message: Het bericht
+    """
+    mail_sink.send(
+        current_app.config['MAIL_ADMIN'],
+        f'[Contact] {subject}',
+        f'Van: {name} <{email}>\n\n{message}\n',
+        reply_to=email,
+    )
+
+
+@jobs.task('send_contact_confirmation')
+def send_contact_confirmation(name: str, email: str, subject: str) -> None:
+    """Bevestig een contactbericht aan de klant.
+
+    Args:
+        name: Naam van de afzender
+        email: Email adres van de afzender
+        subject: Onderwerp van het bericht
+    """
+    mail_sink.send(
+        email,
+        'We hebben je bericht ontvangen',
+        f'Beste {name},\n\nBedankt voor je bericht "{subject}". '
+        f'We nemen zo snel mogelijk contact met je op.\n\nMet vriendelijke groet,\nDe Webshop\n',
+    )
+
+
+@jobs.task('send_order_confirmation')
+def send_order_confirmation(order_id: int) -> None:
+    """Stuur de orderbevestiging naar de klant.
+
+    Args:
+        order_id: ID van de bestelling
+    """
+    stmt = (
+        db.select(Order)
+        .where(Order.id == order_id)
+        .options(
+            db.joinedload(Order.customer),
+            db.selectinload(Order.order_items).joinedload(OrderItem.product),
+        )
+    )
+    order = db.session.execute(stmt).scalar_one_or_none()
+    if order is None:
+        # Bestelling is inmiddels verwijderd: niets meer te bevestigen
+        return
+    lines = [
+        f'{item.quantity} x {item.product.name:<40} €{item.subtotal:>9.2f}'
+        for item in order.order_items
+    ]
+    body = (
+        f'Beste {order.customer.name},\n\n'
+        f'Bedankt voor je bestelling #{order.id}.\n\n'
+        + '\n'.join(lines)
+        + f'\n\nTotaal: €{order.total_amount:.2f}\n\nMet vriendelijke groet,\nDe Webshop\n'
+    )
+    mail_sink.send(order.customer.email, f'Bevestiging van bestelling #{order.id}', body)
+
+
+@jobs.task('catalog_report')
+def catalog_report(recipient: str) -> None:
+    """Maak een CSV rapport van de catalogus en mail het als bijlage.
+
+    Args:
+        recipient: Email adres van de ontvanger
+    """
+    stmt = (
+        db.select(Category.name, Product.id, Product.name, Product.price, Product.stock)
+        .join(Product, Product.category_id == Category.id)
+        .order_by(Category.name, Product.name)
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['categorie', 'product_id', 'naam', 'prijs', 'voorraad'])
+    count = stock_value = 0
+    # Per batch uit de cursor, zodat een grote catalogus niet in één keer in het geheugen staat
+    for row in db.session.execute(stmt.execution_options(yield_per=500)):
+        writer.writerow([row[0], row[1], row[2], f'{row[3]:.2f}', row[4]])
+        count += 1
+        stock_value += row[3] * row[4]
+
+    filename = f"catalogus-{datetime.now():%Y%m%d-%H%M}.csv"
+    mail_sink.send(
+        recipient,
+        'Catalogus rapport',
+        f'In de bijlage staan {count} producten.\nTotale voorraadwaarde: €{stock_value:.2f}\n',
+        attachments=[(filename, buffer.getvalue().encode('utf-8'), 'text/csv')],
+    )
+
+
+@jobs.task('make_image_variants')
+def make_image_variants(name: str) -> None:
+    """Maak de verkleinde varianten (thumb, card, large) van een productafbeelding.
+
+    Args:
+        name: Naam van de afbeelding (Product.image)
+    """
+    image_store.make_variants(name)
+
+
+@jobs.task('update_recommendations')
+def update_recommendations(full: bool = False) -> None:
+    """Werk de "vaak samen gekocht" aanbevelingen bij.
+
+    Args:
+        full: Alles opnieuw tellen in plaats van alleen de nieuwe bestellingen
+    """
+    result = recommender.rebuild() if full else recommender.update()
+    current_app.logger.info(
+        "Aanbevelingen: %(orders)d bestellingen, %(pairs)d paren, %(products)d producten in %(seconds).2fs",
+        result,
+    )
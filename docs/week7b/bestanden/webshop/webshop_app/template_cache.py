@@ -0,0 +1,94 @@
+"""
+Jinja bytecode cache en template warm-up (Week 7b).
+
+Jinja compileert elk template bij het eerste gebruik naar Python code.
+Een nieuw worker proces doet dat dus opnieuw voor base.html en alle
+blueprint templates: de eerste requests na een deploy zijn merkbaar
+trager. Deze module:
+- Bewaart de gecompileerde templates in een FileSystemBytecodeCache, die
+  gedeeld wordt door alle workers en herstarts overleeft
+- Kan bij het opstarten alle templates vooraf laden (warm-up), zodat geen
+  enkele bezoeker op de compilatie hoeft te wachten
+
+Hoe lang de warm-up duurt staat in stats() en in de log. Vergelijk zelf
+met `python bench_templates.py`.
+"""
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+
+class TemplateCache:
+    """Flask extensie voor de bytecode cache en warm-up van templates."""
+
+    def __init__(self):
+        """Maak een (nog niet geconfigureerde) TemplateCache aan."""
+        self.directory = None
+        self.warmed_up = 0
+        self.warmup_seconds = 0.0
+
+    def init_app(self, app) -> None:
+        """Zet de bytecode cache op de Jinja environment en doe de warm-up.
+
+        Roep dit aan nadat alle blueprints geregistreerd zijn, anders
+        worden hun templates niet meegenomen in de warm-up.
+
+        Config keys:
+            TEMPLATE_CACHE_DIR: Map voor de bytecode cache
+                (default .jinja_cache naast webshop.db, None = uit)
+            TEMPLATE_WARMUP: Alle templates laden bij het opstarten (default False)
+
+        Args:
+            app: Flask app instance
+        """
+        self.directory = app.config.setdefault(
+            'TEMPLATE_CACHE_DIR', os.path.join(os.path.dirname(app.root_path), '.jinja_cache')
+        )
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(self.directory)
+        app.extensions['template_cache'] = self
+
+        if app.config.setdefault('TEMPLATE_WARMUP', False):
+            self.warm_up(app)
+            app.logger.info(
+                "Template warm-up: %d templates in %.1f ms", self.warmed_up, self.warmup_seconds * 1000
+            )
+
+    def warm_up(self, app) -> int:
+        """Laad (en compileer zo nodig) alle templates van de app en blueprints.
+
+        Args:
+            app: Flask app instance
+
+        Returns:
+            Aantal geladen templates
+        """
+        start = time.perf_counter()
+        names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+        for name in names:
+            app.jinja_env.get_template(name)
+        self.warmed_up = len(names)
+        self.warmup_seconds = time.perf_counter() - start
+        return self.warmed_up
+
+    def clear(self) -> None:
+        """Verwijder alle gecompileerde templates uit de cache map."""
+        if self.directory is not None:
+            FileSystemBytecodeCache(self.directory).clear()
+
+    def stats(self) -> dict:
+        """Geef de map en de duur van de laatste warm-up.
+
+        Returns:
+            Dict met directory, templates en warmup_ms
+        """
+        return {
+            'directory': self.directory,
+            'templates': self.warmed_up,
+            'warmup_ms': self.warmup_seconds * 1000,
+        }
+
+
+template_cache = TemplateCache()
@@ -0,0 +1,76 @@
+"""
+Hulpfuncties voor tests van de webshop (Week 7b).
+
+Voorbeeld:
+    from webshop_app import create_app
+    from webshop_app.testing import assert_max_queries, assert_startup_budget
+
+    def test_startup_snel_genoeg():
+        assert_startup_budget(1500)
+
+    def test_index_zonder_n_plus_1():
+        client = create_app('testing').test_client()
+        with assert_max_queries(3):
+            client.get('/')
+
+create_app('testing') is goedkoop (geen bestanden, geen process pool,
+geen warm-up), dus elke test kan gerust een eigen app maken.
+"""
+from contextlib import contextmanager
+
+from webshop_app.query_budget import count_queries
+from webshop_app.startup import measure_startup
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, repeat_threshold: int | None = None):
+    """Controleer dat het with-blok hoogstens max_queries statements uitvoert.
+
+    Args:
+        max_queries: Maximaal aantal SQL statements
+        repeat_threshold: Faal ook als één statement zo vaak (met andere
+            parameters) uitgevoerd wordt, bv. 3 voor N+1 detectie
+
+    Raises:
+        AssertionError: Met de lijst uitgevoerde statements
+    """
+    with count_queries() as counter:
+        yield counter
+
+    problems = []
+    if counter.count > max_queries:
+        problems.append(f"{counter.count} queries uitgevoerd, maximaal {max_queries} toegestaan")
+    if repeat_threshold is not None:
+        for statement, n in counter.repeated(repeat_threshold):
+            problems.append(f"N+1: {n}x {statement}")
+    if problems:
+        listing = '\n'.join(f"  {i}. {statement}" for i, statement in enumerate(counter.statements, 1))
+        raise AssertionError('\n'.join(problems) + '\nStatements:\n' + listing)
+
+
+def assert_startup_budget(max_ms: float, config_name: str = 'testing') -> dict:
+    """Controleer dat import + create_app() binnen het budget blijven.
+
+    De meting gebeurt in een nieuw Python proces, anders zijn alle
+    imports al gedaan en meet je alleen create_app().
+
+    Args:
+        max_ms: Maximale duur in milliseconden
+        config_name: Configuratie naam voor create_app()
+
+    Returns:
+        De gemeten timings (zie measure_startup())
+
+    Raises:
+        AssertionError: Als de startup langer duurt dan max_ms
+    """
+    timings = measure_startup(config_name)
+    if timings['total_ms'] > max_ms:
+        slowest = sorted(timings['steps'].items(), key=lambda s: -s[1])[:3]
+        details = ', '.join(f'{name} {ms:.1f} ms' for name, ms in slowest)
+        raise AssertionError(
+            f"Startup duurt {timings['total_ms']:.0f} ms (budget {max_ms:.0f} ms): "
+            f"import {timings['import_ms']:.0f} ms, create_app {timings['create_app_ms']:.0f} ms "
+            f"(traagste stappen: {details})"
+        )
+    return timings
@@ -0,0 +1,247 @@
+"""
+Cache voor ingelogde gebruikers (Week 7b).
+
+Flask-Login roept bij elke request van een ingelogde gebruiker de
+user_loader aan. Zonder cache is dat een database query per request,
+ook als de gebruiker alleen door de catalogus bladert.
+
+Deze module bewaart een klein "principal" object (id, naam, admin-vlag)
+in een begrensde LRU-cache met een time-to-live (TTL). Zolang een entry
+geldig is, wordt current_user zonder database query opgebouwd.
+
+Invalidatie gebeurt bij:
+- Uitloggen (auth.logout)
+- Wijzigen van naam, wachtwoord of admin rechten (SQLAlchemy event, na
+  de commit)
+- Verlopen van de TTL
+
+Met meerdere worker processen (serve.py) heeft elk proces zijn eigen
+cache. Een wijziging verhoogt daarom ook een generatie in een
+versiebestand (zoals catalog.version); elk proces ziet dat met een
+os.stat() bij de volgende lookup en leegt dan zijn cache.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask_login import UserMixin, logout_user
+
+from webshop_app.catalog import VersionFile
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Minimale gegevens van een ingelogde gebruiker.
+
+    Attributes:
+        id: Primary key van de Customer
+        name: Naam (voor de navigatiebalk)
+        is_admin: Admin rechten
+    """
+    id: int
+    name: str
+    is_admin: bool
+
+
+class UserDeleted(AttributeError):
+    """De gecachte gebruiker bestaat niet meer in de database."""
+
+
+class CachedUser(UserMixin):
+    """Lichtgewicht current_user op basis van een gecachte Principal.
+
+    De attributen id, name en is_admin komen direct uit de cache.
+    Alle andere attributen (email, orders, created_at, ...) worden bij
+    eerste gebruik doorgestuurd naar het echte Customer object, dat dan
+    pas uit de database geladen wordt. Is de Customer intussen
+    verwijderd, dan wordt de gebruiker uitgelogd en volgt een UserDeleted.
+    """
+
+    def __init__(self, principal: Principal, loader):
+        """Maak een CachedUser aan.
+
+        Args:
+            principal: Gecachte gegevens van de gebruiker
+            loader: Functie die het volledige Customer object laadt
+        """
+        self.id = principal.id
+        self.name = principal.name
+        self.is_admin = principal.is_admin
+        self._loader = loader
+        self._customer = None
+
+    def __getattr__(self, name: str):
+        """Laad het Customer object pas als een onbekend attribuut nodig is."""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._customer is None:
+            self._customer = self._loader(self.id)
+            if self._customer is None:
+                logout_user()
+                raise UserDeleted(f'Gebruiker {self.id} bestaat niet meer (uitgelogd)')
+        return getattr(self._customer, name)
+
+    def __repr__(self) -> str:
+        """String representatie voor debugging."""
+        return f'<CachedUser {self.name}>'
+
+
+class PrincipalCache:
+    """Begrensde LRU-cache met TTL voor ingelogde gebruikers.
+
+    De cache is thread-safe zodat meerdere request threads hem
+    tegelijk kunnen gebruiken. Hit-rate statistieken zijn op te vragen
+    met stats().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        """Maak een lege cache aan.
+
+        Args:
+            maxsize: Maximaal aantal gebruikers in de cache
+            ttl: Levensduur van een entry in seconden
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._generation = VersionFile()
+        self._seen_generation = self._generation.version
+
+    def init_app(self, app) -> None:
+        """Lees de cache instellingen uit de app configuratie.
+
+        Config keys:
+            USER_CACHE_SIZE: Maximaal aantal entries (default 1024)
+            USER_CACHE_TTL: Levensduur in seconden (default 300)
+            USER_CACHE_VERSION_PATH: Generatiebestand dat alle processen delen
+                (default users.version naast webshop.db, None = in geheugen)
+
+        Args:
+            app: Flask app instance
+        """
+        self.maxsize = app.config.setdefault('USER_CACHE_SIZE', 1024)
+        self.ttl = app.config.setdefault('USER_CACHE_TTL', 300.0)
+        self._generation.configure(app.config.setdefault(
+            'USER_CACHE_VERSION_PATH', os.path.join(os.path.dirname(app.root_path), 'users.version')
+        ))
+        app.extensions['principal_cache'] = self
+        self.clear()
+
+    def generation(self) -> int:
+        """Huidige generatie; geef hem mee aan put() (zie load_user).
+
+        Returns:
+            Generatienummer uit het versiebestand
+        """
+        return self._generation.version
+
+    def get(self, user_id: int) -> Principal | None:
+        """Zoek een gebruiker op in de cache.
+
+        Args:
+            user_id: ID van de gebruiker
+
+        Returns:
+            De Principal als die in de cache staat en niet verlopen is,
+            anders None
+        """
+        now = time.monotonic()
+        generation = self._generation.version
+        with self._lock:
+            if generation != self._seen_generation:
+                # Een ander proces (of thread) heeft een klant gewijzigd
+                self._entries.clear()
+                self._seen_generation = generation
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return principal
+
+    def put(self, customer, generation: int | None = None) -> Principal:
+        """Zet een gebruiker in de cache.
+
+        Args:
+            customer: Customer object (of iets met id, name en is_admin)
+            generation: generation() van vóór het laden uit de database. Is
+                er sindsdien een klant gewijzigd, dan kan customer al oud
+                zijn en wordt hij niet gecachet.
+
+        Returns:
+            De (eventueel niet opgeslagen) Principal
+        """
+        principal = Principal(customer.id, customer.name, bool(customer.is_admin))
+        if generation is not None and generation != self._generation.version:
+            return principal
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """Verwijder een gebruiker uit de cache van dit proces.
+
+        Args:
+            user_id: ID van de gebruiker
+        """
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self._invalidations += 1
+
+    def invalidate_everywhere(self, user_ids) -> None:
+        """Verwijder gewijzigde gebruikers uit de caches van alle processen.
+
+        Verhoogt de generatie: elk proces leegt bij de volgende lookup zijn
+        cache. Roep dit pas na de commit aan, anders kan een ander request
+        de oude rij nog laden en cachen.
+
+        Args:
+            user_ids: IDs van de gewijzigde gebruikers
+        """
+        for user_id in user_ids:
+            self.invalidate(user_id)
+        self._generation.bump()
+
+    def clear(self) -> None:
+        """Leeg de cache (statistieken blijven behouden)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Geef hit-rate statistieken van de cache.
+
+        Returns:
+            Dict met size, hits, misses, hit_rate, expired, evictions
+            en invalidations
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }